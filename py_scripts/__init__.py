@@ -0,0 +1,8 @@
+# The scripts import their siblings by module name, as they do when run from this directory;
+# putting the directory on sys.path keeps those imports working under the py_scripts package too.
+import os
+import sys
+
+_SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if _SCRIPTS_DIR not in sys.path:
+    sys.path.append(_SCRIPTS_DIR)
@@ -0,0 +1,275 @@
+# Import necessary libraries
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import mongomock
+
+from data_preprocessing import (COUNTRIES_LIST, ENTRY_FIELDS, IMPUTATION_STRATEGIES, get_co2_emission_data,
+                                list_countries, preprocess_data, preprocess_frame, stream_co2_emission_data)
+from processed_data import load_processed, save_processed
+from emissions_cube import EmissionsCube, build_cube
+from emissions_store import EmissionsStore
+from rolling_engine import WINDOWS, grouped_rolling
+
+# Measure wall time and peak traced memory of a single call
+def measure(func, *args, **kwargs):
+    """Run func untraced for timing, then traced for memory; return (result, elapsed seconds, peak bytes)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+# Print one benchmark line per implementation
+def report(title, results):
+    """Print elapsed time and peak memory for each (name, elapsed, peak) result."""
+    print(f"\n{title}")
+    for name, elapsed, peak in results:
+        print(f"  {name:<28} {elapsed:8.3f} s  {peak / 2**20:9.1f} MiB peak")
+
+# Build synthetic OWID-style country documents
+def make_synthetic_documents(n_countries=250, n_years=270, n_extra_fields=70, seed=42):
+    """Return one {country: {iso_code, data}} document per country with random yearly entries."""
+    rng = np.random.default_rng(seed)
+    fields = [field for field in ENTRY_FIELDS if field != 'year']
+    extra_fields = [f'extra_metric_{i}' for i in range(n_extra_fields)]
+    documents = []
+    for c in range(n_countries):
+        values = rng.random((n_years, len(fields) + n_extra_fields))
+        entries = []
+        for y in range(n_years):
+            entry = {'year': 1750 + y}
+            entry.update(zip(fields + extra_fields, values[y].tolist()))
+            entries.append(entry)
+        documents.append({f'Country {c:03d}': {'iso_code': f'C{c:03d}', 'data': entries}})
+    return documents
+
+# Load synthetic documents into an in-memory mongomock collection
+def make_synthetic_collection(**kwargs):
+    """Return a mongomock collection filled with synthetic country documents."""
+    collection = mongomock.MongoClient()['group_5_project']['co2_emission']
+    collection.insert_many(make_synthetic_documents(**kwargs))
+    return collection
+
+# Benchmark the list-of-dicts extractor against the streaming extractor
+def benchmark_extraction(collection):
+    """Compare get_co2_emission_data and stream_co2_emission_data on the same collection."""
+    # Key discovery runs server-side on Atlas but in Python on mongomock, so time it separately
+    countries, list_time, list_peak = measure(list_countries, collection)
+    _, legacy_time, legacy_peak = measure(get_co2_emission_data, collection)
+    _, stream_time, stream_peak = measure(stream_co2_emission_data, collection, countries=countries)
+    report("Mongo extraction", [
+        ('list_countries', list_time, list_peak),
+        ('get_co2_emission_data', legacy_time, legacy_peak),
+        ('stream_co2_emission_data', stream_time, stream_peak),
+    ])
+
+# Build a synthetic extracted frame with missing values
+def make_synthetic_frame(n_rows=10_000_000, n_countries=250, missing_rate=0.2, seed=42):
+    """Return a frame in the extracted schema with ~missing_rate NaNs in every numeric column."""
+    rng = np.random.default_rng(seed)
+    countries = COUNTRIES_LIST + [f'Region {i}' for i in range(n_countries - len(COUNTRIES_LIST))]
+    df = pd.DataFrame({
+        'Country': pd.Categorical.from_codes(rng.integers(0, len(countries), n_rows), categories=countries),
+        'ISO_Code': 'XXX',
+        'Year': rng.integers(1750, 2023, n_rows),
+    })
+    for column in IMPUTATION_STRATEGIES:
+        values = rng.random(n_rows)
+        values[rng.random(n_rows) < missing_rate] = np.nan
+        df[column] = values
+    return df
+
+# Benchmark the column-by-column preprocessing against the single-block engine
+def benchmark_preprocessing(df):
+    """Compare preprocess_data and preprocess_frame on copies of the same frame."""
+    _, legacy_time, legacy_peak = measure(lambda: preprocess_data(df.copy()))
+    _, frame_time, frame_peak = measure(lambda: preprocess_frame(df))
+    report(f"Preprocessing ({len(df):,} rows)", [
+        ('preprocess_data', legacy_time, legacy_peak),
+        ('preprocess_frame', frame_time, frame_peak),
+    ])
+
+# Benchmark CSV re-parsing against typed, projected Parquet loading
+def benchmark_processed_load(processed_df, countries=COUNTRIES_LIST[:10]):
+    """Compare pd.read_csv of the full CSV with load_processed of three columns for ten countries."""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'processed.csv')
+        parquet_path = os.path.join(tmp, 'processed.parquet')
+        processed_df.to_csv(csv_path, index=False)
+        save_processed(processed_df, parquet_path)
+
+        _, csv_time, csv_peak = measure(pd.read_csv, csv_path)
+        _, full_time, full_peak = measure(load_processed, parquet_path)
+        _, projected_time, projected_peak = measure(
+            load_processed, parquet_path, columns=['Country', 'Year', 'CO2_per_capita'], countries=countries)
+    report(f"Processed data load ({len(processed_df):,} rows)", [
+        ('pd.read_csv', csv_time, csv_peak),
+        ('load_processed', full_time, full_peak),
+        ('load_processed (projected)', projected_time, projected_peak),
+    ])
+
+# Build a synthetic panel with one row per country-year
+def make_synthetic_panel(n_countries=250, n_years=270, n_metrics=80, seed=42):
+    """Return a Country/Year frame with n_metrics random float columns."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Country': pd.Categorical(np.repeat([f'Country {c:03d}' for c in range(n_countries)], n_years)),
+        'Year': np.tile(np.arange(1750, 1750 + n_years), n_countries),
+    })
+    metrics = rng.random((len(df), n_metrics))
+    return pd.concat([df, pd.DataFrame(metrics, columns=[f'metric_{i}' for i in range(n_metrics)])], axis=1)
+
+# Benchmark per-group lambda rolling means against the vectorized grouped rolling engine
+def benchmark_rolling(df, windows=WINDOWS):
+    """Compare groupby().transform(lambda ...) moving averages with grouped_rolling on every metric."""
+    metrics = [column for column in df.columns if column not in ('Country', 'Year')]
+
+    def lambda_means():
+        grouped = df.groupby('Country', observed=True)
+        return {f'{column}_mean_{window}': grouped[column].transform(
+                    lambda x: x.rolling(window=window, min_periods=1).mean())
+                for window in windows for column in metrics}
+
+    _, lambda_time, lambda_peak = measure(lambda_means)
+    _, mean_time, mean_peak = measure(grouped_rolling, df, metrics, windows, ('mean',))
+    _, all_time, all_peak = measure(grouped_rolling, df, metrics, windows)
+    report(f"Grouped rolling ({len(df):,} rows x {len(metrics)} metrics, windows {windows})", [
+        ('lambda transform (mean)', lambda_time, lambda_peak),
+        ('grouped_rolling (mean)', mean_time, mean_peak),
+        ('grouped_rolling (all stats)', all_time, all_peak),
+    ])
+
+# Time a statement in a fresh interpreter so module caches do not hide import cost
+def time_fresh(statement, setup="pass"):
+    """Return the seconds `statement` takes in a new Python process, after running setup."""
+    code = (f"import sys, time; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); {setup}; "
+            f"start = time.perf_counter(); {statement}; print(time.perf_counter() - start)")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+# Benchmark EDA import time and time to the first rendered figure
+def benchmark_eda(n_countries=250, n_years=270):
+    """Report `import eda`, the first figure (including the deferred plotting imports) and a warm figure."""
+    panel = make_synthetic_panel(n_countries, n_years, n_metrics=2).rename(
+        columns={'metric_0': 'Population', 'metric_1': 'CO2'})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'eda.parquet')
+        panel.assign(ISO_Code='XXX').to_parquet(path, index=False)
+        setup = ("import matplotlib; matplotlib.use('Agg'); import pandas as pd; "
+                 f"raw = pd.read_parquet({path!r})")
+        import_time = time_fresh("import eda")
+        first_plot = time_fresh("import eda; eda.plot_co2_over_time(eda.prepare_eda_frame(raw), 'Country 000')",
+                                setup)
+        warm_plot = time_fresh("eda.plot_co2_over_time(df, 'Country 001')",
+                               setup + "; import eda; df = eda.prepare_eda_frame(raw); "
+                                       "eda.plot_co2_over_time(df, 'Country 000')")
+    print(f"\nEDA ({len(panel):,} rows)")
+    for name, elapsed in [('import eda', import_time), ('first figure', first_plot), ('warm figure', warm_plot)]:
+        print(f"  {name:<28} {elapsed:8.3f} s")
+
+# Benchmark full and density rendering of the two all-country EDA charts as rows grow
+def benchmark_density_rendering(row_counts=(20_000, 200_000, 2_000_000), full_limit=200_000, n_countries=250):
+    """Report render seconds and PNG bytes of eda charts 4 and 6 in 'full' and 'density' mode."""
+    import io
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from eda import plot_co2_by_country, plot_population_vs_co2
+
+    def render(plot, df, mode):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        plot(df, mode=mode).savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+        elapsed = time.perf_counter() - start
+        plt.close('all')
+        return elapsed, buffer.tell()
+
+    print("\nDensity rendering")
+    for n_rows in row_counts:
+        df = make_synthetic_panel(n_countries, n_rows // n_countries, n_metrics=2).rename(
+            columns={'metric_0': 'Population', 'metric_1': 'CO2'})
+        # Emission series are trends rather than white noise: use one random walk per country
+        df['CO2'] = (df['CO2'] - 0.5).groupby(df['Country'], observed=True).cumsum()
+        for plot in (plot_population_vs_co2, plot_co2_by_country):
+            for mode in ('full', 'density'):
+                if mode == 'full' and n_rows > full_limit:
+                    continue
+                elapsed, size = render(plot, df, mode)
+                print(f"  {plot.__name__:<24} {mode:<8} {len(df):>10,} rows {elapsed:8.3f} s {size / 1024:8.0f} KiB")
+
+# Benchmark per-country boolean masks against EmissionsStore slices
+def benchmark_country_lookup(df, n_lookups=20, column='metric_0'):
+    """Compare df[df['Country'] == c] with EmissionsStore views for n_lookups countries."""
+    countries = list(df['Country'].cat.categories[:n_lookups])
+
+    def masks():
+        return [df[df['Country'] == country][column].to_numpy() for country in countries]
+
+    def store_views():
+        store = EmissionsStore(df, columns=[column])
+        return [store.column(column, country) for country in countries]
+
+    _, mask_time, mask_peak = measure(masks)
+    _, store_time, store_peak = measure(store_views)
+    store = EmissionsStore(df, columns=[column])
+    _, lookup_time, lookup_peak = measure(lambda: [store.column(column, country) for country in countries])
+    report(f"Country lookups ({len(df):,} rows, {n_lookups} countries)", [
+        ('boolean masks', mask_time, mask_peak),
+        ('EmissionsStore (incl. build)', store_time, store_peak),
+        ('EmissionsStore (lookups)', lookup_time, lookup_peak),
+    ])
+
+# Benchmark dashboard queries on row-level data against the precomputed cube
+def benchmark_cube_queries(df):
+    """Compare groupby over the rows with EmissionsCube.query for a few roll-up and drill-down queries."""
+    sources = ['Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2']
+    decade = df['Year'] // 10 * 10
+
+    def groupbys():
+        return [df.groupby('Year')[sources].sum(),
+                df.groupby(decade)['CO2'].mean(),
+                df[df['Country'] == 'China'].groupby(decade)[sources].sum()]
+
+    _, build_time, build_peak = measure(lambda: build_cube(df))
+    cube = EmissionsCube(build_cube(df))
+
+    def queries():
+        return [cube.source_breakdown('Year'),
+                cube.query('Decade', 'CO2', stat='mean'),
+                cube.source_breakdown('Decade', filters={'Country': 'China'})]
+
+    _, groupby_time, groupby_peak = measure(groupbys)
+    _, query_time, query_peak = measure(queries)
+    report(f"Breakdown queries ({len(df):,} rows, 3 queries)", [
+        ('groupby over rows', groupby_time, groupby_peak),
+        ('build_cube (once)', build_time, build_peak),
+        ('EmissionsCube.query', query_time, query_peak),
+    ])
+
+# Main function
+def main():
+    collection = make_synthetic_collection()
+    benchmark_extraction(collection)
+    df = make_synthetic_frame()
+    benchmark_preprocessing(df)
+    benchmark_processed_load(preprocess_frame(df))
+    benchmark_rolling(make_synthetic_panel())
+    benchmark_country_lookup(make_synthetic_panel(n_metrics=1))
+    benchmark_cube_queries(df)
+    benchmark_eda()
+    benchmark_density_rendering()
+
+# Run the main function
+if __name__ == "__main__":
+    main()
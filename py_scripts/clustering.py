@@ -0,0 +1,238 @@
+# Import necessary libraries
+from functools import partial
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+from country_summary import build_country_summary
+from data_cache import CACHE_DIR, iter_cache, refresh_cache
+from data_preprocessing import connect_to_mongodb
+from parallel import map_tasks
+
+# Same features as the clustering in notebooks/analysis_co2_sources.ipynb
+FEATURES = ['Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2', 'Population']
+K_VALUES = range(2, 11)
+BATCH_SIZE = 4096
+SILHOUETTE_SAMPLE = 10_000
+MAX_LEAVES = 500
+START_DECADE = 1950
+
+# Rows of a chunk with every feature present, as a float array
+def chunk_features(chunk, features=FEATURES):
+    """Return (X, complete) where complete marks the chunk rows kept in X."""
+    X = chunk[features].to_numpy(dtype=np.float64)
+    complete = ~np.isnan(X).any(axis=1)
+    return X[complete], complete
+
+# First streaming pass: feature means and variances
+def stream_scaler(make_chunks, features=FEATURES):
+    """Return a StandardScaler fitted chunk by chunk over make_chunks()."""
+    scaler = StandardScaler()
+    for chunk in make_chunks():
+        X, _ = chunk_features(chunk, features)
+        if len(X):
+            scaler.partial_fit(X)
+    return scaler
+
+# Mini-batch k-means over every row without holding the dataset in memory
+def stream_kmeans(make_chunks, n_clusters=3, features=FEATURES, scaler=None, n_epochs=1, batch_size=BATCH_SIZE,
+                  random_state=42):
+    """Return (scaler, model) fitted with MiniBatchKMeans.partial_fit over n_epochs passes of make_chunks().
+
+    make_chunks is called once per pass and must return a fresh iterable of DataFrames, e.g.
+    lambda: iter_cache(columns=FEATURES). Rows with a missing feature are skipped. The scaled rows
+    are regrouped into mini-batches of batch_size rows whatever the chunk size; the centres are
+    initialized once, from the first mini-batch, as partial_fit does not restart.
+    """
+    scaler = stream_scaler(make_chunks, features) if scaler is None else scaler
+    model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=random_state, n_init=1)
+    # The first partial_fit must see at least n_clusters rows to initialize the centres
+    step = max(batch_size, n_clusters)
+    pending = np.empty((0, len(features)))
+    for _ in range(n_epochs):
+        for chunk in make_chunks():
+            X, _ = chunk_features(chunk, features)
+            if len(X):
+                pending = np.vstack([pending, scaler.transform(X)])
+            while len(pending) >= step:
+                model.partial_fit(pending[:step])
+                pending = pending[step:]
+    if len(pending) >= n_clusters or (len(pending) and hasattr(model, 'cluster_centers_')):
+        model.partial_fit(pending)
+    return scaler, model
+
+# Second streaming pass: labels for every row
+def predict_chunks(make_chunks, scaler, model, features=FEATURES):
+    """Return the cluster label of every row of make_chunks(), -1 for rows with a missing feature."""
+    labels = []
+    for chunk in make_chunks():
+        X, complete = chunk_features(chunk, features)
+        chunk_labels = np.full(len(chunk), -1, dtype=np.int64)
+        if len(X):
+            chunk_labels[complete] = model.predict(scaler.transform(X))
+        labels.append(chunk_labels)
+    return np.concatenate(labels) if labels else np.empty(0, dtype=np.int64)
+
+# Uniform sample of scaled rows drawn in one pass
+def sample_rows(make_chunks, scaler, n_rows=SILHOUETTE_SAMPLE, features=FEATURES, random_state=42):
+    """Return up to n_rows complete rows, scaled, sampled uniformly without replacement across chunks."""
+    rng = np.random.default_rng(random_state)
+    kept, kept_keys = np.empty((0, len(features))), np.empty(0)
+    for chunk in make_chunks():
+        X, _ = chunk_features(chunk, features)
+        # Keep the rows with the n_rows smallest random keys seen so far
+        keys = np.r_[kept_keys, rng.random(len(X))]
+        rows = np.vstack([kept, X])
+        keep = np.argsort(keys, kind='stable')[:n_rows]
+        kept, kept_keys = rows[keep], keys[keep]
+    return scaler.transform(kept) if len(kept) else kept
+
+# Fit one k and score it; top-level so process workers can unpickle it
+def evaluate_k(task):
+    """Return the inertia and silhouette of k-means with task['k'] clusters on task['X']."""
+    X, k = task['X'], task['k']
+    if task['mini_batch']:
+        model = MiniBatchKMeans(n_clusters=k, batch_size=BATCH_SIZE, random_state=task['random_state'], n_init=3)
+    else:
+        model = KMeans(n_clusters=k, random_state=task['random_state'], n_init=10)
+    labels = model.fit_predict(X)
+    sample_size = min(task['silhouette_sample'], len(X))
+    silhouette = silhouette_score(X, labels, sample_size=sample_size, random_state=task['random_state'])
+    return {'k': k, 'Inertia': model.inertia_, 'Silhouette': silhouette}
+
+# Sweep k in parallel and pick the best silhouette
+def select_k(X, k_values=K_VALUES, mini_batch=None, silhouette_sample=SILHOUETTE_SAMPLE, random_state=42,
+             executor='process', max_workers=None):
+    """Return (scores, best k) where scores has the inertia and silhouette of every k in k_values.
+
+    k values with at least as many clusters as rows are skipped. mini_batch defaults to
+    MiniBatchKMeans when X has more rows than silhouette_sample.
+    """
+    mini_batch = len(X) > silhouette_sample if mini_batch is None else mini_batch
+    tasks = [{'X': X, 'k': k, 'mini_batch': mini_batch, 'silhouette_sample': silhouette_sample,
+              'random_state': random_state} for k in k_values if 2 <= k < len(X)]
+    scores = pd.DataFrame(map_tasks(evaluate_k, tasks, executor, max_workers))
+    return scores, int(scores.loc[scores['Silhouette'].idxmax(), 'k'])
+
+# Per-country trajectory: each feature's decade means over the whole series
+def trajectory_features(summary, features=FEATURES, start_decade=START_DECADE):
+    """Return one row per country with log1p decade means of each feature, standardized per column.
+
+    summary is a build_country_summary table, or several concatenated (e.g. one per streamed
+    batch); rows of the same country and decade are combined. Decades a country has no data
+    for take the nearest decade it does have; features a country never reports are left at
+    the column mean (0 after scaling).
+    """
+    summary = summary[summary['Decade'] >= start_decade]
+    columns = [f'{feature}_{stat}' for feature in features for stat in ('sum', 'count')]
+    totals = summary.groupby([summary['Country'].astype(str), 'Decade'])[columns].sum()
+    trajectories = []
+    for feature in features:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.log1p(np.clip(totals[f'{feature}_sum'] / totals[f'{feature}_count'], 0, None))
+        table = means.unstack('Decade').ffill(axis=1).bfill(axis=1)
+        table.columns = [f'{feature}_{decade}' for decade in table.columns]
+        trajectories.append(table)
+    trajectories = pd.concat(trajectories, axis=1)
+    std = trajectories.std(ddof=0).replace(0, 1.0)
+    return ((trajectories - trajectories.mean()) / std).fillna(0.0)
+
+# Cluster countries by their emission trajectories
+def cluster_countries(summary, features=FEATURES, k_values=K_VALUES, start_decade=START_DECADE, random_state=42,
+                      executor='process', max_workers=None):
+    """Return (labels, scores): a KMeans label per country with k chosen by silhouette, and the k sweep."""
+    trajectories = trajectory_features(summary, features, start_decade)
+    scores, k = select_k(trajectories.to_numpy(), k_values, mini_batch=False, random_state=random_state,
+                         executor=executor, max_workers=max_workers)
+    model = KMeans(n_clusters=k, random_state=random_state, n_init=10)
+    labels = pd.Series(model.fit_predict(trajectories.to_numpy()), index=trajectories.index, name='Cluster')
+    return labels, scores
+
+# Ward agglomeration of weighted points (micro-cluster centres)
+def ward_linkage(centers, weights):
+    """Return a SciPy-format linkage matrix of Ward clustering, each centre standing for weights[i] points.
+
+    With unit weights this equals scipy.cluster.hierarchy.linkage(centers, 'ward'). Memory is
+    quadratic in the number of centres, not in the number of rows they summarise.
+    """
+    n = len(centers)
+    sizes = np.asarray(weights, dtype=np.float64).copy()
+    squared = ((centers[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    # Ward's squared merge distance: 2 * na * nb / (na + nb) * |ca - cb|^2
+    distances = 2 * sizes[:, None] * sizes[None, :] / (sizes[:, None] + sizes[None, :]) * squared
+    np.fill_diagonal(distances, np.inf)
+    ids, members = np.arange(n), np.ones(n)
+    active = np.ones(n, dtype=bool)
+    linkage_matrix = np.zeros((n - 1, 4))
+    for step in range(n - 1):
+        flat = np.argmin(distances)
+        i, j = divmod(flat, n)
+        i, j = min(i, j), max(i, j)
+        # The count column holds centres, not rows, so the matrix stays valid for fcluster and dendrogram
+        linkage_matrix[step] = [min(ids[i], ids[j]), max(ids[i], ids[j]), np.sqrt(distances[i, j]),
+                                members[i] + members[j]]
+        # Lance-Williams update, keeping the merged cluster in slot i
+        total = sizes[i] + sizes[j] + sizes
+        merged = ((sizes[i] + sizes) * distances[i] + (sizes[j] + sizes) * distances[j]
+                  - sizes * distances[i, j]) / total
+        merged[~active] = np.inf
+        distances[i, :], distances[:, i] = merged, merged
+        distances[i, i] = np.inf
+        distances[j, :], distances[:, j] = np.inf, np.inf
+        active[j] = False
+        sizes[i] += sizes[j]
+        members[i] += members[j]
+        ids[i] = n + step
+    return linkage_matrix
+
+# Memory-bounded hierarchical clustering: stream into micro-clusters, then Ward on their centres
+def approximate_hierarchical(make_chunks, n_clusters=3, features=FEATURES, max_leaves=MAX_LEAVES, scaler=None,
+                             random_state=42):
+    """Return (scaler, leaf model, linkage matrix, leaf labels) for an approximate Ward hierarchy.
+
+    All rows are compressed into at most max_leaves mini-batch k-means centres, weighted by how
+    many rows they hold; the dendrogram is built over those centres. A row's cluster is
+    leaf_labels[leaf_model.predict(scaler.transform(X))].
+    """
+    scaler = stream_scaler(make_chunks, features) if scaler is None else scaler
+    n_leaves = int(min(max_leaves, np.min(scaler.n_samples_seen_)))
+    scaler, leaf_model = stream_kmeans(make_chunks, n_leaves, features, scaler, random_state=random_state)
+    counts = np.zeros(n_leaves)
+    for chunk in make_chunks():
+        X, _ = chunk_features(chunk, features)
+        if len(X):
+            counts += np.bincount(leaf_model.predict(scaler.transform(X)), minlength=n_leaves)
+    occupied = np.flatnonzero(counts)
+    linkage_matrix = ward_linkage(leaf_model.cluster_centers_[occupied], counts[occupied])
+    leaf_labels = np.full(n_leaves, -1, dtype=np.int64)
+    leaf_labels[occupied] = fcluster(linkage_matrix, n_clusters, criterion='maxclust') - 1
+    return scaler, leaf_model, linkage_matrix, leaf_labels
+
+# Main function
+def main(offline=False, cache_dir=CACHE_DIR):
+    # Every extracted entity in original units, like the notebook, streamed from the local cache
+    if not offline:
+        changed = refresh_cache(connect_to_mongodb(), cache_dir)
+        print(f"Cache refreshed: {len(changed)} countries re-fetched.")
+    make_chunks = partial(iter_cache, cache_dir, FEATURES)
+    scaler = stream_scaler(make_chunks)
+    scores, k = select_k(sample_rows(make_chunks, scaler))
+    print(scores.to_string(index=False))
+    scaler, model = stream_kmeans(make_chunks, k, scaler=scaler)
+    labels = predict_chunks(make_chunks, scaler, model)
+    print(f"Row clusters (k={k}):", np.bincount(labels[labels >= 0]))
+
+    # Country trajectories come from per-batch decade summaries, so the rows are streamed here too
+    summary = pd.concat([build_country_summary(chunk, FEATURES)
+                         for chunk in iter_cache(cache_dir, ['Country', 'Year'] + FEATURES)], ignore_index=True)
+    countries, country_scores = cluster_countries(summary)
+    print(country_scores.to_string(index=False))
+    for cluster, members in countries.groupby(countries):
+        print(f"Cluster {cluster}: {', '.join(map(str, members.index[:10]))}{' ...' if len(members) > 10 else ''}")
+
+# Run the main function
+if __name__ == "__main__":
+    main()
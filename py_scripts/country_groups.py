@@ -0,0 +1,120 @@
+# Import necessary libraries
+import hashlib
+import json
+
+# Continent of every OWID country, as OWID assigns them
+CONTINENT_MEMBERS = {
+    'Africa': [
+        'Algeria', 'Angola', 'Benin', 'Botswana', 'Burkina Faso', 'Burundi', 'Cameroon', 'Cape Verde',
+        'Central African Republic', 'Chad', 'Comoros', 'Congo', "Cote d'Ivoire", 'Democratic Republic of Congo',
+        'Djibouti', 'Egypt', 'Equatorial Guinea', 'Eritrea', 'Eswatini', 'Ethiopia', 'Gabon', 'Gambia', 'Ghana',
+        'Guinea', 'Guinea-Bissau', 'Kenya', 'Lesotho', 'Liberia', 'Libya', 'Madagascar', 'Malawi', 'Mali',
+        'Mauritania', 'Mauritius', 'Mayotte', 'Morocco', 'Mozambique', 'Namibia', 'Niger', 'Nigeria', 'Reunion',
+        'Rwanda', 'Saint Helena', 'Sao Tome and Principe', 'Senegal', 'Seychelles', 'Sierra Leone', 'Somalia',
+        'South Africa', 'South Sudan', 'Sudan', 'Tanzania', 'Togo', 'Tunisia', 'Uganda', 'Western Sahara', 'Zambia',
+        'Zimbabwe'],
+    'Asia': [
+        'Afghanistan', 'Armenia', 'Azerbaijan', 'Bahrain', 'Bangladesh', 'Bhutan', 'Brunei', 'Cambodia', 'China',
+        'Christmas Island', 'East Timor', 'Georgia', 'Hong Kong', 'India', 'Indonesia', 'Iran', 'Iraq', 'Israel',
+        'Japan', 'Jordan', 'Kazakhstan', 'Kuwait', 'Kyrgyzstan', 'Laos', 'Lebanon', 'Macao', 'Malaysia', 'Maldives',
+        'Mongolia', 'Myanmar', 'Nepal', 'North Korea', 'Oman', 'Pakistan', 'Palestine', 'Philippines', 'Qatar',
+        'Saudi Arabia', 'Singapore', 'South Korea', 'Sri Lanka', 'Syria', 'Taiwan', 'Tajikistan', 'Thailand',
+        'Turkey', 'Turkmenistan', 'United Arab Emirates', 'Uzbekistan', 'Vietnam', 'Yemen'],
+    'Europe': [
+        'Albania', 'Andorra', 'Austria', 'Belarus', 'Belgium', 'Bosnia and Herzegovina', 'Bulgaria', 'Croatia',
+        'Cyprus', 'Czechia', 'Denmark', 'Estonia', 'Faroe Islands', 'Finland', 'France', 'Germany', 'Gibraltar',
+        'Greece', 'Hungary', 'Iceland', 'Ireland', 'Italy', 'Kosovo', 'Latvia', 'Liechtenstein', 'Lithuania',
+        'Luxembourg', 'Malta', 'Moldova', 'Monaco', 'Montenegro', 'Netherlands', 'North Macedonia', 'Norway',
+        'Poland', 'Portugal', 'Romania', 'Russia', 'San Marino', 'Serbia', 'Slovakia', 'Slovenia', 'Spain', 'Sweden',
+        'Switzerland', 'Ukraine', 'United Kingdom', 'Vatican'],
+    'North America': [
+        'Anguilla', 'Antigua and Barbuda', 'Aruba', 'Bahamas', 'Barbados', 'Belize', 'Bermuda',
+        'Bonaire Sint Eustatius and Saba', 'British Virgin Islands', 'Canada', 'Cayman Islands', 'Costa Rica', 'Cuba',
+        'Curacao', 'Dominica', 'Dominican Republic', 'El Salvador', 'Greenland', 'Grenada', 'Guadeloupe',
+        'Guatemala', 'Haiti', 'Honduras', 'Jamaica', 'Martinique', 'Mexico', 'Montserrat', 'Nicaragua', 'Panama',
+        'Puerto Rico', 'Saint Kitts and Nevis', 'Saint Lucia', 'Saint Pierre and Miquelon',
+        'Saint Vincent and the Grenadines', 'Sint Maarten (Dutch part)', 'Trinidad and Tobago',
+        'Turks and Caicos Islands', 'United States', 'United States Virgin Islands'],
+    'South America': [
+        'Argentina', 'Bolivia', 'Brazil', 'Chile', 'Colombia', 'Ecuador', 'Falkland Islands', 'French Guiana',
+        'Guyana', 'Paraguay', 'Peru', 'Suriname', 'Uruguay', 'Venezuela'],
+    'Oceania': [
+        'Australia', 'Cook Islands', 'Fiji', 'French Polynesia', 'Guam', 'Kiribati', 'Marshall Islands',
+        'Micronesia (country)', 'Nauru', 'New Caledonia', 'New Zealand', 'Niue', 'Northern Mariana Islands', 'Palau',
+        'Papua New Guinea', 'Samoa', 'Solomon Islands', 'Tonga', 'Tuvalu', 'Vanuatu', 'Wallis and Futuna'],
+    'Antarctica': ['Antarctica'],
+}
+
+# World Bank income group of every classified country (July 2023 classification)
+INCOME_MEMBERS = {
+    'High income': [
+        'Andorra', 'Antigua and Barbuda', 'Aruba', 'Australia', 'Austria', 'Bahamas', 'Bahrain', 'Barbados',
+        'Belgium', 'Bermuda', 'British Virgin Islands', 'Brunei', 'Canada', 'Cayman Islands', 'Chile', 'Croatia',
+        'Curacao', 'Cyprus', 'Czechia', 'Denmark', 'Estonia', 'Faroe Islands', 'Finland', 'France',
+        'French Polynesia', 'Germany', 'Gibraltar', 'Greece', 'Greenland', 'Guam', 'Guyana', 'Hong Kong', 'Hungary',
+        'Iceland', 'Ireland', 'Israel', 'Italy', 'Japan', 'Kuwait', 'Latvia', 'Liechtenstein', 'Lithuania',
+        'Luxembourg', 'Macao', 'Malta', 'Monaco', 'Nauru', 'Netherlands', 'New Caledonia', 'New Zealand',
+        'Northern Mariana Islands', 'Norway', 'Oman', 'Panama', 'Poland', 'Portugal', 'Puerto Rico', 'Qatar',
+        'Romania', 'Saint Kitts and Nevis', 'San Marino', 'Saudi Arabia', 'Seychelles', 'Singapore',
+        'Sint Maarten (Dutch part)', 'Slovakia', 'Slovenia', 'South Korea', 'Spain', 'Sweden', 'Switzerland',
+        'Taiwan', 'Trinidad and Tobago', 'Turks and Caicos Islands', 'United Arab Emirates', 'United Kingdom',
+        'United States', 'United States Virgin Islands', 'Uruguay'],
+    'Upper-middle income': [
+        'Albania', 'Algeria', 'Argentina', 'Armenia', 'Azerbaijan', 'Belarus', 'Belize', 'Bosnia and Herzegovina',
+        'Botswana', 'Brazil', 'Bulgaria', 'China', 'Colombia', 'Costa Rica', 'Cuba', 'Dominica', 'Dominican Republic',
+        'Ecuador', 'El Salvador', 'Equatorial Guinea', 'Fiji', 'Gabon', 'Georgia', 'Grenada', 'Guatemala',
+        'Indonesia', 'Iraq', 'Jamaica', 'Jordan', 'Kazakhstan', 'Kosovo', 'Libya', 'Malaysia', 'Maldives',
+        'Marshall Islands', 'Mauritius', 'Mexico', 'Moldova', 'Montenegro', 'Namibia', 'North Macedonia', 'Palau',
+        'Paraguay', 'Peru', 'Russia', 'Saint Lucia', 'Saint Vincent and the Grenadines', 'Serbia', 'South Africa',
+        'Suriname', 'Thailand', 'Tonga', 'Turkey', 'Turkmenistan', 'Tuvalu'],
+    'Lower-middle income': [
+        'Angola', 'Bangladesh', 'Benin', 'Bhutan', 'Bolivia', 'Cambodia', 'Cameroon', 'Cape Verde', 'Comoros',
+        'Congo', "Cote d'Ivoire", 'Djibouti', 'East Timor', 'Egypt', 'Eswatini', 'Ghana', 'Guinea', 'Haiti',
+        'Honduras', 'India', 'Iran', 'Kenya', 'Kiribati', 'Kyrgyzstan', 'Laos', 'Lebanon', 'Lesotho', 'Mauritania',
+        'Micronesia (country)', 'Mongolia', 'Morocco', 'Myanmar', 'Nepal', 'Nicaragua', 'Nigeria', 'Pakistan',
+        'Palestine', 'Papua New Guinea', 'Philippines', 'Samoa', 'Sao Tome and Principe', 'Senegal',
+        'Solomon Islands', 'Sri Lanka', 'Tajikistan', 'Tanzania', 'Tunisia', 'Ukraine', 'Uzbekistan', 'Vanuatu',
+        'Vietnam', 'Zambia', 'Zimbabwe'],
+    'Low income': [
+        'Afghanistan', 'Burkina Faso', 'Burundi', 'Central African Republic', 'Chad', 'Democratic Republic of Congo',
+        'Eritrea', 'Ethiopia', 'Gambia', 'Guinea-Bissau', 'Liberia', 'Madagascar', 'Malawi', 'Mali', 'Mozambique',
+        'Niger', 'North Korea', 'Rwanda', 'Sierra Leone', 'Somalia', 'South Sudan', 'Sudan', 'Syria', 'Togo',
+        'Uganda', 'Yemen'],
+}
+
+# OWID entities that aggregate countries (or emissions no country owns) and so overlap the countries' rows
+AGGREGATES = [
+    'World', 'Africa', 'Asia', 'Europe', 'North America', 'South America', 'Oceania', 'Americas',
+    'High-income countries', 'Upper-middle-income countries', 'Lower-middle-income countries', 'Low-income countries',
+    'European Union (27)', 'European Union (28)', 'Asia (excl. China and India)', 'Europe (excl. EU-27)',
+    'Europe (excl. EU-28)', 'North America (excl. USA)', 'Least developed countries (Jones et al.)',
+    'OECD (Jones et al.)', 'Non-OECD (GCP)', 'OECD (GCP)', 'Africa (GCP)', 'Asia (GCP)', 'Central America (GCP)',
+    'Europe (GCP)', 'Middle East (GCP)', 'North America (GCP)', 'Oceania (GCP)', 'South America (GCP)',
+    'International aviation', 'International shipping', 'International transport', 'Kuwaiti Oil Fires (GCP)',
+    'Kuwaiti Oil Fires', 'French Equatorial Africa (GCP)', 'French West Africa (GCP)', 'Leeward Islands (GCP)',
+    'Panama Canal Zone (GCP)', 'Ryukyu Islands (GCP)', 'St. Kitts-Nevis-Anguilla (GCP)',
+]
+
+# Labels of entities outside the membership tables
+AGGREGATE = 'Aggregate'
+UNCLASSIFIED = 'Unclassified'
+
+COUNTRY_CONTINENT = {country: continent for continent, members in CONTINENT_MEMBERS.items() for country in members}
+COUNTRY_INCOME = {country: income for income, members in INCOME_MEMBERS.items() for country in members}
+_AGGREGATE_SET = set(AGGREGATES)
+
+# Fingerprint of the tables, so artifacts grouped with them are rebuilt when they change
+MEMBERSHIP_KEY = hashlib.sha1(json.dumps([CONTINENT_MEMBERS, INCOME_MEMBERS, AGGREGATES]).encode()).hexdigest()
+
+# Continent and income group of an entity
+def entity_groups(name):
+    """Return (continent, income group) of name: AGGREGATE for both when it is an aggregate entity, and
+    UNCLASSIFIED for a country missing from a table (e.g. unclassified by the World Bank)."""
+    if name in _AGGREGATE_SET:
+        return AGGREGATE, AGGREGATE
+    return COUNTRY_CONTINENT.get(name, UNCLASSIFIED), COUNTRY_INCOME.get(name, UNCLASSIFIED)
+
+# Whether an entity is a country rather than an aggregate
+def is_country(name):
+    """Return True unless name is in the explicit AGGREGATES list."""
+    return name not in _AGGREGATE_SET
@@ -0,0 +1,205 @@
+# Import necessary libraries
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SUMMARY_PATH = "../data/processed/co2_emission_country_summary.parquet"
+SUMMARY_STATISTICS = ('sum', 'count', 'min', 'max', 'last', 'last_year')
+ALL_YEARS = -1
+
+# In-process memo of summaries by data key, so repeated rankings reuse one table
+SUMMARY_MEMO = {}
+SUMMARY_MEMO_SIZE = 8
+
+# Metric columns of a frame: everything numeric except the keys
+def summary_metrics(df):
+    """Return the numeric columns of df other than Year."""
+    return [column for column in df.columns
+            if column not in ('Country', 'Year') and pd.api.types.is_numeric_dtype(df[column].dtype)]
+
+# Order-independent totals of the row hashes; totals of disjoint batches combine into those of the whole
+def hash_totals(df, metrics=None):
+    """Return (columns, row count, uint64 sum, uint64 xor) of the Country/Year/metric row hashes of df."""
+    metrics = summary_metrics(df) if metrics is None else list(metrics)
+    columns = [column for column in ('Country', 'Year') if column in df.columns] + metrics
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return (columns, len(df), np.add.reduce(row_hashes, dtype=np.uint64),
+            np.bitwise_xor.reduce(row_hashes) if len(row_hashes) else None)
+
+# Data key of the rows behind one or more hash_totals results
+def key_from_totals(totals):
+    """Return the data_key of the union of the batches whose hash_totals are given."""
+    columns, rows = totals[0][0], sum(total[1] for total in totals)
+    added = np.add.reduce(np.array([total[2] for total in totals], dtype=np.uint64), dtype=np.uint64)
+    xors = [total[3] for total in totals if total[3] is not None]
+    digest = hashlib.sha1(json.dumps([columns, rows]).encode())
+    digest.update(added.tobytes())
+    digest.update(np.bitwise_xor.reduce(np.array(xors, dtype=np.uint64)).tobytes() if xors else b'')
+    return digest.hexdigest()
+
+# Order-independent fingerprint of the rows a summary is built from
+def data_key(df, metrics=None):
+    """Return a hex key that changes when any Country/Year/metric value changes, regardless of row order."""
+    return key_from_totals([hash_totals(df, metrics)])
+
+# Build the per-country, per-decade aggregate table
+def build_country_summary(df, metrics=None):
+    """Return one row per (Country, Decade) with sum, count, min, max and last value of each metric.
+
+    Decade is the first year of the decade, or ALL_YEARS when df has no Year column. Counts,
+    sums, minima and maxima ignore NaNs; 'last' is the latest non-NaN value and 'last_year' its year.
+    """
+    metrics = summary_metrics(df) if metrics is None else list(metrics)
+    country = df['Country'] if df['Country'].dtype == 'category' else df['Country'].astype('category')
+    codes = country.cat.codes.to_numpy()
+    years = df['Year'].to_numpy(dtype=np.int64) if 'Year' in df.columns else np.zeros(len(df), dtype=np.int64)
+    decades = years // 10 * 10 if 'Year' in df.columns else np.full(len(df), ALL_YEARS)
+
+    order = np.lexsort((years, decades, codes))
+    codes, years, decades = codes[order], years[order], decades[order]
+    boundary = np.r_[True, (np.diff(codes) != 0) | (np.diff(decades) != 0)] if len(order) else []
+    starts = np.flatnonzero(boundary)
+    summary = {'Country': pd.Categorical.from_codes(codes[starts], categories=country.cat.categories),
+               'Decade': decades[starts]}
+    rows = np.arange(len(order))
+    for metric in metrics:
+        values = df[metric].to_numpy(dtype=np.float64)[order]
+        valid = ~np.isnan(values)
+        if len(order) == 0:
+            for stat in SUMMARY_STATISTICS:
+                summary[f'{metric}_{stat}'] = np.zeros(0, dtype=np.int64 if stat in ('count', 'last_year') else float)
+            continue
+        count = np.add.reduceat(valid.astype(np.int64), starts)
+        last = np.maximum.reduceat(np.where(valid, rows, -1), starts)
+        summary[f'{metric}_sum'] = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        summary[f'{metric}_count'] = count
+        summary[f'{metric}_min'] = np.where(count > 0, np.minimum.reduceat(np.where(valid, values, np.inf), starts), np.nan)
+        summary[f'{metric}_max'] = np.where(count > 0, np.maximum.reduceat(np.where(valid, values, -np.inf), starts), np.nan)
+        summary[f'{metric}_last'] = np.where(last >= 0, values[last], np.nan)
+        summary[f'{metric}_last_year'] = np.where(last >= 0, years[last], ALL_YEARS)
+    return pd.DataFrame(summary)
+
+# Persist the summary with its data key in the Parquet metadata
+def save_country_summary(summary, file_path=SUMMARY_PATH, key=None):
+    """Write the summary table to Parquet, recording the data key it was built from."""
+    table = pa.Table.from_pandas(summary, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), b'data_key': (key or '').encode()}
+    pq.write_table(table.replace_schema_metadata(metadata), file_path)
+    print(f"Country summary saved to '{file_path}'.")
+
+# Read a persisted summary if it was built from the same data
+def load_country_summary(file_path=SUMMARY_PATH, key=None):
+    """Return the stored summary, or None when it is missing or was built from different data."""
+    if not os.path.exists(file_path):
+        return None
+    if key is not None and pq.read_schema(file_path).metadata.get(b'data_key', b'').decode() != key:
+        return None
+    return pd.read_parquet(file_path)
+
+# Keep a summary in the bounded in-process memo
+def remember_summary(key, summary):
+    """Store summary under key, evicting the oldest entry when the memo is full, and return it."""
+    if len(SUMMARY_MEMO) >= SUMMARY_MEMO_SIZE:
+        SUMMARY_MEMO.pop(next(iter(SUMMARY_MEMO)))
+    SUMMARY_MEMO[key] = summary
+    return summary
+
+# Summary for a frame, reused from memory or disk when the data has not changed
+def cached_country_summary(df, metrics=None, file_path=None):
+    """Return build_country_summary(df, metrics), memoized by data key and optionally cached at file_path."""
+    metrics = summary_metrics(df) if metrics is None else list(metrics)
+    key = data_key(df, metrics)
+    if key in SUMMARY_MEMO:
+        return SUMMARY_MEMO[key]
+    summary = load_country_summary(file_path, key) if file_path else None
+    if summary is None:
+        summary = build_country_summary(df, metrics)
+        if file_path:
+            save_country_summary(summary, file_path, key)
+    return remember_summary(key, summary)
+
+# Hash totals and summary of one batch of whole countries
+def batch_summary(df, metrics=None):
+    """Return (hash_totals, build_country_summary) of a batch; see combine_batch_summaries."""
+    metrics = summary_metrics(df) if metrics is None else list(metrics)
+    return hash_totals(df, metrics), build_country_summary(df, metrics)
+
+# Summary of a stream of batches that each hold whole countries, as built by the chunked pipeline
+def combine_batch_summaries(parts, file_path=None):
+    """Return the summary of the union of the batches behind parts, a list of batch_summary results.
+
+    The result and its key equal those of cached_country_summary over the concatenated batches;
+    the file at file_path is rewritten only when that key changed.
+    """
+    key = key_from_totals([totals for totals, _ in parts])
+    if key in SUMMARY_MEMO:
+        return SUMMARY_MEMO[key]
+    summary = load_country_summary(file_path, key) if file_path else None
+    if summary is None:
+        summary = pd.concat([part.astype({'Country': object}) for _, part in parts], ignore_index=True)
+        summary['Country'] = summary['Country'].astype('category')
+        summary = summary.sort_values(['Country', 'Decade'], kind='stable').reset_index(drop=True)
+        if file_path:
+            save_country_summary(summary, file_path, key)
+    return remember_summary(key, summary)
+
+# Combine decade rows into one statistic per country
+def country_statistic(summary, metric, stat='mean', years=None):
+    """Return a Series (indexed by Country) of stat over the decades inside years=(first, last) inclusive.
+
+    stat is one of 'mean', 'sum', 'count', 'min', 'max' or 'last'. Year ranges must cover whole
+    decades, e.g. (1950, 1999).
+    """
+    rows = summary
+    if years is not None:
+        first, last = years
+        if first % 10 != 0 or last % 10 != 9:
+            raise ValueError(f"Year range {years} does not cover whole decades.")
+        rows = summary[(summary['Decade'] >= first) & (summary['Decade'] <= last)]
+    country = rows['Country'] if rows['Country'].dtype == 'category' else rows['Country'].astype('category')
+    codes = country.cat.codes.to_numpy()
+    n = len(country.cat.categories)
+    count = np.bincount(codes, weights=rows[f'{metric}_count'].to_numpy(dtype=np.float64), minlength=n)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if stat in ('mean', 'sum', 'count'):
+            total = np.bincount(codes, weights=rows[f'{metric}_sum'].to_numpy(), minlength=n)
+            values = {'mean': total / count, 'sum': total, 'count': count}[stat]
+        elif stat in ('min', 'max'):
+            values = np.full(n, np.nan)
+            reduce = np.fmin if stat == 'min' else np.fmax
+            reduce.at(values, codes, rows[f'{metric}_{stat}'].to_numpy(dtype=np.float64))
+        elif stat == 'last':
+            last_year = np.full(n, ALL_YEARS - 1)
+            np.maximum.at(last_year, codes, rows[f'{metric}_last_year'].to_numpy())
+            latest = rows[f'{metric}_last_year'].to_numpy() == last_year[codes]
+            values = np.full(n, np.nan)
+            values[codes[latest]] = rows[f'{metric}_last'].to_numpy()[latest]
+        else:
+            raise ValueError(f"Unknown statistic: {stat!r}.")
+    present = count > 0 if stat != 'count' else np.bincount(codes, minlength=n) > 0
+    return pd.Series(values[present], index=pd.Index(country.cat.categories[present], name='Country'),
+                     name=f'{metric}_{stat}')
+
+# Top-N selection by partial sort instead of a full sort
+def select_countries(values, n, largest=True):
+    """Return the index labels of the n largest (or smallest) values, ties kept in index order like nlargest."""
+    values = values.dropna()
+    n = min(n, len(values))
+    if n == 0:
+        return values.index[:0]
+    keys = -values.to_numpy() if largest else values.to_numpy()
+    threshold = np.partition(keys, n - 1)[n - 1]
+    candidates = np.flatnonzero(keys <= threshold)
+    chosen = candidates[np.argsort(keys[candidates], kind='stable')[:n]]
+    return values.index[chosen]
+
+# Rank countries on any metric and decade range from the summary table
+def top_bottom_countries(summary, metric, n=10, stat='mean', years=None):
+    """Return (top n, bottom n) country Index objects for stat of metric."""
+    values = country_statistic(summary, metric, stat, years)
+    return select_countries(values, n, largest=True), select_countries(values, n, largest=False)
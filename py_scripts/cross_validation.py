@@ -0,0 +1,144 @@
+# Import necessary libraries
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import GroupKFold
+
+from parallel import map_tasks
+
+CV_CACHE_DIR = "../data/interim/cv_folds"
+SCHEMES = ('country', 'rolling')
+N_SPLITS = 5
+
+# Folds that keep every country entirely in train or entirely in test
+def country_folds(df, n_splits=N_SPLITS):
+    """Return [(train positions, test positions)] from GroupKFold over Country."""
+    return list(GroupKFold(n_splits=n_splits).split(df, groups=df['Country'].astype(str)))
+
+# Expanding-window folds that always test on years after the training years
+def rolling_origin_folds(df, n_splits=N_SPLITS):
+    """Return [(train positions, test positions)]: fold k trains on year blocks 0..k and tests on block k + 1.
+
+    The distinct years are cut into n_splits + 1 consecutive blocks, so each fold tests a whole
+    block of years rather than the single next year; a ValueError is raised when there are
+    fewer distinct years than blocks.
+    """
+    years = df['Year'].to_numpy()
+    unique_years = np.unique(years)
+    if len(unique_years) < n_splits + 1:
+        raise ValueError(f"Rolling-origin folds need at least n_splits + 1 = {n_splits + 1} distinct years; "
+                         f"the data has {len(unique_years)}.")
+    blocks = np.array_split(unique_years, n_splits + 1)
+    folds = []
+    for k in range(1, n_splits + 1):
+        train = np.flatnonzero(years <= blocks[k - 1][-1])
+        test = np.flatnonzero((years >= blocks[k][0]) & (years <= blocks[k][-1]))
+        folds.append((train, test))
+    return folds
+
+# Folds for a named scheme
+def make_folds(df, scheme='country', n_splits=N_SPLITS):
+    """Return the folds of 'country' (grouped) or 'rolling' (expanding by Year) cross-validation."""
+    if scheme == 'country':
+        return country_folds(df, n_splits)
+    if scheme == 'rolling':
+        return rolling_origin_folds(df, n_splits)
+    raise ValueError(f"Unknown CV scheme: {scheme!r}; expected one of {SCHEMES}.")
+
+# Row-order-sensitive fingerprint of the frame, scheme and columns the fold arrays come from
+def folds_key(df, scheme, n_splits, columns):
+    """Return a hex key identifying one set of cached fold arrays."""
+    digest = hashlib.sha1(json.dumps([scheme, n_splits, list(columns)]).encode())
+    digest.update(pd.util.hash_pandas_object(df[['Country', 'Year'] + list(columns)], index=False)
+                  .to_numpy().tobytes())
+    return digest.hexdigest()
+
+# Write (or reuse) one .npz of train/test arrays per fold
+def cache_fold_arrays(df, scheme='country', n_splits=N_SPLITS, columns=(), cache_dir=CV_CACHE_DIR):
+    """Return one file path per fold holding train_/test_ arrays of Country codes, Year and columns.
+
+    Files are keyed by the data, scheme and columns, so later runs and every model reuse them.
+    """
+    columns = list(columns)
+    key = folds_key(df, scheme, n_splits, columns)
+    paths = [os.path.join(cache_dir, f'{key[:16]}_{scheme}_fold{fold}.npz') for fold in range(n_splits)]
+    if all(os.path.exists(path) for path in paths):
+        return paths
+
+    os.makedirs(cache_dir, exist_ok=True)
+    country = df['Country'] if df['Country'].dtype == 'category' else df['Country'].astype('category')
+    arrays = {'Country': country.cat.codes.to_numpy(), 'Year': df['Year'].to_numpy()}
+    arrays.update({column: df[column].to_numpy(dtype=np.float64) for column in columns})
+    for path, (train, test) in zip(paths, make_folds(df, scheme, n_splits)):
+        fold_arrays = {f'train_{name}': values[train] for name, values in arrays.items()}
+        fold_arrays.update({f'test_{name}': values[test] for name, values in arrays.items()})
+        np.savez(path + '.tmp.npz', **fold_arrays)
+        os.replace(path + '.tmp.npz', path)
+    return paths
+
+# Fit and score one regression fold; top-level so process workers can unpickle it
+def evaluate_regression_fold(task):
+    """Load a cached fold, fit a clone of the estimator and return its test metrics."""
+    with np.load(task['path']) as fold:
+        X_train = np.column_stack([fold[f'train_{column}'] for column in task['features']])
+        X_test = np.column_stack([fold[f'test_{column}'] for column in task['features']])
+        y_train, y_test = fold[f"train_{task['target']}"], fold[f"test_{task['target']}"]
+    model = clone(task['estimator']).fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return {'Fold': task['fold'], 'Train_Rows': len(y_train), 'Test_Rows': len(y_test),
+            'MSE': mean_squared_error(y_test, y_pred), 'R2': r2_score(y_test, y_pred)}
+
+# Score a per-country moving-average forecast on one fold
+def evaluate_moving_average_fold(task):
+    """Predict every test row, however many years past the training data, by the mean of its country's last
+    window_size training values."""
+    with np.load(task['path']) as fold:
+        train_country, train_year = fold['train_Country'], fold['train_Year']
+        train_values = fold[f"train_{task['target']}"]
+        test_country, y_test = fold['test_Country'], fold[f"test_{task['target']}"]
+    order = np.lexsort((train_year, train_country))
+    train_country, train_values = train_country[order], train_values[order]
+    # Position of each training row counted from its country's latest year
+    counts = np.bincount(train_country)
+    ends = np.cumsum(counts)
+    from_end = ends[train_country] - np.arange(len(train_country))
+    recent = from_end <= task['window_size']
+    n_codes = max(counts.size, int(test_country.max(initial=-1)) + 1)
+    totals = np.bincount(train_country[recent], weights=train_values[recent], minlength=n_codes)
+    sizes = np.bincount(train_country[recent], minlength=n_codes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        forecast = (totals / sizes)[test_country]
+    scored = ~np.isnan(forecast)
+    return {'Fold': task['fold'], 'Train_Rows': len(train_values), 'Test_Rows': int(scored.sum()),
+            'MSE': mean_squared_error(y_test[scored], forecast[scored]),
+            'R2': r2_score(y_test[scored], forecast[scored])}
+
+# Cross-validate a regression estimator with grouped or rolling-origin folds
+def cross_validate_regression(df, features=('Population', 'Year'), target='CO2_per_capita', scheme='country',
+                              estimator=None, n_splits=N_SPLITS, executor='process', max_workers=None,
+                              cache_dir=CV_CACHE_DIR):
+    """Return one row of test metrics per fold, with folds fitted in parallel."""
+    estimator = LinearRegression() if estimator is None else estimator
+    paths = cache_fold_arrays(df, scheme, n_splits, list(features) + [target], cache_dir)
+    tasks = [{'path': path, 'fold': fold, 'features': list(features), 'target': target, 'estimator': estimator}
+             for fold, path in enumerate(paths)]
+    return pd.DataFrame(map_tasks(evaluate_regression_fold, tasks, executor, max_workers))
+
+# Rolling-origin evaluation of the time-series moving average as a forecaster of the next year block
+def cross_validate_moving_average(df, target='CO2_per_capita', window_size=10, n_splits=N_SPLITS,
+                                  executor='process', max_workers=None, cache_dir=CV_CACHE_DIR):
+    """Return one row of test metrics per expanding-window fold for the moving-average forecast."""
+    paths = cache_fold_arrays(df, 'rolling', n_splits, [target], cache_dir)
+    tasks = [{'path': path, 'fold': fold, 'target': target, 'window_size': window_size}
+             for fold, path in enumerate(paths)]
+    return pd.DataFrame(map_tasks(evaluate_moving_average_fold, tasks, executor, max_workers))
+
+# Mean and spread of the fold metrics
+def summarize_folds(folds):
+    """Return the mean and standard deviation of MSE and R2 across folds."""
+    return folds[['MSE', 'R2']].agg(['mean', 'std'])
@@ -0,0 +1,153 @@
+# Import necessary libraries
+import hashlib
+import json
+import os
+import pyarrow.dataset as ds
+
+from data_preprocessing import ENTRY_FIELDS, EXTRACTED_COLUMNS, connect_to_mongodb, extract_co2_emission_data
+
+CACHE_DIR = "../data/interim/co2_emission_cache"
+MANIFEST_FILE = "manifest.json"
+BATCH_COUNTRIES = 50
+
+# Aggregation computing a small change marker per country on the server
+def build_marker_pipeline():
+    """Return a pipeline yielding, per country, its ISO code, last entry position and, for every
+    extracted field, the count, sum and position-weighted sum of its values.
+
+    Only these checksums leave the server. Any ISO code edit, added or removed entry, or value
+    change (including values swapped between years) changes them.
+    """
+    group = {'_id': '$country.k', 'order': {'$min': '$document'},
+             'iso_code': {'$first': '$country.v.iso_code'}, 'last_position': {'$max': '$position'}}
+    for field in ENTRY_FIELDS:
+        value = f'$country.v.data.{field}'
+        group[f'{field}_count'] = {'$sum': {'$cond': [{'$eq': [{'$ifNull': [value, None]}, None]}, 0, 1]}}
+        group[f'{field}_sum'] = {'$sum': {'$ifNull': [value, 0]}}
+        group[f'{field}_weighted'] = {'$sum': {'$multiply': [{'$add': ['$position', 1]}, {'$ifNull': [value, 0]}]}}
+    return [
+        {'$project': {'_id': 0, 'document': '$_id', 'country': {'$objectToArray': '$$ROOT'}}},
+        {'$unwind': '$country'},
+        {'$match': {'country.k': {'$ne': '_id'}}},
+        {'$unwind': {'path': '$country.v.data', 'includeArrayIndex': 'position',
+                     'preserveNullAndEmptyArrays': True}},
+        {'$group': group},
+        # Countries in the order of the documents holding them, as the extraction returns them
+        {'$sort': {'order': 1, '_id': 1}},
+    ]
+
+# Fetch the change markers of every country in the collection
+def fetch_markers(collection):
+    """Return {country: marker} in collection order, where marker is a SHA-1 of the server-side checksums."""
+    markers = {}
+    for doc in collection.aggregate(build_marker_pipeline()):
+        checksums = {key: value for key, value in doc.items() if key not in ('_id', 'order')}
+        markers[doc['_id']] = hashlib.sha1(json.dumps(checksums, sort_keys=True, default=str).encode()).hexdigest()
+    return markers
+
+# Read the cache manifest
+def load_manifest(cache_dir=CACHE_DIR):
+    """Return the manifest {'countries': {country: {'file', 'marker'}}}, empty when missing."""
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'countries': {}}
+    with open(path) as f:
+        return json.load(f)
+
+# Write the cache manifest
+def save_manifest(manifest, cache_dir=CACHE_DIR):
+    """Atomically write the manifest to the cache directory."""
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+# Partition file name for a country
+def partition_file(country):
+    """Return a filesystem-safe Parquet file name for a country."""
+    return hashlib.sha1(country.encode()).hexdigest()[:16] + ".parquet"
+
+# Write one country partition
+def write_partition(df, cache_dir, file_name):
+    """Write a single-country frame to its Parquet partition."""
+    df = df.astype({'Country': str, 'ISO_Code': object})
+    df.to_parquet(os.path.join(cache_dir, file_name), index=False)
+
+# Bring the cache up to date with the collection
+def refresh_cache(collection, cache_dir=CACHE_DIR, flatten='python', chunk_size=None):
+    """Re-fetch only countries whose marker changed and return the list of refreshed countries.
+
+    flatten selects Python-side or server-side flattening of the re-fetched countries, as in
+    extract_co2_emission_data. With chunk_size, they are fetched and written chunk_size
+    countries at a time, so a cold cache never holds more than one batch in memory.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = load_manifest(cache_dir)
+    cached = manifest['countries']
+    markers = fetch_markers(collection)
+
+    changed = [country for country, marker in markers.items()
+               if cached.get(country, {}).get('marker') != marker]
+    step = chunk_size or max(len(changed), 1)
+    for start in range(0, len(changed), step):
+        batch = changed[start:start + step]
+        df = extract_co2_emission_data(collection, flatten=flatten, countries=batch)
+        parts = dict(tuple(df.groupby('Country', observed=True, sort=False)))
+        for country in batch:
+            write_partition(parts.get(country, df.iloc[0:0]), cache_dir, partition_file(country))
+
+    # Drop partitions of countries that left the collection
+    for country in set(cached) - set(markers):
+        file_path = os.path.join(cache_dir, cached[country]['file'])
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    manifest['countries'] = {country: {'file': partition_file(country), 'marker': marker}
+                             for country, marker in markers.items()}
+    save_manifest(manifest, cache_dir)
+    return changed
+
+# Read the cached extraction back as one frame
+def read_cache(cache_dir=CACHE_DIR, countries=None, columns=None):
+    """Read cached partitions (optionally a subset of countries/columns) in the extracted schema."""
+    manifest = load_manifest(cache_dir)['countries']
+    if not manifest:
+        raise FileNotFoundError(f"No cached extraction found in '{cache_dir}'.")
+    selected = [country for country in manifest if countries is None or country in countries]
+    paths = [os.path.join(cache_dir, manifest[country]['file']) for country in selected]
+    columns = columns or EXTRACTED_COLUMNS
+
+    df = ds.dataset(paths, format='parquet').to_table(columns=columns).to_pandas()
+    for column in ['Country', 'ISO_Code']:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+# Cached extraction entry point
+def load_cached_co2_emission_data(collection=None, cache_dir=CACHE_DIR, flatten='python'):
+    """Refresh the cache from the collection when given, then read it; offline when collection is None."""
+    if collection is not None:
+        changed = refresh_cache(collection, cache_dir, flatten=flatten)
+        print(f"Cache refreshed: {len(changed)} countries re-fetched.")
+    return read_cache(cache_dir)
+
+# Stream the cached extraction a few whole countries at a time
+def iter_cache(cache_dir=CACHE_DIR, columns=None, batch_countries=BATCH_COUNTRIES):
+    """Yield the cached extraction as frames of at most batch_countries whole countries, one in memory at a time."""
+    countries = list(load_manifest(cache_dir)['countries'])
+    if not countries:
+        raise FileNotFoundError(f"No cached extraction found in '{cache_dir}'.")
+    for start in range(0, len(countries), batch_countries):
+        yield read_cache(cache_dir, countries=countries[start:start + batch_countries], columns=columns)
+
+# Full, unscaled extraction of every entity, as the analysis notebooks use it
+def load_extracted(columns=None, use_cache=True, offline=False, cache_dir=CACHE_DIR):
+    """Return the extracted rows from the local cache (offline), the refreshed cache or MongoDB directly."""
+    if offline:
+        return read_cache(cache_dir, columns=columns)
+    collection = connect_to_mongodb()
+    if use_cache:
+        df = load_cached_co2_emission_data(collection, cache_dir)
+    else:
+        df = extract_co2_emission_data(collection)
+    return df if columns is None else df[columns]
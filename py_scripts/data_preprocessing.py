@@ -1,9 +1,16 @@
 # Import necessary libraries
+import numpy as np
 import pandas as pd
 from pymongo import MongoClient
 from sklearn.preprocessing import MinMaxScaler
 import urllib.parse
 
+from country_summary import SUMMARY_PATH, batch_summary, cached_country_summary, combine_batch_summaries
+from emissions_cube import CUBE_PATH, cached_cube, combine_cells, finest_cells
+from feature_transform import GROUP_STRATEGIES, TRANSFORM_PATH, FeatureTransform
+from processed_data import (PROCESSED_CSV, PROCESSED_PARQUET, save_processed, to_processed_dtypes,
+                            write_processed_batches)
+
 # MongoDB connection
 def connect_to_mongodb():
     """Establish connection to MongoDB using hardcoded credentials."""
@@ -56,6 +63,176 @@ def get_co2_emission_data(collection):
     df = pd.DataFrame(data)
     return df
 
+# Yearly entry fields pulled from MongoDB and the columns they map to
+ENTRY_FIELDS = {
+    'year': 'Year',
+    'population': 'Population',
+    'cumulative_luc_co2': 'CO2',
+    'coal_co2': 'Coal_CO2',
+    'oil_co2': 'Oil_CO2',
+    'gas_co2': 'Gas_CO2',
+    'cement_co2': 'Cement_CO2',
+    'flaring_co2': 'Flaring_CO2',
+    'other_industry_co2': 'Other_Industry_CO2'
+}
+EXTRACTED_COLUMNS = ['Country', 'ISO_Code'] + list(ENTRY_FIELDS.values())
+
+# Countries and years kept by the preprocessing step
+COUNTRIES_LIST = [
+    'Afghanistan', 'Albania', 'Algeria', 'Andorra', 'Angola', 'Argentina', 'Armenia',
+    'Australia', 'Austria', 'Azerbaijan', 'Bangladesh', 'Belarus', 'Belgium', 'Brazil',
+    'Canada', 'China', 'Colombia', 'Czechia', 'Denmark', 'Egypt', 'France', 'Germany',
+    'Greece', 'India', 'Indonesia', 'Iran', 'Italy', 'Japan', 'Mexico', 'Netherlands',
+    'Norway', 'Pakistan', 'Poland', 'Portugal', 'Russia', 'Saudi Arabia', 'South Africa',
+    'South Korea', 'Spain', 'Sweden', 'Switzerland', 'Thailand', 'Turkey', 'Ukraine',
+    'United Kingdom', 'United States', 'Vietnam', 'Zimbabwe'
+]
+MIN_YEAR = 1950
+
+# Countries per batch in the out-of-core pipeline mode
+CHUNK_SIZE = 8
+
+# Missing-value strategy per column: 'mean', 'zero', 'ffill' or 'interpolate' (both per country)
+IMPUTATION_STRATEGIES = {
+    'Population': 'mean',
+    'CO2': 'mean',
+    'Coal_CO2': 'zero',
+    'Oil_CO2': 'zero',
+    'Gas_CO2': 'zero',
+    'Cement_CO2': 'zero',
+    'Flaring_CO2': 'zero',
+    'Other_Industry_CO2': 'zero'
+}
+
+# List the country keys stored in the collection without pulling their data
+def list_countries(collection):
+    """Return the country names stored as top-level keys in the collection."""
+    pipeline = [{'$project': {'_id': 0, 'keys': {
+        '$map': {'input': {'$objectToArray': '$$ROOT'}, 'in': '$$this.k'}}}}]
+    countries = []
+    for doc in collection.aggregate(pipeline):
+        countries.extend(key for key in doc['keys'] if key != '_id')
+    return countries
+
+# Build a projection limited to the fields used by the pipeline
+def build_projection(countries):
+    """Return a find() projection keeping only ISO code and the used yearly fields."""
+    projection = {'_id': 0}
+    for country in countries:
+        projection[f'{country}.iso_code'] = 1
+        for field in ENTRY_FIELDS:
+            projection[f'{country}.data.{field}'] = 1
+    return projection
+
+# Convert a list of yearly entries into typed column arrays
+def entries_to_columns(entries):
+    """Return one float64 array per entry field, with NaN for missing values."""
+    fields = list(ENTRY_FIELDS)
+    block = np.array([[entry.get(field) for field in fields] for entry in entries],
+                     dtype=np.float64).reshape(len(entries), len(fields))
+    return {column: block[:, i] for i, column in enumerate(ENTRY_FIELDS.values())}
+
+# Assemble per-country column chunks into the extracted DataFrame schema
+def build_extracted_frame(countries, iso_codes, lengths, chunks):
+    """Concatenate column chunks into a DataFrame with categorical Country/ISO_Code columns."""
+    categories, country_codes = np.unique(np.asarray(countries, dtype=object), return_inverse=True)
+    codes = np.repeat(country_codes.astype(np.int32), np.asarray(lengths, dtype=np.int64))
+    iso_codes = pd.Series(iso_codes, dtype=object).repeat(lengths).to_numpy()
+
+    frame = {
+        'Country': pd.Categorical.from_codes(codes, categories=categories),
+        'ISO_Code': pd.Categorical(iso_codes),
+    }
+    for column, arrays in chunks.items():
+        values = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.float64)
+        if column == 'Year' and not np.isnan(values).any():
+            values = values.astype(np.int64)
+        frame[column] = values
+    return drop_unused_labels(pd.DataFrame(frame, columns=EXTRACTED_COLUMNS))
+
+# Keep only the categories still present in the frame
+def drop_unused_labels(df):
+    """Remove unused categories from the Country and ISO_Code columns."""
+    for column in ['Country', 'ISO_Code']:
+        df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+# Streaming extraction with server-side projection
+def stream_co2_emission_data(collection, countries=None, batch_size=100):
+    """Retrieve CO2 emission data using a projection, batched cursor and columnar accumulation."""
+    if countries is None:
+        countries = list_countries(collection)
+    cursor = collection.find({}, build_projection(countries), batch_size=batch_size)
+
+    names, iso_codes, lengths = [], [], []
+    chunks = {column: [] for column in ENTRY_FIELDS.values()}
+    for doc in cursor:
+        for country, country_data in doc.items():
+            if country == '_id':
+                continue
+            entries = country_data.get('data', [])
+            names.append(country)
+            iso_codes.append(country_data.get('iso_code'))
+            lengths.append(len(entries))
+            for column, values in entries_to_columns(entries).items():
+                chunks[column].append(values)
+
+    return build_extracted_frame(names, iso_codes, lengths, chunks)
+
+# MongoDB aggregation pipeline that flattens the nested data arrays server-side
+def build_flatten_pipeline(countries=None, min_year=None):
+    """Return an $objectToArray/$unwind/$match/$project pipeline yielding one flat row per year."""
+    country_match = {'$in': list(countries)} if countries is not None else {'$ne': '_id'}
+    pipeline = [
+        {'$project': {'_id': 0, 'country': {'$objectToArray': '$$ROOT'}}},
+        {'$unwind': '$country'},
+        {'$match': {'country.k': country_match}},
+        {'$unwind': '$country.v.data'},
+    ]
+    if min_year is not None:
+        pipeline.append({'$match': {'country.v.data.year': {'$gt': min_year}}})
+
+    projection = {'_id': 0, 'Country': '$country.k', 'ISO_Code': '$country.v.iso_code'}
+    for field, column in ENTRY_FIELDS.items():
+        projection[column] = f'$country.v.data.{field}'
+    pipeline.append({'$project': projection})
+    return pipeline
+
+# Server-side flattening through the aggregation pipeline
+def aggregate_co2_emission_data(collection, countries=None, min_year=None, batch_size=1000):
+    """Retrieve flat CO2 emission rows produced by the aggregation pipeline."""
+    cursor = collection.aggregate(build_flatten_pipeline(countries, min_year), batchSize=batch_size)
+    columns = list(ENTRY_FIELDS.values())
+
+    names, iso_codes, lengths = [], [], []
+    chunks = {column: [] for column in columns}
+    for row in cursor:
+        # Consecutive rows of the same country become one chunk, like the Python-side path
+        if names and names[-1] == row['Country']:
+            lengths[-1] += 1
+        else:
+            names.append(row['Country'])
+            iso_codes.append(row.get('ISO_Code'))
+            lengths.append(1)
+        for column in columns:
+            chunks[column].append(row.get(column))
+
+    chunks = {column: [np.array(values, dtype=np.float64)] for column, values in chunks.items()}
+    return build_extracted_frame(names, iso_codes, lengths, chunks)
+
+# Extraction entry point with a switch between Python-side and server-side flattening
+def extract_co2_emission_data(collection, flatten='python', countries=None, min_year=None):
+    """Retrieve CO2 emission data, flattening in Python ('python') or in MongoDB ('server')."""
+    if flatten == 'server':
+        return aggregate_co2_emission_data(collection, countries=countries, min_year=min_year)
+    if flatten != 'python':
+        raise ValueError(f"Unknown flatten mode: {flatten!r}")
+
+    df = stream_co2_emission_data(collection, countries=countries)
+    if min_year is not None:
+        df = drop_unused_labels(df[df['Year'] > min_year].reset_index(drop=True))
+    return df
+
 # Preprocess data
 def preprocess_data(df):
     """Preprocess the DataFrame and scale numerical columns."""
@@ -77,16 +254,7 @@ def preprocess_data(df):
     df.drop_duplicates(inplace=True)
 
     # Filter countries and years
-    countries_list = [
-        'Afghanistan', 'Albania', 'Algeria', 'Andorra', 'Angola', 'Argentina', 'Armenia',
-        'Australia', 'Austria', 'Azerbaijan', 'Bangladesh', 'Belarus', 'Belgium', 'Brazil',
-        'Canada', 'China', 'Colombia', 'Czechia', 'Denmark', 'Egypt', 'France', 'Germany',
-        'Greece', 'India', 'Indonesia', 'Iran', 'Italy', 'Japan', 'Mexico', 'Netherlands',
-        'Norway', 'Pakistan', 'Poland', 'Portugal', 'Russia', 'Saudi Arabia', 'South Africa',
-        'South Korea', 'Spain', 'Sweden', 'Switzerland', 'Thailand', 'Turkey', 'Ukraine',
-        'United Kingdom', 'United States', 'Vietnam', 'Zimbabwe'
-    ]
-    df = df[(df['Country'].isin(countries_list)) & (df['Year'] > 1950)]
+    df = df[(df['Country'].isin(COUNTRIES_LIST)) & (df['Year'] > MIN_YEAR)]
 
     # Scale numerical columns
     scaler = MinMaxScaler()
@@ -98,6 +266,50 @@ def preprocess_data(df):
 
     return df
 
+# Vectorized single-pass preprocessing with configurable imputation
+def preprocess_frame(df, strategies=None, countries=None, min_year=MIN_YEAR, return_transform=False):
+    """Filter, de-duplicate, impute and scale in one block; imputation uses only the kept rows."""
+    transform = FeatureTransform(
+        strategies={**IMPUTATION_STRATEGIES, **(strategies or {})},
+        countries=COUNTRIES_LIST if countries is None else countries,
+        min_year=min_year)
+    out = transform.fit_transform(df)
+    return (out, transform) if return_transform else out
+
+# Out-of-core two-pass preprocessing over batches of countries
+def preprocess_in_chunks(fetch_batch, available, chunk_size=CHUNK_SIZE, strategies=None, countries=None,
+                         min_year=MIN_YEAR, parquet_path=PROCESSED_PARQUET, csv_path=PROCESSED_CSV, on_batch=None):
+    """Fit statistics in a first streaming pass, then transform and append each batch in a second pass.
+
+    available lists the countries the source holds and fetch_batch(batch) must return the extracted
+    rows of a batch of them. countries and min_year select the kept rows as in preprocess_frame. Only
+    one batch is held in memory at a time, and the CSV output is byte-for-byte the one written by the
+    in-memory path. on_batch, when given, is called with every transformed batch before it is written.
+    """
+    transform = FeatureTransform(
+        strategies={**IMPUTATION_STRATEGIES, **(strategies or {})},
+        countries=COUNTRIES_LIST if countries is None else countries,
+        min_year=min_year)
+    allowed = set(transform.countries)
+    countries = [country for country in dict.fromkeys(available) if country in allowed]
+    # Per-country strategies make the in-memory path sort by country name, so batch in that order
+    if any(strategy in GROUP_STRATEGIES for strategy in transform.strategies.values()):
+        countries = sorted(countries)
+    batches = [countries[i:i + chunk_size] for i in range(0, len(countries), chunk_size)]
+
+    # First pass: per-batch statistics for fill constants and scaler ranges
+    transform.fit_from_stats([transform.partial_stats(*transform.select_rows(fetch_batch(batch)))
+                              for batch in batches])
+
+    # Second pass: apply the fitted transform and append each batch to the outputs
+    def chunks():
+        for chunk in transform.transform_chunks(fetch_batch(batch) for batch in batches):
+            if on_batch is not None:
+                on_batch(chunk)
+            yield chunk
+    write_processed_batches(chunks(), parquet_path=parquet_path, csv_path=csv_path)
+    return transform
+
 # Save data to CSV
 def save_to_csv(df, file_path):
     """Save the DataFrame to a CSV file."""
@@ -105,26 +317,99 @@ def save_to_csv(df, file_path):
     print(f"Data preprocessing completed and saved to '{file_path}'.")
 
 # Main function
-def main():
+def main(flatten='python', use_cache=True, offline=False, source='mongodb', chunk_size=None, backend='pandas'):
     try:
-        # Connect to MongoDB
-        collection = connect_to_mongodb()
-        print("Connected to MongoDB.")
+        if backend == 'spark':
+            # Spark backend for data that does not fit in a pandas frame
+            from spark_backend import run_spark
+            run_spark(source=source)
+            return
+        if chunk_size:
+            run_chunked(chunk_size, use_cache=use_cache, offline=offline, flatten=flatten, source=source)
+            return
+
+        # Every path below extracts every entity and year, except the filtered direct extraction
+        unfiltered = True
+        if source == 'json':
+            # Ingest the raw OWID JSON shards directly, no database needed
+            from owid_json_loader import load_owid_json
+            df = load_owid_json()
+        elif offline:
+            # Re-run from the local cache without touching MongoDB
+            from data_cache import read_cache
+            df = read_cache()
+        else:
+            # Connect to MongoDB
+            collection = connect_to_mongodb()
+            print("Connected to MongoDB.")
+
+            # Retrieve data from MongoDB, re-fetching only changed countries when caching. The cache keeps
+            # every entity; a direct extraction pushes the country and year filters down to the server.
+            if use_cache:
+                from data_cache import load_cached_co2_emission_data
+                df = load_cached_co2_emission_data(collection, flatten=flatten)
+            else:
+                df = extract_co2_emission_data(collection, flatten=flatten, countries=COUNTRIES_LIST,
+                                               min_year=MIN_YEAR)
+                unfiltered = False
+        print(f"Data retrieved from {source}. Here are the first few rows:\n", df.head())
 
-        # Retrieve data from MongoDB
-        df = get_co2_emission_data(collection)
-        print("Data retrieved from MongoDB. Here are the first few rows:\n", df.head())
+        # Aggregation cube over every entity in original units, before filtering and scaling
+        if unfiltered:
+            cached_cube(df, file_path=CUBE_PATH)
+        else:
+            print("Emissions cube not rebuilt: the direct extraction holds only the kept countries and years. "
+                  "Run with the cache, offline or chunked to build it.")
 
         # Preprocess data
-        df = preprocess_data(df)
+        df, transform = preprocess_frame(df, return_transform=True)
         print("Data preprocessing completed.")
 
-        # Save to CSV
-        save_to_csv(df, "../data/processed/co2_emission_preprocessed.csv")
+        # Save typed Parquet, a compatibility CSV for the notebooks and the fitted transform artifact
+        save_processed(df)
+        save_to_csv(df, PROCESSED_CSV)
+        transform.save(TRANSFORM_PATH)
+
+        # Precompute the per-country summary, keyed on the data as stored in the Parquet file
+        cached_country_summary(to_processed_dtypes(df), file_path=SUMMARY_PATH)
 
     except Exception as e:
         print(f"An error occurred: {e}")
 
+# Out-of-core variant of main, reading batches of countries from MongoDB or the local cache
+def run_chunked(chunk_size, use_cache=True, offline=False, flatten='python', source='mongodb'):
+    """Run the two-pass chunked pipeline with chunk_size countries per batch."""
+    from data_cache import load_manifest, read_cache, refresh_cache
+    if source == 'json':
+        # Raw OWID JSON shards: one pass maps countries to shards, then a batch parses only its own shards
+        from owid_json_loader import load_owid_countries, shard_index
+        index = shard_index()
+        countries = list(index)
+        fetch_batch = lambda batch: load_owid_countries(batch, index)
+    elif offline or use_cache:
+        if not offline:
+            collection = connect_to_mongodb()
+            refresh_cache(collection, flatten=flatten, chunk_size=chunk_size)
+        countries = list(load_manifest()['countries'])
+        fetch_batch = lambda batch: read_cache(countries=batch)
+    else:
+        collection = connect_to_mongodb()
+        countries = list_countries(collection)
+        fetch_batch = lambda batch: extract_co2_emission_data(collection, flatten=flatten, countries=batch)
+
+    # Aggregation cube over every entity in original units, like main's; the preprocessing passes below
+    # only read the selected countries, so the cube cells are gathered in a pass of their own
+    combine_cells([finest_cells(fetch_batch(countries[i:i + chunk_size]))
+                   for i in range(0, len(countries), chunk_size)], file_path=CUBE_PATH)
+
+    # Per-batch summaries are collected while the batches stream past, like main's summary
+    summaries = []
+    transform = preprocess_in_chunks(fetch_batch, countries, chunk_size=chunk_size,
+                                     on_batch=lambda df: summaries.append(batch_summary(to_processed_dtypes(df))))
+    transform.save(TRANSFORM_PATH)
+    combine_batch_summaries(summaries, file_path=SUMMARY_PATH)
+    print("Chunked data preprocessing completed.")
+
 # Run the main function
 if __name__ == "__main__":
     main()
@@ -1,156 +1,229 @@
-from pymongo import MongoClient  # import mongo client to connect
-import pandas as pd
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import col, count, isnan, mean, stddev, min, max, desc
-from pyspark.sql.types import StructType, StructField, StringType, IntegerType, FloatType
-import urllib.parse
-from sklearn.preprocessing import MinMaxScaler
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# Set style for Seaborn plots and change font
-sns.set(style="whitegrid")
-plt.rcParams["font.family"] = "DejaVu Sans"
-
-username = "alextran21211"
-password = urllib.parse.quote("database12345")
-host = "cluster0.zsych.mongodb.net"
-url = f"mongodb+srv://{username}:{password}@{host}/?retryWrites=true&w=majority"
-
-client = MongoClient(url)
-
-db = client['group_5_project']
-collection = db["co2_emission"]
-
-documents = collection.find()
-
-data = []
-
-for doc in documents:
-    for country, country_data in doc.items():
-        if country == "_id":
-            continue  
-        iso_code = country_data.get('iso_code')
-        for entry in country_data.get('data', []):
-            year = entry.get('year')
-            population = entry.get('population')
-            co2 = entry.get('cumulative_luc_co2')
-           
-            data.append({
-                'Country': country,
-                'ISO_Code': iso_code,
-                'Year': year,
-                'Population': population,
-                'CO2': co2
-            })
-
-df = pd.DataFrame(data)
+# Import necessary libraries
+# Only the standard library is imported here; pandas, matplotlib, seaborn and the MongoDB client are
+# imported inside the functions that need them so that `import eda` stays cheap.
+from functools import lru_cache
+
+EDA_COLUMNS = ['Country', 'ISO_Code', 'Year', 'Population', 'CO2']
+FOCUS_COUNTRY = "Afghanistan"
+SELECTED_COUNTRIES = ["Afghanistan", "Brazil", "China", "India", "United States"]
+NON_COUNTRIES = ["World", "High-income countries", "Low-income countries", "Upper-middle-income countries",
+                 "Lower-middle-income countries", "Africa", "Europe", "Asia", "Oceania", "Americas", "North America",
+                 "South America", "Asia (excl. China and India)", "Europe (excl. EU-27)", "Europe (excl. EU-28)",
+                 "North America (excl. USA)"]
+
+# In-process memo of loaded frames by load options, so every plot reuses one extraction
+EDA_MEMO = {}
+
+# Import matplotlib and seaborn on first use and apply the EDA style once
+@lru_cache(maxsize=None)
+def plotting():
+    """Return (pyplot, seaborn) with the whitegrid style and DejaVu Sans font set."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set(style="whitegrid")
+    plt.rcParams["font.family"] = "DejaVu Sans"
+    return plt, sns
+
+# Pull the raw EDA columns through the shared extractor
+def extract_eda_data(use_cache=True, offline=False):
+    """Return the extracted rows from the local cache (offline), the refreshed cache or MongoDB directly."""
+    from data_cache import load_extracted
+    return load_extracted(EDA_COLUMNS, use_cache=use_cache, offline=offline)
 
 # Data Cleaning and Transformation
-print(df.isnull().sum()) 
-df['Population'] = df['Population'].fillna(df['Population'].mean()) 
-df['CO2'] = df['CO2'].fillna(df['CO2'].mean())  
-df['CO2_per_capita'] = df['CO2'] / df['Population']
-df.drop_duplicates(inplace=True)
-df = df.drop(columns=['ISO_Code'])
-print(df.head())
+def prepare_eda_frame(df):
+    """Mean-impute Population and CO2, add CO2_per_capita, drop duplicates and the ISO code."""
+    df = df[EDA_COLUMNS].copy()
+    print(df.isnull().sum())
+    df['Population'] = df['Population'].fillna(df['Population'].mean())
+    df['CO2'] = df['CO2'].fillna(df['CO2'].mean())
+    df['CO2_per_capita'] = df['CO2'] / df['Population']
+    df = df.drop_duplicates()
+    return df.drop(columns=['ISO_Code'])
+
+# Lazily load the prepared EDA frame, once per set of options
+def load_eda_data(use_cache=True, offline=False):
+    """Return the prepared EDA frame, extracting it on the first call only."""
+    key = (use_cache, offline)
+    if key not in EDA_MEMO:
+        EDA_MEMO[key] = prepare_eda_frame(extract_eda_data(use_cache=use_cache, offline=offline))
+    return EDA_MEMO[key]
+
+# Rows of the countries with the highest total CO2, aggregates excluded
+def top_emitters(df, n=5):
+    """Return (top country names, df without aggregate regions)."""
+    from country_summary import build_country_summary, top_bottom_countries
+    df_filtered = df[~df['Country'].isin(NON_COUNTRIES)]
+    top_countries, _ = top_bottom_countries(build_country_summary(df_filtered, ['CO2']), 'CO2', n)
+    return top_countries, df_filtered
 
 # 1. CO₂ Emissions Over Time
-plt.figure(figsize=(12, 6))
-sns.lineplot(data=df[df['Country'] == "Afghanistan"], x='Year', y='CO2', color="b")
-plt.title("CO₂ Emissions Over Time for Afghanistan")
-plt.xlabel("Year")
-plt.ylabel("Total CO₂ Emissions")
-plt.show()
-plt.close()
+def plot_co2_over_time(df, country=FOCUS_COUNTRY):
+    """Line plot of one country's total CO2 by year."""
+    plt, sns = plotting()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.lineplot(data=df[df['Country'] == country], x='Year', y='CO2', color="b", ax=ax)
+    ax.set_title(f"CO₂ Emissions Over Time for {country}")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Total CO₂ Emissions")
+    return fig
 
 # 2. CO₂ Emissions Per Capita Over Time
-plt.figure(figsize=(12, 6))
-sns.lineplot(data=df[df['Country'] == "Afghanistan"], x='Year', y='CO2_per_capita', color="g")
-plt.title("CO₂ Emissions Per Capita Over Time for Afghanistan")
-plt.xlabel("Year")
-plt.ylabel("CO₂ Emissions Per Capita")
-plt.show()
-plt.close()
+def plot_co2_per_capita_over_time(df, country=FOCUS_COUNTRY):
+    """Line plot of one country's CO2 per capita by year."""
+    plt, sns = plotting()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.lineplot(data=df[df['Country'] == country], x='Year', y='CO2_per_capita', color="g", ax=ax)
+    ax.set_title(f"CO₂ Emissions Per Capita Over Time for {country}")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("CO₂ Emissions Per Capita")
+    return fig
 
 # 3. Population Growth Over Time
-plt.figure(figsize=(12, 6))
-sns.lineplot(data=df[df['Country'] == "Afghanistan"], x='Year', y='Population', color="purple")
-plt.title("Population Growth Over Time for Afghanistan")
-plt.xlabel("Year")
-plt.ylabel("Population")
-plt.show()
-plt.close()
+def plot_population_over_time(df, country=FOCUS_COUNTRY):
+    """Line plot of one country's population by year."""
+    plt, sns = plotting()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.lineplot(data=df[df['Country'] == country], x='Year', y='Population', color="purple", ax=ax)
+    ax.set_title(f"Population Growth Over Time for {country}")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Population")
+    return fig
 
 # 4. Relationship CO₂ Emissions vs. Population (Scatter Plot)
-plt.figure(figsize=(10, 6))
-sns.scatterplot(data=df, x='Population', y='CO2', hue='Country', palette="coolwarm", legend=None)
-plt.title("Relationship Between Population and CO₂ Emissions")
-plt.xlabel("Population")
-plt.ylabel("Total CO₂ Emissions")
-plt.show()
-plt.close()
+def plot_population_vs_co2(df, mode='auto', threshold=None):
+    """Scatter plot of CO2 against population, coloured by country.
+
+    Above threshold rows (plot_reduction.DENSITY_THRESHOLD by default) with mode='auto', or with
+    mode='density', rows are binned into a 2-D histogram instead.
+    """
+    from plot_reduction import DENSITY_THRESHOLD, draw_density, use_density
+    threshold = DENSITY_THRESHOLD if threshold is None else threshold
+    plt, sns = plotting()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    if use_density(len(df), mode, threshold):
+        draw_density(ax, df['Population'].to_numpy(), df['CO2'].to_numpy())
+    else:
+        sns.scatterplot(data=df, x='Population', y='CO2', hue='Country', palette="coolwarm", legend=None, ax=ax)
+    ax.set_title("Relationship Between Population and CO₂ Emissions")
+    ax.set_xlabel("Population")
+    ax.set_ylabel("Total CO₂ Emissions")
+    return fig
 
 # 5. Correlation Heatmap
-plt.figure(figsize=(8, 6))
-correlation_matrix = df[['Population', 'CO2', 'CO2_per_capita']].corr()
-sns.heatmap(correlation_matrix, annot=True, cmap="YlGnBu", fmt=".2f")
-plt.title("Correlation Matrix")
-plt.show()
-plt.close()
+def plot_correlation_heatmap(df):
+    """Heatmap of the correlations between Population, CO2 and CO2 per capita."""
+    plt, sns = plotting()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    correlation_matrix = df[['Population', 'CO2', 'CO2_per_capita']].corr()
+    sns.heatmap(correlation_matrix, annot=True, cmap="YlGnBu", fmt=".2f", ax=ax)
+    ax.set_title("Correlation Matrix")
+    return fig
 
 # 6. CO₂ Emissions Over Time for Different Countries
-plt.figure(figsize=(14, 8))
-sns.lineplot(data=df, x='Year', y='CO2', hue='Country', legend='full', palette='tab10')
-plt.title("CO₂ Emissions Over Time for Each Country")
-plt.xlabel("Year")
-plt.ylabel("Total CO₂ Emissions")
-plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.show()
-plt.close()
+def plot_co2_by_country(df, mode='auto', threshold=None):
+    """Line plot of total CO2 by year with one line per country.
+
+    Above threshold rows with mode='auto', or with mode='density', each line is LTTB-downsampled and
+    all are drawn as one collection, with a legend only for a few countries.
+    """
+    from plot_reduction import DENSITY_THRESHOLD, draw_lines, use_density
+    threshold = DENSITY_THRESHOLD if threshold is None else threshold
+    plt, sns = plotting()
+    fig, ax = plt.subplots(figsize=(14, 8))
+    if use_density(len(df), mode, threshold):
+        draw_lines(ax, df['Year'].to_numpy(), df['CO2'].to_numpy(), df['Country'])
+    else:
+        sns.lineplot(data=df, x='Year', y='CO2', hue='Country', legend='full', palette='tab10', ax=ax)
+        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.set_title("CO₂ Emissions Over Time for Each Country")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Total CO₂ Emissions")
+    return fig
 
 # 7. Top 5 CO₂ Emissions Per Capita Over Time
-non_countries = ["World", "High-income countries", "Low-income countries", "Upper-middle-income countries", 
-                 "Lower-middle-income countries", "Africa", "Europe", "Asia", "Oceania", "Americas", "North America",
-                 "South America", "Asia (excl. China and India)", "Europe (excl. EU-27)", "Europe (excl. EU-28)", "North America (excl. USA)" ]
-df_filtered = df[~df['Country'].isin(non_countries)]
-top_countries = df_filtered.groupby('Country')['CO2'].mean().nlargest(5).index
-
-plt.figure(figsize=(14, 8))
-sns.lineplot(data=df_filtered[df_filtered['Country'].isin(top_countries)], x='Year', y='CO2_per_capita', hue='Country', palette='Dark2')
-plt.title("CO₂ Emissions Per Capita Over Time for Top 5 CO₂ Emitting Countries")
-plt.xlabel("Year")
-plt.ylabel("CO₂ Emissions Per Capita")
-plt.legend(title="Country", bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.show()
-plt.close()
+def plot_top_emitters_per_capita(df, n=5):
+    """Line plot of CO2 per capita for the n countries with the highest total CO2."""
+    plt, sns = plotting()
+    top_countries, df_filtered = top_emitters(df, n)
+    df_top = df_filtered[df_filtered['Country'].isin(top_countries)]
+    if hasattr(df_top['Country'], 'cat'):
+        df_top = df_top.assign(Country=df_top['Country'].cat.remove_unused_categories())
+    fig, ax = plt.subplots(figsize=(14, 8))
+    sns.lineplot(data=df_top, x='Year', y='CO2_per_capita', hue='Country', palette='Dark2', ax=ax)
+    ax.set_title(f"CO₂ Emissions Per Capita Over Time for Top {n} CO₂ Emitting Countries")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("CO₂ Emissions Per Capita")
+    ax.legend(title="Country", bbox_to_anchor=(1.05, 1), loc='upper left')
+    return fig
 
 # 8. Heatmap of CO₂ Emissions Over Time for Selected Countries
-selected_countries = ["Afghanistan", "Brazil", "China", "India", "United States"]
-df_selected = df[df['Country'].isin(selected_countries)]
-heatmap_data = df_selected.pivot_table(index='Country', columns='Year', values='CO2', aggfunc='mean').fillna(0)
-
-plt.figure(figsize=(14, 8))
-sns.heatmap(heatmap_data, cmap='YlGnBu', cbar_kws={'label': 'CO₂ Emissions'}, fmt=".1f")
-plt.title("CO₂ Emissions Over Time for Selected Countries")
-plt.xlabel("Year")
-plt.ylabel("Country")
-plt.show()
-plt.close()
+def plot_selected_heatmap(df, countries=SELECTED_COUNTRIES):
+    """Country x Year heatmap of CO2 for the selected countries."""
+    plt, sns = plotting()
+    df_selected = df[df['Country'].isin(countries)]
+    heatmap_data = df_selected.pivot_table(index='Country', columns='Year', values='CO2', aggfunc='mean',
+                                           observed=True).fillna(0)
+    fig, ax = plt.subplots(figsize=(14, 8))
+    sns.heatmap(heatmap_data, cmap='YlGnBu', cbar_kws={'label': 'CO₂ Emissions'}, fmt=".1f", ax=ax)
+    ax.set_title("CO₂ Emissions Over Time for Selected Countries")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Country")
+    return fig
 
 # 9. Boxplot of CO₂ Emissions Per Capita by Country for Selected Countries
-plt.figure(figsize=(12, 8))
-sns.boxplot(data=df_selected, x='Country', y='CO2_per_capita', palette="Set3")
-plt.title("Distribution of CO₂ Emissions Per Capita by Country")
-plt.xlabel("Country")
-plt.ylabel("CO₂ Emissions Per Capita")
-plt.show()
-plt.close()
+def plot_selected_boxplot(df, countries=SELECTED_COUNTRIES):
+    """Box plot of CO2 per capita for each selected country."""
+    plt, sns = plotting()
+    df_selected = df[df['Country'].isin(countries)]
+    if hasattr(df_selected['Country'], 'cat'):
+        df_selected = df_selected.assign(Country=df_selected['Country'].cat.remove_unused_categories())
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.boxplot(data=df_selected, x='Country', y='CO2_per_capita', hue='Country', palette="Set3", legend=False,
+                ax=ax)
+    ax.set_title("Distribution of CO₂ Emissions Per Capita by Country")
+    ax.set_xlabel("Country")
+    ax.set_ylabel("CO₂ Emissions Per Capita")
+    return fig
 
 # 10. Facet Grid of CO₂ Emissions Over Time for Selected Countries
-g = sns.FacetGrid(df_selected, col="Country", col_wrap=3, height=4, aspect=1.5)
-g.map(sns.lineplot, "Year", "CO2", color="b")
-g.set_titles("{col_name}")
-g.set_axis_labels("Year", "Total CO₂ Emissions")
-g.fig.suptitle("CO₂ Emissions Over Time by Country", y=1.05)
-plt.show()
+def plot_selected_facets(df, countries=SELECTED_COUNTRIES):
+    """One CO2-by-year panel per selected country."""
+    _, sns = plotting()
+    df_selected = df[df['Country'].isin(countries)]
+    if hasattr(df_selected['Country'], 'cat'):
+        df_selected = df_selected.assign(Country=df_selected['Country'].cat.remove_unused_categories())
+    g = sns.FacetGrid(df_selected, col="Country", col_wrap=3, height=4, aspect=1.5)
+    g.map(sns.lineplot, "Year", "CO2", color="b")
+    g.set_titles("{col_name}")
+    g.set_axis_labels("Year", "Total CO₂ Emissions")
+    g.figure.suptitle("CO₂ Emissions Over Time by Country", y=1.05)
+    return g.figure
+
+# Every EDA figure by name, in the order main shows them
+FIGURES = {
+    'co2_over_time': plot_co2_over_time,
+    'co2_per_capita_over_time': plot_co2_per_capita_over_time,
+    'population_over_time': plot_population_over_time,
+    'population_vs_co2': plot_population_vs_co2,
+    'correlation_heatmap': plot_correlation_heatmap,
+    'co2_by_country': plot_co2_by_country,
+    'top_emitters_per_capita': plot_top_emitters_per_capita,
+    'selected_heatmap': plot_selected_heatmap,
+    'selected_boxplot': plot_selected_boxplot,
+    'selected_facets': plot_selected_facets,
+}
+
+# Main function
+def main(use_cache=True, offline=False, figures=None):
+    plt, _ = plotting()
+    df = load_eda_data(use_cache=use_cache, offline=offline)
+    print(df.head())
+    for name in figures or FIGURES:
+        FIGURES[name](df)
+        plt.show()
+        plt.close('all')
+
+# Run the main function
+if __name__ == "__main__":
+    main()
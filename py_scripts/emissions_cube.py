@@ -0,0 +1,232 @@
+# Import necessary libraries
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from country_groups import AGGREGATE, MEMBERSHIP_KEY, entity_groups
+from country_summary import data_key
+
+CUBE_PATH = "../data/processed/co2_emission_cube.parquet"
+SOURCE_METRICS = ['Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2', 'Flaring_CO2', 'Other_Industry_CO2']
+CUBE_METRICS = ['Population', 'CO2', 'CO2_per_capita'] + SOURCE_METRICS
+STATISTICS = ('sum', 'mean', 'count')
+ALL = '*'
+ALL_YEARS = -1
+
+# Geography and time levels; each finer level also carries the coarser dimensions above it. Continent and
+# Income come from the country_groups membership tables, so a country rolls up into exactly one of each.
+GEO_LEVELS = {'country': ['Continent', 'Income', 'Country'], 'continent': ['Continent'], 'income': ['Income'],
+              'all': []}
+TIME_LEVELS = {'year': ['Decade', 'Year'], 'decade': ['Decade'], 'all': []}
+
+# Level name of a set of dimensions
+def level_name(dimensions):
+    """Return the 'geo|time' level holding every dimension in dimensions."""
+    dimensions = set(dimensions)
+    unknown = dimensions - {'Continent', 'Income', 'Country', 'Decade', 'Year'}
+    if unknown:
+        raise ValueError(f"Unknown cube dimensions: {sorted(unknown)}.")
+    if 'Country' in dimensions or {'Continent', 'Income'} <= dimensions:
+        geo = 'country'
+    else:
+        geo = 'continent' if 'Continent' in dimensions else 'income' if 'Income' in dimensions else 'all'
+    time = 'year' if 'Year' in dimensions else 'decade' if 'Decade' in dimensions else 'all'
+    return f'{geo}|{time}'
+
+# Frame and metrics the cube is built from
+def cube_input(df, metrics=None):
+    """Return the rows of df with a Year, CO2_per_capita derived as CO2 / Population when missing, and the
+    metrics to aggregate."""
+    if df['Year'].isna().any():
+        df = df[df['Year'].notna()]
+    if 'CO2_per_capita' not in df.columns and {'CO2', 'Population'} <= set(df.columns):
+        df = df.assign(CO2_per_capita=df['CO2'] / df['Population'])
+    metrics = [metric for metric in CUBE_METRICS if metric in df.columns] if metrics is None else list(metrics)
+    return df, metrics
+
+# Finest cells of the cube: sums and counts per Country and Year
+def finest_cells(df, metrics=None):
+    """Return one row per (Country, Year) of df with <metric>_sum and <metric>_count columns.
+
+    Counts and sums ignore NaNs. Cells of batches holding different countries can be
+    concatenated and passed to roll_up or combine_cells as one table.
+    """
+    df, metrics = cube_input(df, metrics)
+    base = pd.DataFrame({'Country': df['Country'].to_numpy(), 'Year': df['Year'].to_numpy(dtype=np.int64)})
+    for metric in metrics:
+        values = df[metric].to_numpy(dtype=np.float64)
+        base[f'{metric}_sum'] = np.where(np.isnan(values), 0.0, values)
+        base[f'{metric}_count'] = (~np.isnan(values)).astype(np.int64)
+    value_columns = [f'{metric}_{stat}' for metric in metrics for stat in ('sum', 'count')]
+    return base.groupby(['Country', 'Year'], sort=True)[value_columns].sum().reset_index()
+
+# Materialize every (geography level x time level) aggregate from the finest cells
+def roll_up(cells):
+    """Return the cube table of finest_cells output: one row per cell of every level.
+
+    Levels are named 'geo|time' with geo in country/continent/income/all and time in
+    year/decade/all. Dimensions rolled up in a level hold ALL ('*') or ALL_YEARS (-1).
+    Aggregate entities such as World or the income-group totals appear only in the country
+    levels, with Continent and Income set to AGGREGATE; the coarser levels sum countries only,
+    so nothing is counted twice.
+    """
+    value_columns = [column for column in cells.columns if column.endswith(('_sum', '_count'))]
+    cells = cells.astype({'Country': object}).groupby(['Country', 'Year'], sort=True)[value_columns] \
+        .sum().reset_index()
+    country = cells['Country'].astype('category')
+    groups = [entity_groups(name) for name in country.cat.categories]
+    codes = country.cat.codes.to_numpy()
+    years = cells['Year'].to_numpy(dtype=np.int64)
+    finest = pd.concat([pd.DataFrame({
+        'Continent': np.array([continent for continent, _ in groups], dtype=object)[codes],
+        'Income': np.array([income for _, income in groups], dtype=object)[codes],
+        'Country': country.to_numpy(), 'Decade': years // 10 * 10, 'Year': years}), cells[value_columns]], axis=1)
+
+    # Only the finest level comes from the input; the coarser ones roll up its cells
+    levels = []
+    for geo, geo_columns in GEO_LEVELS.items():
+        source = finest if geo == 'country' else finest[finest['Continent'] != AGGREGATE]
+        for time, time_columns in TIME_LEVELS.items():
+            keys = geo_columns + time_columns
+            if keys:
+                level = source.groupby(keys, observed=True, sort=True)[value_columns].sum().reset_index()
+            else:
+                level = source[value_columns].sum().to_frame().T
+            level['Level'] = f'{geo}|{time}'
+            levels.append(level)
+    cube = pd.concat(levels, ignore_index=True)
+
+    for column in ('Continent', 'Income', 'Country'):
+        cube[column] = cube[column].astype(object).fillna(ALL).astype('category')
+    for column in ('Decade', 'Year'):
+        cube[column] = cube[column].fillna(ALL_YEARS).astype(np.int16)
+    cube['Level'] = cube['Level'].astype('category')
+    for column in value_columns:
+        cube[column] = cube[column].astype(np.int32 if column.endswith('_count') else np.float64)
+    return cube[['Level', 'Continent', 'Income', 'Country', 'Decade', 'Year'] + value_columns]
+
+# Materialize the cube of a frame
+def build_cube(df, metrics=None):
+    """Return roll_up(finest_cells(df, metrics)); see roll_up for the levels."""
+    return roll_up(finest_cells(df, metrics))
+
+# Persist the cube with the key of the data it was built from
+def save_cube(cube, file_path=CUBE_PATH, key=None):
+    """Write the cube to a dictionary-encoded, compressed Parquet file."""
+    table = pa.Table.from_pandas(cube, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), b'data_key': (key or '').encode()}
+    pq.write_table(table.replace_schema_metadata(metadata), file_path, compression='zstd')
+    print(f"Emissions cube saved to '{file_path}'.")
+
+# Read the stored cube if it was built from the same data
+def load_cube(file_path=CUBE_PATH, key=None):
+    """Return an EmissionsCube from file_path, or None when it is missing or was built from different data."""
+    if not os.path.exists(file_path):
+        return None
+    if key is not None and pq.read_schema(file_path).metadata.get(b'data_key', b'').decode() != key:
+        return None
+    return EmissionsCube(pd.read_parquet(file_path))
+
+# Order-independent fingerprint of the finest cells a cube is rolled up from
+def cube_key(cells):
+    """Return the key of finest_cells output and of the membership tables that group it, the same whichever
+    backend or batching produced the cells."""
+    value_columns = [column for column in cells.columns if column.endswith(('_sum', '_count'))]
+    return hashlib.sha1((data_key(cells, value_columns) + MEMBERSHIP_KEY).encode()).hexdigest()
+
+# Cube of the finest cells of one or more batches, rebuilt only when they changed
+def combine_cells(parts, file_path=CUBE_PATH):
+    """Return the EmissionsCube of the concatenated finest_cells parts, read from file_path when its key
+    matches, else rolled up and saved."""
+    cells = pd.concat([part.astype({'Country': object}) for part in parts], ignore_index=True)
+    key = cube_key(cells)
+    cube = load_cube(file_path, key)
+    if cube is None:
+        table = roll_up(cells)
+        save_cube(table, file_path, key)
+        cube = EmissionsCube(table)
+    return cube
+
+# Cube for a frame, rebuilt only when the data changed
+def cached_cube(df, file_path=CUBE_PATH, metrics=None):
+    """Return the EmissionsCube of df, read from file_path when its data key matches, else built and saved."""
+    return combine_cells([finest_cells(df, metrics)], file_path)
+
+# Roll-up and drill-down queries against the materialized levels
+class EmissionsCube:
+    """Query interface over a build_cube table; no query touches row-level data."""
+
+    def __init__(self, table):
+        self.metrics = [column[:-len('_sum')] for column in table.columns if column.endswith('_sum')]
+        self.levels = {str(level): cells.drop(columns='Level').reset_index(drop=True)
+                       for level, cells in table.groupby('Level', observed=True)}
+
+    def query(self, by=(), metrics=None, stat='sum', filters=None, years=None):
+        """Return stat ('sum', 'mean' or 'count') of metrics for each combination of the by dimensions.
+
+        by lists dimensions among Continent, Income, Country, Decade and Year (empty for a grand
+        total).
+        filters maps a dimension to a value or list of values; years=(first, last) keeps that
+        inclusive year range. Cells are read from the smallest level holding every dimension
+        used, then summed over any dimension filtered on but not in by. Means are sum / count,
+        i.e. the mean over all underlying rows. Unless Country or both Continent and Income are
+        used, the totals cover countries only, not aggregate entities such as World.
+        """
+        if stat not in STATISTICS:
+            raise ValueError(f"Unknown statistic: {stat!r}; expected one of {STATISTICS}.")
+        by = [by] if isinstance(by, str) else list(by)
+        metrics = self.metrics if metrics is None else [metrics] if isinstance(metrics, str) else list(metrics)
+        filters = dict(filters or {})
+        used = set(by) | set(filters)
+        if years is not None and not used & {'Year', 'Decade'}:
+            used.add('Year')
+        if years is not None and 'Decade' in used and 'Year' not in used and (years[0] % 10 or years[1] % 10 != 9):
+            used.add('Year')
+        cells = self.levels[level_name(used)]
+
+        mask = np.ones(len(cells), dtype=bool)
+        for dimension, values in filters.items():
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            mask &= cells[dimension].isin(list(values)).to_numpy()
+        if years is not None:
+            time = cells['Year'] if 'Year' in used else cells['Decade']
+            mask &= ((time >= (years[0] if 'Year' in used else years[0] // 10 * 10)) & (time <= years[1])).to_numpy()
+        columns = [f'{metric}_{part}' for metric in metrics for part in ('sum', 'count')]
+        cells = cells.loc[mask, by + columns]
+        totals = cells.groupby(by, observed=True, sort=True)[columns].sum() if by \
+            else cells[columns].sum().to_frame().T
+
+        result = pd.DataFrame(index=totals.index)
+        for metric in metrics:
+            if stat == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result[metric] = totals[f'{metric}_sum'] / totals[f'{metric}_count'].replace(0, np.nan)
+            else:
+                result[metric] = totals[f'{metric}_{stat}']
+        return result
+
+    def drill_down(self, parent, child, metrics=None, stat='sum', **kwargs):
+        """Return the child-level breakdown (e.g. Country per Continent) under one parent cell {dimension: value}."""
+        return self.query(list(parent) + [child], metrics, stat, filters={**kwargs.pop('filters', {}), **parent},
+                          **kwargs)
+
+    def source_breakdown(self, by='Year', stat='sum', **kwargs):
+        """Return the source metrics (Coal_CO2 ... Other_Industry_CO2) present in the cube by by."""
+        sources = [metric for metric in SOURCE_METRICS if metric in self.metrics]
+        return self.query(by, sources, stat, **kwargs)
+
+# Main function
+def main(file_path=CUBE_PATH):
+    cube = load_cube(file_path)
+    if cube is None:
+        print(f"No cube at '{file_path}'; run data_preprocessing.py first.")
+        return
+    print(cube.source_breakdown('Decade'))
+    print(cube.query(['Income', 'Decade'], 'CO2_per_capita', stat='mean', years=(1950, 2019)))
+
+# Run the main function
+if __name__ == "__main__":
+    main()
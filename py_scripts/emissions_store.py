@@ -0,0 +1,107 @@
+# Import necessary libraries
+import numpy as np
+import pandas as pd
+
+from processed_data import PROCESSED_PARQUET, load_processed
+
+# Column store of the processed data, sorted by (Country, Year) with a per-country offset index
+class EmissionsStore:
+    """Read-only columns sorted by Country then Year, with O(1) country slices and binary-searched year ranges.
+
+    Every column is one contiguous NumPy array; rows offsets[i]:offsets[i + 1] belong to
+    countries[i]. Per-country accessors return views into those arrays, not copies.
+    """
+
+    def __init__(self, df, columns=None):
+        columns = [column for column in df.columns if column not in ('Country', 'Year')] if columns is None \
+            else list(columns)
+        country = df['Country'] if df['Country'].dtype == 'category' else df['Country'].astype('category')
+        codes = country.cat.codes.to_numpy()
+        years = df['Year'].to_numpy()
+        order = np.lexsort((years, codes))
+
+        counts = np.bincount(codes, minlength=len(country.cat.categories))
+        present = np.flatnonzero(counts)
+        self.countries = list(country.cat.categories[present])
+        self.offsets = np.concatenate([[0], np.cumsum(counts[present])])
+        self.index = {name: i for i, name in enumerate(self.countries)}
+        self.codes = np.repeat(np.arange(len(self.countries), dtype=np.int32), counts[present])
+        self.data = {'Year': years[order]}
+        self.data.update({column: df[column].to_numpy()[order] for column in columns})
+        for values in self.data.values():
+            values.flags.writeable = False
+
+    @classmethod
+    def from_parquet(cls, file_path=PROCESSED_PARQUET, columns=None, countries=None, years=None):
+        """Build a store from the processed Parquet file, reading only the requested columns and rows."""
+        read_columns = None if columns is None else ['Country', 'Year'] + list(columns)
+        return cls(load_processed(file_path, columns=read_columns, countries=countries, years=years), columns)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __contains__(self, country):
+        return country in self.index
+
+    @property
+    def columns(self):
+        """Names of the stored columns, Year first."""
+        return list(self.data)
+
+    def country_slice(self, country):
+        """Return the slice of country's rows; a KeyError names an unknown country."""
+        i = self.index[country]
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def year_slice(self, country, start=None, end=None):
+        """Return the slice of country's rows with start <= Year <= end, found by binary search."""
+        rows = self.country_slice(country)
+        years = self.data['Year'][rows]
+        lo = 0 if start is None else np.searchsorted(years, start, side='left')
+        hi = len(years) if end is None else np.searchsorted(years, end, side='right')
+        return slice(rows.start + int(lo), rows.start + int(hi))
+
+    def column(self, name, country=None, years=None):
+        """Return a read-only view of one column, for one country and optionally a (start, end) year range."""
+        if country is None:
+            return self.data[name]
+        rows = self.country_slice(country) if years is None else self.year_slice(country, *years)
+        return self.data[name][rows]
+
+    def rows(self, countries, years=None):
+        """Return the positions of the rows of several countries, optionally limited to a year range."""
+        slices = [self.country_slice(country) if years is None else self.year_slice(country, *years)
+                  for country in countries if country in self.index]
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        starts = np.array([s.start for s in slices])
+        sizes = np.array([s.stop - s.start for s in slices])
+        return np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+
+    def iter_countries(self, columns=None):
+        """Yield (country, {column: view}) for every country in order."""
+        columns = self.columns if columns is None else ['Year'] + [c for c in columns if c != 'Year']
+        for country, start, stop in zip(self.countries, self.offsets[:-1], self.offsets[1:]):
+            yield country, {column: self.data[column][start:stop] for column in columns}
+
+    def frame(self, countries=None, years=None, columns=None):
+        """Return a Country/Year/columns DataFrame of one country (a str), several countries or all rows.
+
+        Country is categorical over the countries in the frame only. A single country is built
+        from views without copying the column data.
+        """
+        columns = [column for column in self.columns if column != 'Year'] if columns is None else list(columns)
+        if isinstance(countries, str):
+            countries = [countries]
+            rows = self.country_slice(countries[0]) if years is None else self.year_slice(countries[0], *years)
+        elif countries is None and years is None:
+            countries, rows = self.countries, slice(0, len(self))
+        else:
+            wanted = set(self.countries if countries is None else countries)
+            countries = [country for country in self.countries if country in wanted]
+            rows = self.rows(countries, years)
+        # Map store codes to positions among the kept countries; both lists are in store order
+        codes = np.searchsorted([self.index[country] for country in countries], self.codes[rows])
+        data = {'Country': pd.Categorical.from_codes(codes, categories=countries)}
+        data.update({column: self.data[column][rows] for column in ['Year'] + columns})
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,103 @@
+# Import necessary libraries
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from data_cache import load_extracted
+from parallel import map_tasks
+
+# Same features and target as the random forest in notebooks/analysis_co2_sources.ipynb
+FEATURES = ['Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2', 'Population']
+TARGET = 'CO2'
+MAX_REPEATS = 100
+BATCH_REPEATS = 10
+TOLERANCE = 1e-3
+CONFIDENCE = 0.95
+
+# Full-data histogram gradient boosting; binning and tree building use every core through OpenMP
+def fit_model(X, y, random_state=42, **params):
+    """Return a HistGradientBoostingRegressor fitted on X, y with validation-based early stopping."""
+    params = {'max_iter': 500, 'early_stopping': True, 'validation_fraction': 0.1, 'n_iter_no_change': 10,
+              'random_state': random_state, **params}
+    return HistGradientBoostingRegressor(**params).fit(X, y)
+
+# Permutation importance of one feature; top-level so process workers can unpickle it
+def permutation_drops(task):
+    """Return the R2 drops of one feature, one per repeat, stopping once their mean is stable.
+
+    Each repeat permutes the feature once and scores it on a bootstrap resample of the held-out
+    rows, so the spread of the drops covers both permutation and sampling noise. Repeats run in
+    batches of batch_repeats until the standard error of the mean drop falls below tolerance.
+    """
+    model, X, y, j = task['model'], task['X'], task['y'], task['feature']
+    rng = np.random.default_rng(task['seed'])
+    baseline = task['baseline']
+    permuted = X.copy()
+    drops = []
+    while len(drops) < task['max_repeats']:
+        for _ in range(min(task['batch_repeats'], task['max_repeats'] - len(drops))):
+            permuted[:, j] = rng.permutation(X[:, j])
+            predictions = model.predict(permuted)
+            sample = rng.integers(0, len(y), len(y))
+            drops.append(r2_score(y[sample], baseline[sample]) - r2_score(y[sample], predictions[sample]))
+        if len(drops) > 1 and np.std(drops, ddof=1) / np.sqrt(len(drops)) < task['tolerance']:
+            break
+    return np.array(drops)
+
+# Permutation importances of every feature, computed in parallel
+def permutation_importance(model, X, y, feature_names, max_repeats=MAX_REPEATS, batch_repeats=BATCH_REPEATS,
+                           tolerance=TOLERANCE, confidence=CONFIDENCE, random_state=42, executor='thread',
+                           max_workers=None):
+    """Return one row per feature with the mean R2 drop, its bootstrap interval and the repeats used.
+
+    Features are scored concurrently; threads are the default because predict releases the GIL
+    and the model and data are then shared instead of pickled per worker.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    baseline = model.predict(X)
+    seeds = np.random.SeedSequence(random_state).spawn(len(feature_names))
+    tasks = [{'model': model, 'X': X, 'y': y, 'feature': j, 'baseline': baseline, 'seed': seeds[j],
+              'max_repeats': max_repeats, 'batch_repeats': batch_repeats, 'tolerance': tolerance}
+             for j in range(len(feature_names))]
+    tail = (1.0 - confidence) / 2 * 100
+    rows = []
+    for name, drops in zip(feature_names, map_tasks(permutation_drops, tasks, executor, max_workers)):
+        low, high = np.percentile(drops, [tail, 100 - tail])
+        rows.append({'Feature': name, 'Importance': drops.mean(), 'Std': drops.std(ddof=1),
+                     'CI_Low': low, 'CI_High': high, 'Repeats': len(drops)})
+    return pd.DataFrame(rows).sort_values('Importance', ascending=False, ignore_index=True)
+
+# Fit on the full frame and rank the features
+def feature_importance(df, features=FEATURES, target=TARGET, test_size=0.2, random_state=42, executor='thread',
+                       max_workers=None, **kwargs):
+    """Return (importances, model, test R2) for a model trained on every row with a known target."""
+    df = df.dropna(subset=[target])
+    X = df[features].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=np.float64)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    start = time.perf_counter()
+    model = fit_model(X_train, y_train, random_state=random_state)
+    print(f"Fitted on {len(y_train)} rows in {time.perf_counter() - start:.1f} s ({model.n_iter_} iterations).")
+
+    start = time.perf_counter()
+    importances = permutation_importance(model, X_test, y_test, list(features), random_state=random_state,
+                                         executor=executor, max_workers=max_workers, **kwargs)
+    print(f"Permutation importances in {time.perf_counter() - start:.1f} s.")
+    return importances, model, r2_score(y_test, model.predict(X_test))
+
+# Main function
+def main(use_cache=True, offline=False):
+    # Every extracted entity in original units, like the notebook, not the filtered and scaled processed file
+    df = load_extracted(FEATURES + [TARGET], use_cache=use_cache, offline=offline)
+    importances, _, r2 = feature_importance(df)
+    print(f"Held-out R-squared: {r2:.4f}")
+    print(importances.to_string(index=False))
+
+# Run the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# Import necessary libraries
+import json
+import math
+import numpy as np
+import pandas as pd
+
+GROUP_STRATEGIES = ('ffill', 'interpolate')
+TRANSFORM_PATH = "../data/processed/co2_emission_transform.json"
+
+# Indices of the previous and next observed value within each country
+def group_neighbours(valid, codes):
+    """Return float arrays of previous/next valid row positions per group (NaN when none)."""
+    positions = pd.Series(np.where(valid, np.arange(len(valid)), np.nan))
+    grouped = positions.groupby(codes, sort=False)
+    return grouped.ffill().to_numpy(), grouped.bfill().to_numpy()
+
+# Per-country forward fill or linear interpolation on Year for the given block columns
+def fill_within_country(block, columns, strategies, codes, years):
+    """Fill NaNs in place per country; rows must be sorted by country then year."""
+    for i, column in enumerate(columns):
+        strategy = strategies[column]
+        if strategy not in GROUP_STRATEGIES:
+            continue
+        values = block[:, i]
+        missing = np.isnan(values)
+        if not missing.any():
+            continue
+        prev, nxt = group_neighbours(~missing, codes)
+        has_prev = missing & ~np.isnan(prev)
+        prev_idx = prev[has_prev].astype(np.int64)
+        filled = values[prev_idx]
+        if strategy == 'interpolate':
+            # Interior gaps are interpolated linearly on Year, trailing gaps keep the last value
+            has_next = ~np.isnan(nxt[has_prev])
+            next_idx = nxt[has_prev][has_next].astype(np.int64)
+            lo, hi = prev_idx[has_next], next_idx
+            span = years[hi] - years[lo]
+            weight = np.divide(years[has_prev][has_next] - years[lo], span,
+                               out=np.zeros_like(span), where=span > 0)
+            filled[has_next] = values[lo] + (values[hi] - values[lo]) * weight
+        values[has_prev] = filled
+
+# NaN-aware reductions over possibly empty inputs
+def nan_bound(reduce, values):
+    """Return reduce(values) as a float, or NaN when there is no non-NaN value."""
+    if len(values) == 0 or np.isnan(values).all():
+        return float('nan')
+    return float(reduce(values))
+
+def nan_reduce(reduce, values):
+    """Apply min/max to the non-NaN values, returning NaN when there are none."""
+    values = [float(value) for value in values if not np.isnan(value)]
+    return reduce(values) if values else float('nan')
+
+# Fitted preprocessing parameters that can be saved and applied to new batches
+class FeatureTransform:
+    """Imputation constants, min-max scaler parameters and the row filter of one preprocessing run."""
+
+    def __init__(self, strategies, countries, min_year, fill_values=None, data_min=None, data_max=None):
+        self.strategies = dict(strategies)
+        self.countries = list(countries)
+        self.min_year = min_year
+        self.fill_values = dict(fill_values or {})
+        self.data_min = dict(data_min or {})
+        self.data_max = dict(data_max or {})
+
+    @property
+    def columns(self):
+        """Imputed input columns, in output order."""
+        return list(self.strategies)
+
+    @property
+    def scaled_columns(self):
+        """Columns scaled to [0, 1], including the derived CO2_per_capita."""
+        return self.columns + ['CO2_per_capita']
+
+    # Row selection shared by fitting and transforming
+    def select_rows(self, df):
+        """Keep allowed countries after min_year, de-duplicated and sorted when group fills need it."""
+        country = df['Country'] if df['Country'].dtype == 'category' else df['Country'].astype('category')
+        allowed = np.flatnonzero(country.cat.categories.isin(self.countries))
+        mask = np.isin(country.cat.codes.to_numpy(), allowed) & (df['Year'].to_numpy() > self.min_year)
+        kept = df.loc[mask, ['Year'] + self.columns].assign(Country=country[mask]).drop_duplicates()
+
+        codes = kept['Country'].cat.codes.to_numpy()
+        years = kept['Year'].to_numpy()
+        if any(strategy in GROUP_STRATEGIES for strategy in self.strategies.values()):
+            order = np.lexsort((years, codes))
+            kept, codes, years = kept.iloc[order], codes[order], years[order]
+        return kept, codes, years
+
+    # Apply the per-country strategies to a copy of the input columns
+    def group_filled_block(self, kept, codes, years):
+        """Return the input columns as a float block with per-country fills applied."""
+        block = kept[self.columns].to_numpy(dtype=np.float64, copy=True)
+        fill_within_country(block, self.columns, self.strategies, codes, years.astype(np.float64))
+        return block
+
+    # Sufficient statistics of one batch for fitting
+    def partial_stats(self, kept, codes, years):
+        """Return per-country sums, counts and min/max bounds of a selected batch."""
+        block = self.group_filled_block(kept, codes, years)
+        missing = np.isnan(block)
+        observed = np.where(missing, 0.0, block)
+        with np.errstate(all='ignore'):
+            stats = {
+                # Per-country sums depend only on each country's rows, so any batching gives the same values
+                'sums': [np.bincount(codes, weights=observed[:, i]).tolist() for i in range(len(self.columns))],
+                'counts': (~missing).sum(axis=0).tolist(),
+                'any_missing': missing.any(axis=0).tolist(),
+                'min': [nan_bound(np.nanmin, block[:, i]) for i in range(len(self.columns))],
+                'max': [nan_bound(np.nanmax, block[:, i]) for i in range(len(self.columns))],
+            }
+            # Per-capita bounds: c / p is monotonic in each argument, so the extremes of rows with an
+            # imputed side are reached at the observed side's min/max
+            co2, population = block[:, self.columns.index('CO2')], block[:, self.columns.index('Population')]
+            co2_missing, population_missing = np.isnan(co2), np.isnan(population)
+            both = ~co2_missing & ~population_missing
+            ratio = co2[both] / population[both]
+            stats['ratio'] = [nan_bound(np.nanmin, ratio), nan_bound(np.nanmax, ratio)]
+            only_co2 = co2_missing & ~population_missing
+            stats['population_bounds'] = [nan_bound(np.nanmin, population[only_co2]),
+                                          nan_bound(np.nanmax, population[only_co2])]
+            only_population = population_missing & ~co2_missing
+            stats['co2_bounds'] = [nan_bound(np.nanmin, co2[only_population]),
+                                   nan_bound(np.nanmax, co2[only_population])]
+            stats['both_missing'] = bool((co2_missing & population_missing).any())
+        return stats
+
+    # Combine batch statistics into fill constants and scaler ranges
+    def fit_from_stats(self, stats):
+        """Set fill_values, data_min and data_max from a list of partial_stats results."""
+        self.fill_values, self.data_min, self.data_max = {}, {}, {}
+        for i, column in enumerate(self.columns):
+            count = sum(batch['counts'][i] for batch in stats)
+            if self.strategies[column] == 'zero':
+                fill = 0.0
+            else:
+                total = math.fsum(value for batch in stats for value in batch['sums'][i])
+                fill = total / count if count else float('nan')
+            self.fill_values[column] = fill
+            any_missing = any(batch['any_missing'][i] for batch in stats)
+            lows = [batch['min'][i] for batch in stats] + ([fill] if any_missing else [])
+            highs = [batch['max'][i] for batch in stats] + ([fill] if any_missing else [])
+            self.data_min[column], self.data_max[column] = nan_reduce(min, lows), nan_reduce(max, highs)
+
+        co2_fill, population_fill = self.fill_values['CO2'], self.fill_values['Population']
+        candidates = [bound for batch in stats for bound in batch['ratio']]
+        with np.errstate(all='ignore'):
+            for batch in stats:
+                candidates += [np.float64(co2_fill) / bound for bound in batch['population_bounds']]
+                candidates += [np.float64(bound) / population_fill for bound in batch['co2_bounds']]
+            if any(batch['both_missing'] for batch in stats):
+                candidates.append(np.float64(co2_fill) / population_fill)
+        self.data_min['CO2_per_capita'] = nan_reduce(min, candidates)
+        self.data_max['CO2_per_capita'] = nan_reduce(max, candidates)
+
+    # Impute, derive per-capita values and return {column: array}
+    def impute(self, kept, codes, years, block=None):
+        """Fill missing values with the stored constants in one block operation."""
+        if block is None:
+            block = self.group_filled_block(kept, codes, years)
+        fills = np.array([self.fill_values[column] for column in self.columns])
+        block = np.where(np.isnan(block), fills, block)
+
+        values = dict(zip(self.columns, block.T))
+        values['CO2_per_capita'] = values['CO2'] / values['Population']
+        return values
+
+    # MinMaxScaler-equivalent scale and offset per column
+    def scale_params(self, column):
+        """Return (scale, offset) so that scaled = value * scale + offset."""
+        data_range = self.data_max[column] - self.data_min[column]
+        scale = 1.0 / data_range if data_range != 0 else 1.0
+        return scale, -self.data_min[column] * scale
+
+    def scale_key(self, column):
+        """Return a string identifying the scaling of column; it changes whenever a refit moves its range."""
+        return json.dumps(self.scale_params(column))
+
+    # Assemble the output frame from imputed values
+    def build_frame(self, kept, years, values):
+        """Scale the imputed values and return them in the preprocessed schema."""
+        out = pd.DataFrame({'Country': kept['Country'].cat.remove_unused_categories().array, 'Year': years})
+        for column in self.scaled_columns:
+            scale, offset = self.scale_params(column)
+            out[column] = values[column] * scale + offset
+        return out
+
+    # Learn fill constants and scaler parameters, then transform the fitted rows
+    def fit_transform(self, df):
+        """Fit on the extracted frame and return the preprocessed frame."""
+        kept, codes, years = self.select_rows(df)
+        self.fit_from_stats([self.partial_stats(kept, codes, years)])
+        return self.build_frame(kept, years, self.impute(kept, codes, years))
+
+    # Apply the fitted parameters to a new batch without refitting
+    def transform(self, df):
+        """Preprocess a new extracted batch with the stored constants."""
+        kept, codes, years = self.select_rows(df)
+        return self.build_frame(kept, years, self.impute(kept, codes, years))
+
+    # Apply the fitted parameters chunk by chunk
+    def transform_chunks(self, chunks):
+        """Yield the transformed version of each extracted chunk."""
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    # Map scaled values back to their original units
+    def inverse_transform(self, df, columns=None):
+        """Return a copy of df with the given (default: all present) scaled columns unscaled."""
+        df = df.copy()
+        columns = columns or [column for column in self.scaled_columns if column in df.columns]
+        for column in columns:
+            scale, offset = self.scale_params(column)
+            df[column] = (df[column] - offset) / scale
+        return df
+
+    # Serialize the artifact as JSON
+    def to_dict(self):
+        """Return the artifact as a JSON-serializable dict."""
+        return {'strategies': self.strategies, 'countries': self.countries, 'min_year': self.min_year,
+                'fill_values': self.fill_values, 'data_min': self.data_min, 'data_max': self.data_max}
+
+    def save(self, file_path):
+        """Write the artifact to a JSON file."""
+        with open(file_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, file_path):
+        """Read an artifact written by save."""
+        with open(file_path) as f:
+            return cls(**json.load(f))
@@ -0,0 +1,158 @@
+# Import necessary libraries
+import hashlib
+import inspect
+import json
+import os
+import time
+import matplotlib
+# Headless backend, selected before pyplot is imported here or by the plotting modules below
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+from eda import (FIGURES, FOCUS_COUNTRY, SELECTED_COUNTRIES, load_eda_data, plot_co2_by_country,
+                 plot_co2_over_time, plot_co2_per_capita_over_time, plot_correlation_heatmap,
+                 plot_population_over_time, plot_population_vs_co2, plot_selected_boxplot, plot_selected_facets,
+                 plot_selected_heatmap, plot_top_emitters_per_capita, top_emitters)
+from emissions_store import EmissionsStore
+from parallel import iter_tasks
+from processed_data import PROCESSED_PARQUET
+from time_series_analysis import (filter_and_calculate_moving_average, get_top_bottom_countries, load_data,
+                                  plot_moving_average, plot_raw_data, preprocess_data)
+
+FIGURE_DIR = "../reports/figures"
+INDEX_FILE = ".figures.json"
+DPI = 100
+
+# One figure to render: the plotting function, the only rows and columns it reads, and fixed arguments
+def figure_spec(function, data, **kwargs):
+    """Return a spec dict for render_report."""
+    return {'function': function, 'data': data.reset_index(drop=True), 'kwargs': kwargs}
+
+# Figure inputs of the ten EDA charts, each cut down to the data it draws
+def eda_figure_specs(df):
+    """Return {figure name: spec} for the eda.FIGURES charts of a prepared EDA frame."""
+    store = EmissionsStore(df, columns=['Population', 'CO2', 'CO2_per_capita'])
+    focus = store.frame([FOCUS_COUNTRY])
+    selected = store.frame(SELECTED_COUNTRIES)
+    top_countries, _ = top_emitters(df)
+    specs = {
+        'co2_over_time': figure_spec(plot_co2_over_time, focus[['Country', 'Year', 'CO2']]),
+        'co2_per_capita_over_time': figure_spec(plot_co2_per_capita_over_time,
+                                                focus[['Country', 'Year', 'CO2_per_capita']]),
+        'population_over_time': figure_spec(plot_population_over_time, focus[['Country', 'Year', 'Population']]),
+        'population_vs_co2': figure_spec(plot_population_vs_co2, df[['Country', 'Population', 'CO2']]),
+        'correlation_heatmap': figure_spec(plot_correlation_heatmap, df[['Population', 'CO2', 'CO2_per_capita']]),
+        'co2_by_country': figure_spec(plot_co2_by_country, df[['Country', 'Year', 'CO2']]),
+        # Only the top emitters' rows are passed, so the worker's own ranking picks the same countries
+        'top_emitters_per_capita': figure_spec(
+            plot_top_emitters_per_capita, store.frame(list(top_countries), columns=['CO2', 'CO2_per_capita'])),
+        'selected_heatmap': figure_spec(plot_selected_heatmap, selected[['Country', 'Year', 'CO2']]),
+        'selected_boxplot': figure_spec(plot_selected_boxplot, selected[['Country', 'CO2_per_capita']]),
+        'selected_facets': figure_spec(plot_selected_facets, selected[['Country', 'Year', 'CO2']]),
+    }
+    return {name: specs[name] for name in FIGURES}
+
+# Figure inputs of the time-series raw and moving-average charts
+def time_series_figure_specs(df, window_size=10):
+    """Return {figure name: spec} for plot_raw_data and plot_moving_average of a processed frame."""
+    df = preprocess_data(df)
+    top_countries, bottom_countries = get_top_bottom_countries(df)
+    filtered_df = filter_and_calculate_moving_average(df, top_countries.union(bottom_countries), window_size)
+    colors = [tuple(color) for color in sns.color_palette("hsv", len(top_countries) + len(bottom_countries))]
+    kwargs = {'top_countries': list(top_countries), 'bottom_countries': list(bottom_countries), 'colors': colors,
+              'show': False}
+    return {
+        'raw_co2_per_capita': figure_spec(plot_raw_data, filtered_df[['Country', 'Year', 'CO2_per_capita']],
+                                          **kwargs),
+        'moving_average': figure_spec(plot_moving_average, filtered_df[['Country', 'Year', 'CO2_per_capita_MA']],
+                                      window_size=window_size, **kwargs),
+    }
+
+# Fingerprint of a plotting function's code
+def function_digest(function):
+    """Return a sha1 of the function's source, or of its bytecode and constants when the source is unavailable."""
+    try:
+        code = inspect.getsource(function).encode()
+    except (OSError, TypeError):
+        code = function.__code__.co_code + repr(function.__code__.co_consts).encode()
+    return hashlib.sha1(code).hexdigest()
+
+# Fingerprint of a figure's function, arguments and input data
+def figure_key(name, spec, dpi=DPI):
+    """Return a hex key that changes when the figure's input rows, arguments or plotting function change."""
+    function = spec['function']
+    header = [name, function.__module__, function.__qualname__, function_digest(function), spec['kwargs'], dpi,
+              [str(dtype) for dtype in spec['data'].dtypes], list(spec['data'].columns)]
+    digest = hashlib.sha1(json.dumps(header, sort_keys=True, default=str).encode())
+    digest.update(pd.util.hash_pandas_object(spec['data'], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+# Cache index of rendered figures
+def load_index(figure_dir=FIGURE_DIR):
+    """Return {figure name: key} of the figures last rendered into figure_dir, empty when missing."""
+    path = os.path.join(figure_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_index(index, figure_dir=FIGURE_DIR):
+    """Atomically write the cache index."""
+    path = os.path.join(figure_dir, INDEX_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+# Draw and save one figure; top-level so process workers can unpickle it
+def render_figure(task):
+    """Render the task's figure to its path with the Agg backend and return the seconds taken."""
+    start = time.perf_counter()
+    fig = task['function'](task['data'], **task['kwargs'])
+    fig.savefig(task['path'] + '.tmp.png', dpi=task['dpi'], bbox_inches='tight')
+    os.replace(task['path'] + '.tmp.png', task['path'])
+    plt.close(fig)
+    return time.perf_counter() - start
+
+# Render every figure whose inputs changed, in parallel
+def render_report(specs, figure_dir=FIGURE_DIR, dpi=DPI, force=False, executor='process', max_workers=None):
+    """Render {name: spec} to figure_dir/<name>.png and return one row of timing per figure.
+
+    A figure is skipped when its file exists and its key (input data, arguments and function)
+    matches the one recorded at its last render. The index is saved as each figure completes,
+    so a failed run keeps the figures already drawn.
+    """
+    os.makedirs(figure_dir, exist_ok=True)
+    index = load_index(figure_dir)
+    keys, tasks = {}, []
+    start = time.perf_counter()
+    for name, spec in specs.items():
+        keys[name] = figure_key(name, spec, dpi)
+        path = os.path.join(figure_dir, f'{name}.png')
+        if not force and index.get(name) == keys[name] and os.path.exists(path):
+            continue
+        tasks.append({**spec, 'name': name, 'path': path, 'dpi': dpi})
+    hash_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    seconds = {}
+    for task, elapsed in zip(tasks, iter_tasks(render_figure, tasks, executor, max_workers)):
+        seconds[task['name']] = elapsed
+        index[task['name']] = keys[task['name']]
+        save_index(index, figure_dir)
+    print(f"Rendered {len(tasks)} of {len(specs)} figures in {time.perf_counter() - start:.1f} s "
+          f"(hashing {hash_seconds:.2f} s).")
+    return pd.DataFrame([{'Figure': name, 'Skipped': name not in seconds, 'Seconds': seconds.get(name, 0.0),
+                          'Path': os.path.join(figure_dir, f'{name}.png')} for name in specs])
+
+# Main function
+def main(file_path=PROCESSED_PARQUET, use_cache=True, offline=False, force=False):
+    specs = eda_figure_specs(load_eda_data(use_cache=use_cache, offline=offline))
+    specs.update(time_series_figure_specs(load_data(file_path)))
+    timings = render_report(specs, force=force)
+    print(timings.to_string(index=False))
+
+# Run the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# Import necessary libraries
+import hashlib
+import json
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+from parallel import country_offsets, iter_tasks
+from processed_data import PROCESSED_PARQUET, load_processed
+
+FORECAST_CACHE_DIR = "../data/interim/forecast_cache"
+FORECAST_PATH = "../data/processed/co2_emission_forecasts.parquet"
+INDEX_FILE = "forecasts.json"
+MODELS = ('arima', 'ets')
+ARIMA_ORDER = (1, 1, 1)
+HORIZON = 10
+MIN_OBSERVATIONS = 10
+SAVE_INTERVAL = 5.0
+
+# Fingerprint of one series and the model specification fitted to it
+def series_key(model, order, horizon, years, values):
+    """Return a hex key that changes when the series data or the model specification changes."""
+    digest = hashlib.sha1(json.dumps([model, list(order), horizon]).encode())
+    digest.update(np.ascontiguousarray(years, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+# Fit the task's model, warm-started when possible
+def fit_model(task):
+    """Return the fitted ARIMA or ETS results of the task, retrying from a cold start if the warm start fails."""
+    values = np.asarray(task['values'], dtype=np.float64)
+    if task['model'] == 'arima':
+        model = ARIMA(values, order=tuple(task['order']))
+        fit = lambda start_params: model.fit(start_params=start_params)
+    else:
+        model = ETSModel(values, error='add', trend='add')
+        fit = lambda start_params: model.fit(start_params=start_params, disp=False)
+    start_params = task.get('start_params')
+    if start_params is None:
+        return fit(None)
+    try:
+        return fit(start_params)
+    except Exception:
+        # Warm start parameters can be invalid for the new data; fall back to a cold start
+        return fit(None)
+
+# Fit one series and forecast it; top-level so process workers can unpickle it
+def fit_series(task):
+    """Fit the task's model and return its parameters and forecast.
+
+    A series whose model fails to fit returns an entry with an 'error' message and no forecast
+    instead of raising, so one bad series does not abort the whole run.
+    """
+    last_year = int(task['years'][-1])
+    try:
+        with warnings.catch_warnings():
+            # Short annual series routinely trigger convergence and frequency warnings
+            warnings.simplefilter('ignore')
+            fitted = fit_model(task)
+            forecast = np.asarray(fitted.forecast(task['horizon']), dtype=np.float64).tolist()
+    except Exception as error:
+        return {'key': task['key'], 'params': None, 'aic': None, 'forecast_years': [], 'forecast': [],
+                'error': f'{type(error).__name__}: {error}'}
+    return {
+        'key': task['key'],
+        'params': np.asarray(fitted.params, dtype=np.float64).tolist(),
+        'aic': float(fitted.aic),
+        'forecast_years': list(range(last_year + 1, last_year + 1 + task['horizon'])),
+        'forecast': forecast,
+        'error': None,
+    }
+
+# Cache index of fitted parameters and forecasts
+def load_index(cache_dir=FORECAST_CACHE_DIR):
+    """Return {series id: fitted result} from the cache directory, empty when missing."""
+    path = os.path.join(cache_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_index(index, cache_dir=FORECAST_CACHE_DIR):
+    """Atomically write the cache index."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, INDEX_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f)
+    os.replace(path + ".tmp", path)
+
+# Build one fitting task per country x metric series
+def build_tasks(df, metrics, model='arima', order=ARIMA_ORDER, horizon=HORIZON):
+    """Yield (series id, task) for every country x metric series with enough observations."""
+    sorted_df, countries, offsets = country_offsets(df)
+    years_all = sorted_df['Year'].to_numpy(dtype=np.int64)
+    for country, start, stop in zip(countries, offsets[:-1], offsets[1:]):
+        order_in_country = np.argsort(years_all[start:stop], kind='stable')
+        years = years_all[start:stop][order_in_country]
+        for metric in metrics:
+            values = sorted_df[metric].to_numpy(dtype=np.float64)[start:stop][order_in_country]
+            valid = ~np.isnan(values)
+            if valid.sum() < MIN_OBSERVATIONS:
+                continue
+            task = {'country': country, 'metric': metric, 'model': model, 'order': list(order),
+                    'horizon': horizon, 'years': years[valid].tolist(), 'values': values[valid].tolist()}
+            task['key'] = series_key(model, order, horizon, task['years'], task['values'])
+            yield f'{model}|{country}|{metric}', task
+
+# Fit every changed series in parallel and return all forecasts
+def forecast_all(df, metrics, model='arima', order=ARIMA_ORDER, horizon=HORIZON, cache_dir=FORECAST_CACHE_DIR,
+                 executor='process', max_workers=None):
+    """Forecast every country x metric series, refitting only series whose data changed.
+
+    Series whose key matches the cache index reuse the stored fit; the others are fitted in worker
+    processes, warm-started from the parameters of the previous run. Failed fits are recorded with
+    their error in the index and get no forecast rows. The index is saved every SAVE_INTERVAL
+    seconds and when fitting stops, even on an error, so completed fits are never lost. Returns
+    (forecasts, refitted) where forecasts has one row per Country, Metric and forecast Year.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model!r}; expected one of {MODELS}.")
+    index = load_index(cache_dir)
+    tasks, results = {}, {}
+    for series_id, task in build_tasks(df, metrics, model, order, horizon):
+        cached = index.get(series_id)
+        if cached is not None and cached['key'] == task['key']:
+            results[series_id] = cached
+            continue
+        if cached is not None and cached.get('params') is not None:
+            task['start_params'] = cached['params']
+        tasks[series_id] = task
+
+    start = saved = time.perf_counter()
+    try:
+        for series_id, result in zip(tasks, iter_tasks(fit_series, tasks.values(), executor, max_workers)):
+            task = tasks[series_id]
+            # Entries of series absent from this frame stay in the index so other subsets stay cached
+            index[series_id] = results[series_id] = {**result, 'country': task['country'], 'metric': task['metric']}
+            if time.perf_counter() - saved > SAVE_INTERVAL:
+                save_index(index, cache_dir)
+                saved = time.perf_counter()
+    finally:
+        save_index(index, cache_dir)
+    failed = [series_id for series_id in tasks if results[series_id].get('error')]
+    print(f"Fitted {len(tasks)} of {len(results)} series in {time.perf_counter() - start:.1f} s"
+          f" ({len(failed)} failed).")
+    for series_id in failed:
+        print(f"  {series_id}: {results[series_id]['error']}")
+
+    rows = [(result['country'], result['metric'], model, year, value)
+            for result in results.values()
+            for year, value in zip(result['forecast_years'], result['forecast'])]
+    forecasts = pd.DataFrame(rows, columns=['Country', 'Metric', 'Model', 'Year', 'Forecast'])
+    refitted = [(task['country'], task['metric']) for task in tasks.values()]
+    return forecasts, refitted
+
+# Main function
+def main(file_path=PROCESSED_PARQUET, output_path=FORECAST_PATH):
+    df = load_processed(file_path)
+    metrics = [column for column in df.columns if column not in ('Country', 'Year')]
+    forecasts = pd.concat([forecast_all(df, metrics, model=model)[0] for model in MODELS], ignore_index=True)
+    forecasts.to_parquet(output_path, index=False)
+    print(f"Forecasts saved to '{output_path}'.")
+
+# Run the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# Import necessary libraries
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.neighbors import KNeighborsRegressor
+
+from parallel import map_tasks
+from processed_data import PROCESSED_PARQUET, load_processed
+
+MLFLOW_DIR = "../mlruns"
+EXPERIMENT_NAME = "co2_model_sweep"
+
+# Same structure as model_configs in notebooks/mlflow_models.ipynb
+MODEL_CONFIGS = {
+    "LinearRegression": {
+        "model": LinearRegression,
+        "param_name": "fit_intercept",
+        "param_values": [True, False, None],
+        "additional_params": {}
+    },
+    "RandomForestRegressor": {
+        "model": RandomForestRegressor,
+        "param_name": "n_estimators",
+        "param_values": [50, 100, 200],
+        "additional_params": {"random_state": 42}
+    },
+    "KNeighborsRegressor": {
+        "model": KNeighborsRegressor,
+        "param_name": "n_neighbors",
+        "param_values": [3, 5, 7],
+        "additional_params": {}
+    }
+}
+
+# Local SQLite tracking store: a single file, no tracking server needed
+def local_tracking_uri(mlflow_dir=MLFLOW_DIR):
+    """Return a sqlite:/// tracking URI for mlflow.db inside mlflow_dir, creating the directory."""
+    os.makedirs(mlflow_dir, exist_ok=True)
+    return "sqlite:///" + os.path.abspath(os.path.join(mlflow_dir, "mlflow.db"))
+
+# Fingerprint of the train/test arrays every trial sees
+def dataset_hash(*arrays):
+    """Return a hex key of the given arrays' shapes and values."""
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+# One trial per config and parameter value, as in the notebook loop
+def expand_trials(model_configs=MODEL_CONFIGS):
+    """Return a list of trial dicts with the model class, its parameters and the run name."""
+    trials = []
+    for model_name, config in model_configs.items():
+        for param_value in config["param_values"]:
+            params = {config["param_name"]: param_value} if param_value is not None else {}
+            params.update(config["additional_params"])
+            trials.append({"model_name": model_name, "model": config["model"], "params": params,
+                           "run_name": f"{model_name}_{config['param_name']}={param_value}"})
+    return trials
+
+# Identity of a trial on a dataset, used to skip work already logged
+def trial_key(data_hash, trial):
+    """Return a hex key of the dataset hash, model name and parameters."""
+    payload = json.dumps([data_hash, trial["model_name"], trial["params"]], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+# Fit and score one trial; top-level so process workers can unpickle it
+def run_trial(task):
+    """Fit the task's model on the train split and return its test metrics and timings."""
+    start = time.perf_counter()
+    model = task["model"](**task["params"]).fit(task["X_train"], task["y_train"])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    predictions = model.predict(task["X_test"])
+    predict_seconds = time.perf_counter() - start
+    return {"mse": mean_squared_error(task["y_test"], predictions), "r2_score": r2_score(task["y_test"], predictions),
+            "fit_seconds": fit_seconds, "predict_seconds": predict_seconds}
+
+# Trial keys that already have a finished run for this dataset
+def logged_trials(client, experiment_id, data_hash):
+    """Return {trial key: metrics} of finished runs logged for data_hash."""
+    runs = client.search_runs([experiment_id], max_results=50000,
+                              filter_string=f"tags.dataset_hash = '{data_hash}' and attributes.status = 'FINISHED'")
+    return {run.data.tags["trial_key"]: run.data.metrics for run in runs if "trial_key" in run.data.tags}
+
+# Record one trial with a single batched call
+def log_trial(client, experiment_id, trial, key, data_hash, metrics):
+    """Create a finished run holding the trial's params, metrics and tags."""
+    run = client.create_run(experiment_id, run_name=trial["run_name"])
+    timestamp = int(time.time() * 1000)
+    client.log_batch(
+        run.info.run_id,
+        metrics=[Metric(name, float(value), timestamp, 0) for name, value in metrics.items()],
+        params=[Param(name, str(value)) for name, value in trial["params"].items()],
+        tags=[RunTag("model_name", trial["model_name"]), RunTag("trial_key", key),
+              RunTag("dataset_hash", data_hash)])
+    client.set_terminated(run.info.run_id)
+
+# Run every config in parallel and log the new results
+def run_sweep(X_train, X_test, y_train, y_test, model_configs=MODEL_CONFIGS, tracking_uri=None,
+              experiment_name=EXPERIMENT_NAME, executor='process', max_workers=None):
+    """Return one row per trial with metrics, timings and whether it was skipped as already logged."""
+    client = MlflowClient(tracking_uri=tracking_uri or local_tracking_uri())
+    experiment = client.get_experiment_by_name(experiment_name)
+    experiment_id = experiment.experiment_id if experiment else client.create_experiment(experiment_name)
+
+    data_hash = dataset_hash(X_train, X_test, y_train, y_test)
+    done = logged_trials(client, experiment_id, data_hash)
+    trials = expand_trials(model_configs)
+    keys = [trial_key(data_hash, trial) for trial in trials]
+    pending = [i for i, key in enumerate(keys) if key not in done]
+
+    tasks = [{**trials[i], "X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
+             for i in pending]
+    start = time.perf_counter()
+    results = dict(zip(pending, map_tasks(run_trial, tasks, executor, max_workers)))
+    print(f"Ran {len(pending)} of {len(trials)} trials in {time.perf_counter() - start:.1f} s.")
+    for i, metrics in results.items():
+        log_trial(client, experiment_id, trials[i], keys[i], data_hash, metrics)
+
+    rows = []
+    for i, (trial, key) in enumerate(zip(trials, keys)):
+        metrics = results.get(i, done.get(key, {}))
+        rows.append({"run_name": trial["run_name"], "model_name": trial["model_name"], "skipped": i not in results,
+                     **{name: metrics.get(name) for name in ("mse", "r2_score", "fit_seconds", "predict_seconds")}})
+    return pd.DataFrame(rows)
+
+# Main function
+def main(file_path=PROCESSED_PARQUET):
+    df = load_processed(file_path, columns=['Year', 'Population', 'CO2'])
+    X = df[['Year', 'Population']].to_numpy(dtype=np.float64)
+    y = df['CO2'].to_numpy(dtype=np.float64)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    results = run_sweep(X_train, X_test, y_train, y_test)
+    print(results.to_string(index=False))
+
+# Run the main function
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Import necessary libraries
+import json
+import numpy as np
+
+from rolling_engine import group_layout, grouped_rolling
+
+MA_STATE_PATH = "../data/processed/co2_per_capita_ma_state.json"
+
+# Per-country ring buffers of the latest values, enough to extend trailing moving averages
+class MovingAverageState:
+    """Last max(windows) values and last year of each country for one column's moving averages.
+
+    scale_key identifies the scaling the buffered values were stored with (see
+    FeatureTransform.scale_key), so a state built before a refit of the scaler can be detected.
+    """
+
+    def __init__(self, column='CO2_per_capita', windows=(10,), countries=None, last_year=None, buffer=None,
+                 scale_key=None):
+        self.column = column
+        self.windows = tuple(windows)
+        self.scale_key = scale_key
+        self.countries = list(countries or [])
+        self.index = {country: i for i, country in enumerate(self.countries)}
+        self.last_year = np.array(last_year if last_year is not None else [], dtype=np.int64)
+        width = max(self.windows)
+        self.buffer = (np.array(buffer, dtype=np.float64).reshape(len(self.countries), width)
+                       if buffer is not None else np.empty((0, width)))
+
+    @property
+    def output_columns(self):
+        """Moving-average column names; a single window keeps time_series_analysis' '<column>_MA' name."""
+        if len(self.windows) == 1:
+            return [f'{self.column}_MA']
+        return [f'{self.column}_MA_{window}' for window in self.windows]
+
+    # Moving averages of the buffered rows for the given countries
+    def current_averages(self, rows):
+        """Return {output column: array} of trailing means of the buffers at rows, ignoring NaNs."""
+        averages = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for name, window in zip(self.output_columns, self.windows):
+                recent = self.buffer[rows, -window:]
+                valid = ~np.isnan(recent)
+                averages[name] = np.where(valid, recent, 0.0).sum(axis=1) / valid.sum(axis=1)
+        return averages
+
+    # Build the state from a full history and return every row's moving averages
+    def initialize(self, df):
+        """Reset the state from df (Country, Year, column) and return df with the moving-average columns."""
+        means = grouped_rolling(df, [self.column], windows=self.windows, statistics=('mean',))
+        sort, group_ids, positions = group_layout(df)
+        lengths = np.bincount(group_ids)
+        width = max(self.windows)
+
+        # Right-align the last `width` values of each country in its buffer row
+        slots = width - (lengths[group_ids] - positions)
+        recent = slots >= 0
+        countries = df['Country'].iloc[sort].to_numpy()
+        self.countries = list(countries[np.r_[0, np.cumsum(lengths)[:-1]]]) if len(sort) else []
+        self.index = {country: i for i, country in enumerate(self.countries)}
+        self.buffer = np.full((len(self.countries), width), np.nan)
+        self.buffer[group_ids[recent], slots[recent]] = df[self.column].to_numpy(dtype=np.float64)[sort][recent]
+        self.last_year = np.full(len(self.countries), np.iinfo(np.int64).min)
+        np.maximum.at(self.last_year, group_ids, df['Year'].to_numpy(dtype=np.int64)[sort])
+
+        out = df.copy()
+        for name, window in zip(self.output_columns, self.windows):
+            out[name] = means[f'{self.column}_mean_{window}']
+        return out
+
+    # Extend the moving averages with newly published years
+    def append(self, new_rows):
+        """Push rows newer than each country's last year and return only those rows with their averages.
+
+        Each year is applied to all its countries at once, so the cost per year is O(countries).
+        Rows at or before a country's last year would change history and raise a ValueError.
+        """
+        new_rows = new_rows[['Country', 'Year', self.column]].sort_values('Year', kind='stable')
+        if new_rows.duplicated(['Country', 'Year']).any():
+            raise ValueError("New rows contain duplicate (Country, Year) pairs.")
+        for country in new_rows['Country'].unique():
+            if country not in self.index:
+                self.index[country] = len(self.countries)
+                self.countries.append(country)
+                self.buffer = np.vstack([self.buffer, np.full((1, self.buffer.shape[1]), np.nan)])
+                self.last_year = np.append(self.last_year, np.iinfo(np.int64).min)
+
+        rows = new_rows['Country'].map(self.index).to_numpy(dtype=np.int64)
+        years = new_rows['Year'].to_numpy(dtype=np.int64)
+        values = new_rows[self.column].to_numpy(dtype=np.float64)
+        if (years <= self.last_year[rows]).any():
+            raise ValueError("New rows must be later than the last stored year of their country.")
+
+        averages = {name: np.empty(len(new_rows)) for name in self.output_columns}
+        for year in np.unique(years):
+            batch = np.flatnonzero(years == year)
+            countries = rows[batch]
+            self.buffer[countries, :-1] = self.buffer[countries, 1:]
+            self.buffer[countries, -1] = values[batch]
+            self.last_year[countries] = year
+            for name, average in self.current_averages(countries).items():
+                averages[name][batch] = average
+
+        out = new_rows.copy()
+        for name, average in averages.items():
+            out[name] = average
+        return out
+
+    # Serialize the state as JSON
+    def to_dict(self):
+        """Return the state as a JSON-serializable dict."""
+        return {'column': self.column, 'windows': list(self.windows), 'countries': self.countries,
+                'last_year': self.last_year.tolist(), 'buffer': self.buffer.tolist(), 'scale_key': self.scale_key}
+
+    def save(self, file_path=MA_STATE_PATH):
+        """Write the state to a JSON file."""
+        with open(file_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, file_path=MA_STATE_PATH):
+        """Read a state written by save."""
+        with open(file_path) as f:
+            return cls(**json.load(f))
@@ -0,0 +1,136 @@
+# Import necessary libraries
+import glob
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from data_preprocessing import ENTRY_FIELDS, build_extracted_frame, entries_to_columns
+
+RAW_PATTERN = "../data/raw/owid-co2-data-part-*.json"
+READ_SIZE = 1 << 16
+
+# Incrementally parse the top-level {country: {...}} object of an OWID shard
+def iter_countries(file_path, read_size=READ_SIZE):
+    """Yield (country, country_data) pairs one at a time without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(file_path, encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+
+        def read_more(size=read_size):
+            nonlocal buffer
+            chunk = f.read(size)
+            buffer += chunk
+            return bool(chunk)
+
+        def skip(chars):
+            # Advance past separator characters, returning the next significant one
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or not read_more():
+                    return buffer[pos] if pos < len(buffer) else ''
+
+        def next_value():
+            # Decode the next JSON value, reading more of the file until it is complete
+            nonlocal pos
+            size = read_size
+            while True:
+                try:
+                    value, pos = decoder.raw_decode(buffer, pos)
+                    return value
+                except json.JSONDecodeError:
+                    if not read_more(size):
+                        raise
+                    size *= 2
+
+        if skip(' \t\r\n') != '{':
+            raise ValueError(f"'{file_path}' does not contain a top-level JSON object.")
+        pos += 1
+        while skip(' \t\r\n,') not in ('}', ''):
+            # Drop the consumed prefix so the buffer holds about one country at a time
+            buffer = buffer[pos:]
+            pos = 0
+            country = next_value()
+            skip(' \t\r\n:')
+            yield country, next_value()
+
+# Flatten one shard into column chunks
+def load_shard(file_path, countries=None):
+    """Return (countries, iso_codes, lengths, chunks) for one OWID JSON shard, only the named countries if given."""
+    wanted = None if countries is None else set(countries)
+    names, iso_codes, lengths = [], [], []
+    chunks = {column: [] for column in ENTRY_FIELDS.values()}
+    for country, country_data in iter_countries(file_path):
+        if wanted is not None and country not in wanted:
+            continue
+        entries = country_data.get('data', [])
+        names.append(country)
+        iso_codes.append(country_data.get('iso_code'))
+        lengths.append(len(entries))
+        for column, values in entries_to_columns(entries).items():
+            chunks[column].append(values)
+    return names, iso_codes, lengths, chunks
+
+# Concatenate loaded shards into the extracted schema
+def combine_shards(shards):
+    """Return the extracted DataFrame of load_shard results, in the given order."""
+    names, iso_codes, lengths = [], [], []
+    chunks = {column: [] for column in ENTRY_FIELDS.values()}
+    for shard_names, shard_iso_codes, shard_lengths, shard_chunks in shards:
+        names.extend(shard_names)
+        iso_codes.extend(shard_iso_codes)
+        lengths.extend(shard_lengths)
+        for column, arrays in shard_chunks.items():
+            chunks[column].extend(arrays)
+    return build_extracted_frame(names, iso_codes, lengths, chunks)
+
+# Order shards by their part number rather than lexically
+def shard_paths(pattern=RAW_PATTERN):
+    """Return shard paths matching pattern, sorted by the number in 'part-<n>'."""
+    def part_number(path):
+        match = re.search(r'part-(\d+)', os.path.basename(path))
+        return (int(match.group(1)) if match else -1, path)
+    return sorted(glob.glob(pattern), key=part_number)
+
+# Ingest every shard in parallel worker processes
+def load_owid_json(pattern=RAW_PATTERN, max_workers=None):
+    """Load all OWID JSON shards into the same schema as get_co2_emission_data, without a database."""
+    paths = shard_paths(pattern)
+    if not paths:
+        raise FileNotFoundError(f"No OWID JSON shards match '{pattern}'.")
+
+    if len(paths) == 1 or max_workers == 1:
+        shards = [load_shard(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            shards = list(executor.map(load_shard, paths))
+
+    return combine_shards(shards)
+
+# Which shard holds each country, from one streaming pass over the shards
+def shard_index(pattern=RAW_PATTERN):
+    """Return {country: shard path} for every shard matching pattern, in shard order."""
+    paths = shard_paths(pattern)
+    if not paths:
+        raise FileNotFoundError(f"No OWID JSON shards match '{pattern}'.")
+    return {country: path for path in paths for country, _ in iter_countries(path)}
+
+# Load a batch of countries, parsing only the shards that hold them
+def load_owid_countries(countries, index):
+    """Return the extracted rows of the countries found in index (a shard_index result), in shard order."""
+    wanted = set(countries)
+    paths = dict.fromkeys(path for country, path in index.items() if country in wanted)
+    return combine_shards([load_shard(path, wanted) for path in paths])
+
+# Main function
+def main(pattern=RAW_PATTERN):
+    df = load_owid_json(pattern)
+    print(f"Loaded {len(df)} rows for {df['Country'].nunique()} countries from JSON shards.")
+    print(df.head())
+
+# Run the main function
+if __name__ == "__main__":
+    main()
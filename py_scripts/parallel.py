@@ -0,0 +1,114 @@
+# Import necessary libraries
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+EXECUTORS = ('serial', 'thread', 'process')
+
+# Sort rows by country and locate each country's contiguous slice
+def country_offsets(df, column='Country'):
+    """Return (sorted frame, countries, offsets) where rows offsets[i]:offsets[i + 1] belong to countries[i]."""
+    country = df[column] if df[column].dtype == 'category' else df[column].astype('category')
+    codes = country.cat.codes.to_numpy()
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(country.cat.categories))
+    present = np.flatnonzero(counts)
+    offsets = np.concatenate([[0], np.cumsum(counts[present])])
+    return df.iloc[order], list(country.cat.categories[present]), offsets
+
+# Copy numeric columns into shared memory blocks
+def share_numeric_columns(df):
+    """Return (segments, specs, labels): shared blocks for numeric columns, and the other columns as-is."""
+    segments, specs, labels = [], [], {}
+    columns = {column: df[column] for column in df.columns}
+    if pd.api.types.is_numeric_dtype(df.index.dtype):
+        columns['__index__'] = pd.Series(df.index.to_numpy())
+    for column, series in columns.items():
+        if not pd.api.types.is_numeric_dtype(series.dtype) or isinstance(series.dtype, pd.CategoricalDtype):
+            labels[column] = series
+            continue
+        values = series.to_numpy()
+        segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[:] = values
+        segments.append(segment)
+        specs.append((column, segment.name, values.dtype.str, len(values)))
+    return segments, specs, labels
+
+# Worker entry point: rebuild one country's frame from shared memory and apply func
+def run_shared_partition(func, specs, start, stop, labels, columns, index):
+    """Attach to the shared blocks, build the [start, stop) slice as a DataFrame and return func(slice)."""
+    segments, data = [], {}
+    try:
+        for column, name, dtype, length in specs:
+            segment = shared_memory.SharedMemory(name=name)
+            segments.append(segment)
+            data[column] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=segment.buf)[start:stop].copy()
+        if '__index__' in data:
+            index = data.pop('__index__')
+        data.update(labels)
+        df = pd.DataFrame(data, index=index)[columns]
+    finally:
+        for segment in segments:
+            segment.close()
+    return func(df)
+
+# Map a stage function over country partitions with the chosen executor
+def map_by_country(func, df, executor='serial', max_workers=None):
+    """Apply func to each country's rows and concatenate the results in country order.
+
+    'process' workers read the numeric columns from shared memory instead of receiving pickled
+    slices; func must then be a picklable top-level function (functools.partial is fine).
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {executor!r}; expected one of {EXECUTORS}.")
+    sorted_df, _, offsets = country_offsets(df)
+    bounds = list(zip(offsets[:-1], offsets[1:]))
+
+    if executor == 'serial':
+        results = [func(sorted_df.iloc[start:stop]) for start, stop in bounds]
+    elif executor == 'thread':
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(lambda bound: func(sorted_df.iloc[bound[0]:bound[1]]), bounds))
+    else:
+        segments, specs, labels = share_numeric_columns(sorted_df)
+        shared_index = any(spec[0] == '__index__' for spec in specs)
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+                futures = [pool.submit(run_shared_partition, func, specs, start, stop,
+                                       {column: values.iloc[start:stop].array for column, values in labels.items()},
+                                       list(sorted_df.columns),
+                                       None if shared_index else sorted_df.index[start:stop])
+                           for start, stop in bounds]
+                results = [future.result() for future in futures]
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    if results and all(isinstance(result, (pd.DataFrame, pd.Series)) for result in results):
+        return pd.concat(results)
+    return results
+
+# Map a top-level function over independent tasks with the chosen executor
+def map_tasks(func, tasks, executor='process', max_workers=None):
+    """Return [func(task) for task in tasks], computed serially, in threads or in worker processes."""
+    return list(iter_tasks(func, tasks, executor, max_workers))
+
+# Lazy variant of map_tasks, so callers can act on each result before the rest are done
+def iter_tasks(func, tasks, executor='process', max_workers=None):
+    """Yield func(task) for each task in task order, as soon as that result is available."""
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {executor!r}; expected one of {EXECUTORS}.")
+    tasks = list(tasks)
+    if executor == 'serial':
+        yield from (func(task) for task in tasks)
+        return
+    max_workers = max_workers or os.cpu_count()
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            yield from pool.map(func, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(func, tasks, chunksize=max(1, len(tasks) // (4 * max_workers)))
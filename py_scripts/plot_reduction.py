@@ -0,0 +1,124 @@
+# Import necessary libraries
+import numpy as np
+
+RENDER_MODES = ('auto', 'full', 'density')
+DENSITY_THRESHOLD = 50_000
+DENSITY_BINS = (400, 300)
+MAX_LINE_POINTS = 200
+LEGEND_LIMIT = 20
+
+# Decide between drawing every row and drawing an aggregate
+def use_density(n_rows, mode='auto', threshold=DENSITY_THRESHOLD):
+    """Return True for 'density', False for 'full', and n_rows > threshold for 'auto'."""
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {mode!r}; expected one of {RENDER_MODES}.")
+    return mode == 'density' or (mode == 'auto' and n_rows > threshold)
+
+# Sort rows into one contiguous, x-ordered run per group
+def line_layout(groups, x):
+    """Return (order, offsets, labels): rows order[offsets[i]:offsets[i + 1]] form the line of labels[i]."""
+    if hasattr(groups, 'cat'):
+        labels, codes = np.asarray(groups.cat.categories), groups.cat.codes.to_numpy()
+    else:
+        labels, codes = np.unique(np.asarray(groups), return_inverse=True)
+    order = np.lexsort((x, codes))
+    counts = np.bincount(codes, minlength=len(labels))
+    present = np.flatnonzero(counts)
+    offsets = np.concatenate([[0], np.cumsum(counts[present])])
+    return order, offsets, labels[present]
+
+# Largest-Triangle-Three-Buckets downsampling of many lines at once
+def lttb_indices(x, y, offsets, n_out=MAX_LINE_POINTS):
+    """Return the sorted positions kept when each line x[offsets[i]:offsets[i + 1]] is reduced to n_out points.
+
+    Lines with at most n_out points are kept whole. Longer lines keep their first and last point
+    and, from each of n_out - 2 equal buckets in between, the point forming the largest triangle
+    with the previously kept point and the mean of the next bucket (Steinarsson's LTTB). The
+    Python loop runs over buckets; each step handles every line together.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    starts, lengths = offsets[:-1], np.diff(offsets)
+    long = lengths > max(n_out, 2)
+    keep = [np.arange(start, start + length) for start, length in zip(starts[~long], lengths[~long])]
+    if not long.any() or n_out < 3:
+        kept = keep + [np.r_[starts[long], starts[long] + lengths[long] - 1]]
+        return np.sort(np.concatenate(kept)) if kept else np.empty(0, dtype=np.int64)
+
+    starts, lengths = starts[long], lengths[long]
+    n_buckets = n_out - 2
+    every = (lengths - 2) / n_buckets
+    # Bucket b of a line covers positions [edges[:, b], edges[:, b + 1]) counted from the line start
+    edges = (np.floor(np.outer(every, np.arange(n_buckets + 1))).astype(np.int64) + 1)
+    edges[:, -1] = lengths - 1
+    prefix_x = np.concatenate([[0.0], np.cumsum(x)])
+    prefix_y = np.concatenate([[0.0], np.cumsum(y)])
+
+    selected = np.empty((len(starts), n_out), dtype=np.int64)
+    selected[:, 0] = starts
+    selected[:, -1] = starts + lengths - 1
+    previous = starts.copy()
+    for b in range(n_buckets):
+        # Mean of the next bucket, or the last point for the final bucket
+        if b + 1 < n_buckets:
+            lo, hi = starts + edges[:, b + 1], starts + edges[:, b + 2]
+            size = np.maximum(hi - lo, 1)
+            mean_x = (prefix_x[hi] - prefix_x[lo]) / size
+            mean_y = (prefix_y[hi] - prefix_y[lo]) / size
+        else:
+            mean_x, mean_y = x[selected[:, -1]], y[selected[:, -1]]
+
+        lo, hi = starts + edges[:, b], starts + edges[:, b + 1]
+        sizes = np.maximum(hi - lo, 1)
+        line = np.repeat(np.arange(len(starts)), sizes)
+        positions = np.repeat(lo, sizes) + np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        positions = np.minimum(positions, starts[line] + lengths[line] - 2)
+        px, py = x[previous][line], y[previous][line]
+        area = np.abs((px - mean_x[line]) * (y[positions] - py) - (px - x[positions]) * (mean_y[line] - py))
+        # Largest area per line: sort by (line, -area) and take each line's first entry
+        best = np.lexsort((-area, line))
+        first = np.r_[True, line[best][1:] != line[best][:-1]]
+        previous = positions[best][first]
+        selected[:, b + 1] = previous
+    return np.sort(np.concatenate(keep + [selected.ravel()]))
+
+# 2-D histogram of a scatter, drawn as one image
+def draw_density(ax, x, y, bins=DENSITY_BINS, cmap='viridis'):
+    """Bin (x, y) into a bins grid and draw non-empty cells on a log colour scale; return the image."""
+    from matplotlib.colors import LogNorm
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    counts, x_edges, y_edges = np.histogram2d(x[valid], y[valid], bins=bins)
+    counts[counts == 0] = np.nan
+    image = ax.imshow(counts.T, origin='lower', aspect='auto', interpolation='nearest', cmap=cmap,
+                      extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]), norm=LogNorm())
+    ax.figure.colorbar(image, ax=ax, label='Rows')
+    return image
+
+# Many lines downsampled and drawn as a single artist
+def draw_lines(ax, x, y, groups, max_points=MAX_LINE_POINTS, palette='tab10', legend_limit=LEGEND_LIMIT):
+    """Draw one LTTB-reduced line per group as a LineCollection; label them only up to legend_limit groups."""
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+    import matplotlib.pyplot as plt
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    groups = groups[valid] if hasattr(groups, 'cat') else np.asarray(groups)[valid]
+    x, y = x[valid], y[valid]
+    order, offsets, labels = line_layout(groups, x)
+    x, y = x[order], y[order]
+    kept = lttb_indices(x, y, offsets, max_points)
+    line_of_kept = np.searchsorted(offsets, kept, side='right') - 1
+    splits = np.flatnonzero(np.diff(line_of_kept)) + 1
+    segments = [np.column_stack(part) for part in zip(np.split(x[kept], splits), np.split(y[kept], splits))]
+    cmap = plt.get_cmap(palette)
+    colors = [cmap(i % cmap.N) for i in range(len(segments))]
+    collection = LineCollection(segments, colors=colors, linewidths=1.0)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    if len(labels) <= legend_limit:
+        handles = [Line2D([], [], color=color) for color in colors]
+        ax.legend(handles, [str(label) for label in labels], bbox_to_anchor=(1.05, 1), loc='upper left')
+    return collection
@@ -0,0 +1,76 @@
+# Import necessary libraries
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PROCESSED_PARQUET = "../data/processed/co2_emission_preprocessed.parquet"
+PROCESSED_CSV = "../data/processed/co2_emission_preprocessed.csv"
+
+# Explicit storage dtypes of the processed data; scaled values fit comfortably in float32
+PROCESSED_DTYPES = {
+    'Country': 'category',
+    'Year': np.int16,
+    'Population': np.float32,
+    'CO2': np.float32,
+    'Coal_CO2': np.float32,
+    'Oil_CO2': np.float32,
+    'Gas_CO2': np.float32,
+    'Cement_CO2': np.float32,
+    'Flaring_CO2': np.float32,
+    'Other_Industry_CO2': np.float32,
+    'CO2_per_capita': np.float32
+}
+
+# Cast a processed frame to its storage dtypes
+def to_processed_dtypes(df):
+    """Return df with the PROCESSED_DTYPES applied to the columns it has."""
+    return df.astype({column: dtype for column, dtype in PROCESSED_DTYPES.items() if column in df.columns})
+
+# Save the processed data as typed Parquet
+def save_processed(df, file_path=PROCESSED_PARQUET):
+    """Write the processed frame to Parquet with explicit dtypes."""
+    to_processed_dtypes(df).to_parquet(file_path, index=False)
+    print(f"Processed data saved to '{file_path}'.")
+
+# Append processed batches to the Parquet and CSV outputs
+def write_processed_batches(batches, parquet_path=PROCESSED_PARQUET, csv_path=PROCESSED_CSV):
+    """Stream processed frames into one Parquet file and one CSV file; return the row count."""
+    writer, rows = None, 0
+    try:
+        for df in batches:
+            table = pa.Table.from_pandas(to_processed_dtypes(df), preserve_index=False)
+            if writer is None:
+                # Fix the Country dictionary index width so every batch shares one schema
+                schema = table.schema.set(0, pa.field('Country', pa.dictionary(pa.int32(), pa.string())))
+                writer = pq.ParquetWriter(parquet_path, schema)
+                df.to_csv(csv_path, index=False)
+            else:
+                df.to_csv(csv_path, index=False, header=False, mode='a')
+            writer.write_table(table.cast(writer.schema))
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    print(f"Processed data saved to '{parquet_path}' and '{csv_path}'.")
+    return rows
+
+# Load processed data with column projection and row filters pushed into the reader
+def load_processed(file_path=PROCESSED_PARQUET, columns=None, countries=None, years=None):
+    """Read the processed Parquet file, optionally only some columns, countries and a (start, end) year range."""
+    filters = []
+    if countries is not None:
+        filters.append(('Country', 'in', list(countries)))
+    if years is not None:
+        filters.extend([('Year', '>=', years[0]), ('Year', '<=', years[1])])
+    df = pd.read_parquet(file_path, columns=columns, filters=filters or None)
+    if 'Country' in df.columns and countries is not None:
+        df['Country'] = df['Country'].cat.remove_unused_categories()
+    return df
+
+# Stream the processed Parquet file in record batches
+def iter_processed(file_path=PROCESSED_PARQUET, columns=None, batch_size=100_000):
+    """Yield the processed file as DataFrames of at most batch_size rows, holding one batch in memory."""
+    parquet_file = pq.ParquetFile(file_path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
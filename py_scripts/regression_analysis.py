@@ -8,10 +8,20 @@ from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.preprocessing import PolynomialFeatures
 
+from cross_validation import SCHEMES, cross_validate_regression, summarize_folds
+from processed_data import PROCESSED_PARQUET, load_processed
+from regression_engine import CHUNK_SIZE, SufficientStatsRegression, frame_chunks
+from regression_sweep import polynomial_sweep
+
 # Load dataset function
-def load_data(file_path):
-    """Load the dataset from a specified CSV file."""
-    return pd.read_csv(file_path)
+def load_data(file_path, columns=None, countries=None):
+    """Load the dataset from a processed Parquet file or a CSV file, optionally projected and filtered."""
+    if str(file_path).endswith('.parquet'):
+        return load_processed(file_path, columns=columns, countries=countries)
+    df = pd.read_csv(file_path) if columns is None else pd.read_csv(file_path, usecols=columns)
+    if countries is not None:
+        df = df[df['Country'].isin(countries)]
+    return df
 
 # Calculate correlation matrix
 def calculate_correlation_matrix(df):
@@ -20,24 +30,38 @@ def calculate_correlation_matrix(df):
     print("Correlation Matrix:\n", correlation_matrix)
     return correlation_matrix
 
+# Fit a regression from streamed sufficient statistics with the same split as train_test_split
+def sufficient_stats_regression(df, degree=1, include_bias=False, chunk_size=CHUNK_SIZE):
+    """Return (model, mse, r2) of a SufficientStatsRegression fitted chunk by chunk over df."""
+    model = SufficientStatsRegression(degree=degree, include_bias=include_bias)
+    model.fit_chunks(frame_chunks(df, chunk_size), len(df))
+    mse, r2 = model.score()
+    return model, mse, r2
+
 # Perform multivariate regression analysis
-def multivariate_regression(df):
-    """Perform multivariate linear regression and evaluate the model."""
-    # Prepare features and target
-    X = df[['Population', 'Year']]
-    y = df['CO2_per_capita']
+def multivariate_regression(df, engine='sklearn'):
+    """Perform multivariate linear regression and evaluate the model.
+
+    engine='stats' fits from streamed sufficient statistics instead of sklearn on the full frame.
+    """
+    if engine == 'stats':
+        model, mse, r2 = sufficient_stats_regression(df)
+    else:
+        # Prepare features and target
+        X = df[['Population', 'Year']]
+        y = df['CO2_per_capita']
     
-    # Split the data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        # Split the data
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
-    # Initialize and fit the model
-    model = LinearRegression()
-    model.fit(X_train, y_train)
+        # Initialize and fit the model
+        model = LinearRegression()
+        model.fit(X_train, y_train)
     
-    # Predictions and evaluation
-    y_pred = model.predict(X_test)
-    mse = mean_squared_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
+        # Predictions and evaluation
+        y_pred = model.predict(X_test)
+        mse = mean_squared_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
     
     # Output results
     print("\nMultivariate Linear Regression Results:")
@@ -49,27 +73,33 @@ def multivariate_regression(df):
     return model, mse, r2
 
 # Perform polynomial regression analysis
-def polynomial_regression(df, degree=2):
-    """Perform polynomial regression with a specified degree and evaluate the model."""
-    # Prepare features and target
-    X = df[['Population', 'Year']]
-    y = df['CO2_per_capita']
+def polynomial_regression(df, degree=2, engine='sklearn'):
+    """Perform polynomial regression with a specified degree and evaluate the model.
+
+    engine='stats' generates the polynomial terms per chunk instead of materializing the expanded matrix.
+    """
+    if engine == 'stats':
+        model_poly, mse_poly, r2_poly = sufficient_stats_regression(df, degree=degree, include_bias=True)
+    else:
+        # Prepare features and target
+        X = df[['Population', 'Year']]
+        y = df['CO2_per_capita']
     
-    # Transform features to polynomial features
-    poly = PolynomialFeatures(degree=degree)
-    X_poly = poly.fit_transform(X)
+        # Transform features to polynomial features
+        poly = PolynomialFeatures(degree=degree)
+        X_poly = poly.fit_transform(X)
     
-    # Split the data
-    X_train_poly, X_test_poly, y_train, y_test = train_test_split(X_poly, y, test_size=0.2, random_state=42)
+        # Split the data
+        X_train_poly, X_test_poly, y_train, y_test = train_test_split(X_poly, y, test_size=0.2, random_state=42)
     
-    # Initialize and fit the polynomial regression model
-    model_poly = LinearRegression()
-    model_poly.fit(X_train_poly, y_train)
+        # Initialize and fit the polynomial regression model
+        model_poly = LinearRegression()
+        model_poly.fit(X_train_poly, y_train)
     
-    # Predictions and evaluation
-    y_pred_poly = model_poly.predict(X_test_poly)
-    mse_poly = mean_squared_error(y_test, y_pred_poly)
-    r2_poly = r2_score(y_test, y_pred_poly)
+        # Predictions and evaluation
+        y_pred_poly = model_poly.predict(X_test_poly)
+        mse_poly = mean_squared_error(y_test, y_pred_poly)
+        r2_poly = r2_score(y_test, y_pred_poly)
     
     # Output results
     print(f"\nPolynomial Regression Results (Degree {degree}):")
@@ -78,6 +108,27 @@ def polynomial_regression(df, degree=2):
     
     return model_poly, mse_poly, r2_poly
 
+# Cross-validate the multivariate model without leaking a country's adjacent years
+def evaluate_regression_cv(df, schemes=SCHEMES, **kwargs):
+    """Print and return per-fold metrics of the multivariate model for each CV scheme."""
+    results = {}
+    for scheme in schemes:
+        folds = cross_validate_regression(df, scheme=scheme, **kwargs)
+        print(f"\nMultivariate Linear Regression, {scheme} cross-validation:")
+        print(summarize_folds(folds))
+        results[scheme] = folds
+    return results
+
+# Sweep degrees, feature sets and ridge alphas with shared k-fold CV
+def run_polynomial_sweep(df, **kwargs):
+    """Run polynomial_sweep, print the best combinations and the stage timings, and return the results."""
+    results, timings = polynomial_sweep(df, **kwargs)
+    print("\nPolynomial Sweep Results (best 10 by cross-validated MSE):")
+    print(results.head(10).to_string(index=False))
+    print("\nSweep timing (seconds):")
+    print(timings.to_string())
+    return results, timings
+
 # Main function
 def main(file_path):
     # Load and analyze data
@@ -86,11 +137,15 @@ def main(file_path):
     
     # Perform multivariate regression
     multivariate_model, multivariate_mse, multivariate_r2 = multivariate_regression(df)
+    evaluate_regression_cv(df)
     
     # Perform polynomial regression
     polynomial_model, poly_mse, poly_r2 = polynomial_regression(df, degree=2)
 
+    # Compare degrees 1-6 over Population/Year and the per-source columns
+    run_polynomial_sweep(df)
+
 # Run the main function
 if __name__ == "__main__":
-    # Updated path to the CSV file
-    main('../data/processed/co2_emission_preprocessed.csv')  # Replace with the correct relative path
+    # Typed Parquet output of data_preprocessing.py
+    main(PROCESSED_PARQUET)
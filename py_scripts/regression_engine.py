@@ -0,0 +1,147 @@
+# Import necessary libraries
+from itertools import combinations_with_replacement
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+FEATURES = ('Population', 'Year')
+TARGET = 'CO2_per_capita'
+CHUNK_SIZE = 100_000
+
+# Same train/test membership as train_test_split on a frame of n rows
+def split_mask(n_rows, test_size=0.2, random_state=42):
+    """Return a boolean array marking the rows train_test_split(..., random_state) puts in the test set."""
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[train_test_split(np.arange(n_rows), test_size=test_size, random_state=random_state)[1]] = True
+    return mask
+
+# Polynomial terms of one chunk, in PolynomialFeatures column order
+def polynomial_terms(X, degree=1, include_bias=False):
+    """Return the polynomial expansion of X up to degree without building it for the whole dataset."""
+    columns = [np.ones(len(X))] if include_bias else []
+    for d in range(1, degree + 1):
+        for combination in combinations_with_replacement(range(X.shape[1]), d):
+            columns.append(np.prod(X[:, combination], axis=1))
+    return np.column_stack(columns) if columns else np.empty((len(X), 0))
+
+# Split a frame into row chunks
+def frame_chunks(df, chunk_size=CHUNK_SIZE):
+    """Yield consecutive row slices of df."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+# Running means and centred co-moments, merged chunk by chunk
+class MomentAccumulator:
+    """Count, means and centred cross-products of features and target, updated without storing rows."""
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean_x = np.zeros(n_features)
+        self.mean_y = 0.0
+        self.xx = np.zeros((n_features, n_features))
+        self.xy = np.zeros(n_features)
+        self.yy = 0.0
+
+    # Merge one chunk with the pairwise update, which stays accurate for large offsets like Year**2
+    def update(self, X, y):
+        """Add the rows of X (n x p) and y (n) to the statistics."""
+        if len(y) == 0:
+            return
+        chunk = MomentAccumulator(X.shape[1])
+        chunk.n, chunk.mean_x, chunk.mean_y = len(y), X.mean(axis=0), y.mean()
+        centred_x, centred_y = X - chunk.mean_x, y - chunk.mean_y
+        chunk.xx, chunk.xy, chunk.yy = centred_x.T @ centred_x, centred_x.T @ centred_y, centred_y @ centred_y
+        self.merge(chunk)
+
+    # Combine with the statistics of a disjoint set of rows
+    def merge(self, other):
+        """Add another accumulator's rows to this one and return self."""
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta_x, delta_y = other.mean_x - self.mean_x, other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+        self.xx += other.xx + weight * np.outer(delta_x, delta_x)
+        self.xy += other.xy + weight * delta_x * delta_y
+        self.yy += other.yy + weight * delta_y * delta_y
+        self.mean_x += delta_x * other.n / n
+        self.mean_y += delta_y * other.n / n
+        self.n = n
+        return self
+
+    # Sum of squared residuals of a linear model over the accumulated rows
+    def residual_sum_of_squares(self, coef, intercept):
+        """Return sum((y - intercept - X @ coef)**2) from the statistics alone.
+
+        A shorter coef uses only the first len(coef) columns, e.g. the lower-degree terms.
+        """
+        k = len(coef)
+        offset = self.mean_y - intercept - self.mean_x[:k] @ coef
+        return self.yy - 2 * coef @ self.xy[:k] + coef @ self.xx[:k, :k] @ coef + self.n * offset ** 2
+
+# Linear / polynomial least squares from sufficient statistics
+class SufficientStatsRegression:
+    """LinearRegression-equivalent model fitted from streamed X^T X and X^T y.
+
+    Rows are routed to train or test statistics by a split mask, so MSE and R^2 are computed
+    without keeping test rows. Coefficients follow PolynomialFeatures' column order; with
+    include_bias the constant column gets coefficient 0, as with LinearRegression.
+    """
+
+    def __init__(self, features=FEATURES, target=TARGET, degree=1, include_bias=False):
+        self.features = list(features)
+        self.target = target
+        self.degree = degree
+        self.include_bias = include_bias
+        n_terms = polynomial_terms(np.zeros((1, len(self.features))), degree, self.include_bias).shape[1]
+        self.train = MomentAccumulator(n_terms)
+        self.test = MomentAccumulator(n_terms)
+        self.coef_, self.intercept_ = None, None
+
+    # Expand one chunk into model terms
+    def terms(self, df):
+        """Return (terms, target) arrays for a chunk."""
+        X = polynomial_terms(df[self.features].to_numpy(dtype=np.float64), self.degree, self.include_bias)
+        return X, df[self.target].to_numpy(dtype=np.float64)
+
+    # Add rows; no refit over earlier rows is needed
+    def partial_fit(self, df, test_mask=None):
+        """Accumulate a chunk (rows where test_mask is True go to the test statistics) and re-solve."""
+        X, y = self.terms(df)
+        test_mask = np.zeros(len(y), dtype=bool) if test_mask is None else np.asarray(test_mask)
+        self.train.update(X[~test_mask], y[~test_mask])
+        self.test.update(X[test_mask], y[test_mask])
+        self.solve()
+        return self
+
+    # Fit a sequence of chunks with the train_test_split membership of the whole dataset
+    def fit_chunks(self, chunks, n_rows, test_size=0.2, random_state=42):
+        """Accumulate every chunk, routing rows with split_mask(n_rows, test_size, random_state)."""
+        mask, offset = split_mask(n_rows, test_size, random_state), 0
+        for chunk in chunks:
+            self.partial_fit(chunk, mask[offset:offset + len(chunk)])
+            offset += len(chunk)
+        return self
+
+    # Solve the centred normal equations
+    def solve(self):
+        """Compute coef_ and intercept_ from the train statistics (minimum-norm for rank-deficient terms)."""
+        if self.train.n == 0:
+            return
+        # Scale to unit column norms first; the centred bias column has zero norm and gets coefficient 0
+        norms = np.sqrt(np.diag(self.train.xx))
+        scale = np.where(norms > 0, norms, 1.0)
+        scaled = self.train.xx / np.outer(scale, scale)
+        coef = np.linalg.lstsq(scaled, self.train.xy / scale, rcond=None)[0] / scale
+        self.coef_ = np.where(norms > 0, coef, 0.0)
+        self.intercept_ = self.train.mean_y - self.train.mean_x @ self.coef_
+
+    # Predict for new rows
+    def predict(self, df):
+        """Return predictions for the rows of df."""
+        return self.terms(df)[0] @ self.coef_ + self.intercept_
+
+    # Test-set metrics from the accumulated test statistics
+    def score(self):
+        """Return (mse, r2) on the test rows, matching mean_squared_error and r2_score."""
+        residual = self.test.residual_sum_of_squares(self.coef_, self.intercept_)
+        return residual / self.test.n, 1.0 - residual / self.test.yy
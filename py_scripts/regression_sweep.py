@@ -0,0 +1,147 @@
+# Import necessary libraries
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold
+
+from parallel import map_tasks
+from regression_engine import TARGET, MomentAccumulator
+
+SOURCE_COLUMNS = ['Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2', 'Flaring_CO2', 'Other_Industry_CO2']
+FEATURE_SETS = {
+    'population_year': ['Population', 'Year'],
+    'sources': SOURCE_COLUMNS,
+    'population_year_sources': ['Population', 'Year'] + SOURCE_COLUMNS,
+}
+DEGREES = range(1, 7)
+ALPHAS = (0.0, 0.01, 0.1, 1.0)
+N_SPLITS = 5
+STAGES = ('expand', 'accumulate', 'solve')
+
+# Polynomial terms degree by degree, each degree built from the previous one
+def degree_blocks(X, max_degree):
+    """Return one block of monomials per degree (PolynomialFeatures order, no bias).
+
+    Degree d columns are degree d - 1 columns times one more feature, so lower-degree
+    products are computed once and reused.
+    """
+    n_features = X.shape[1]
+    blocks, last_index = [X], [np.arange(n_features)]
+    for _ in range(2, max_degree + 1):
+        columns, indices = [], []
+        for j, last in enumerate(last_index[-1]):
+            for i in range(last, n_features):
+                columns.append(blocks[-1][:, j] * X[:, i])
+                indices.append(i)
+        blocks.append(np.column_stack(columns))
+        last_index.append(np.array(indices))
+    return blocks
+
+# Ridge paths (alpha = 0: minimum-norm least squares) on standardized terms from centred co-moments
+def solve_ridge_path(stats, n_terms, alphas):
+    """Yield (alpha, coef, intercept) for the first n_terms columns, terms standardized as by StandardScaler.
+
+    One eigendecomposition of the standardized Gram matrix serves every alpha.
+    """
+    xx, xy = stats.xx[:n_terms, :n_terms], stats.xy[:n_terms]
+    std = np.sqrt(np.diag(xx) / stats.n)
+    keep = std > 0
+    scaled = xx[np.ix_(keep, keep)] / np.outer(std[keep], std[keep])
+    eigenvalues, eigenvectors = np.linalg.eigh(scaled)
+    projected = eigenvectors.T @ (xy[keep] / std[keep])
+    # Directions with negligible eigenvalues are dropped, as lstsq does for tiny singular values
+    cutoff = max(eigenvalues.max(initial=0.0), 0.0) * len(eigenvalues) * np.finfo(float).eps
+    for alpha in alphas:
+        shifted = eigenvalues + alpha
+        inverse = np.divide(1.0, shifted, out=np.zeros_like(shifted), where=eigenvalues > cutoff)
+        coef = np.zeros(n_terms)
+        coef[keep] = eigenvectors @ (inverse * projected) / std[keep]
+        yield alpha, coef, stats.mean_y - stats.mean_x[:n_terms] @ coef
+
+# Evaluate every degree and alpha of one feature set on every fold; top-level for process workers
+def evaluate_feature_set(task):
+    """Return (result rows, {stage: seconds}) for one feature set over all its validation folds.
+
+    The terms are expanded once; each fold is a row mask over them. Co-moments are accumulated
+    once per fold, and a fold's training statistics merge those of the other folds.
+    """
+    timings = dict.fromkeys(STAGES, 0.0)
+    start = time.perf_counter()
+    blocks = degree_blocks(task['X'], max(task['degrees']))
+    widths = np.cumsum([block.shape[1] for block in blocks])
+    design = np.hstack(blocks)
+    timings['expand'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    folds = []
+    for fold in range(task['n_splits']):
+        stats = MomentAccumulator(design.shape[1])
+        validation = task['fold_ids'] == fold
+        stats.update(design[validation], task['y'][validation])
+        folds.append(stats)
+    timings['accumulate'] = time.perf_counter() - start
+
+    rows = []
+    for fold, held_out in enumerate(folds):
+        start = time.perf_counter()
+        train = MomentAccumulator(design.shape[1])
+        for other in folds[:fold] + folds[fold + 1:]:
+            train.merge(other)
+        timings['accumulate'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for degree in task['degrees']:
+            n_terms = widths[degree - 1]
+            for alpha, coef, intercept in solve_ridge_path(train, n_terms, task['alphas']):
+                residual = held_out.residual_sum_of_squares(coef, intercept)
+                rows.append({'Features': task['name'], 'Degree': degree, 'Alpha': alpha, 'Terms': int(n_terms),
+                             'Fold': fold, 'MSE': residual / held_out.n, 'R2': 1.0 - residual / held_out.yy})
+        timings['solve'] += time.perf_counter() - start
+    return rows, timings
+
+# Standardize the base features once so high-degree products stay well conditioned
+def standardized_features(df, columns):
+    """Return df[columns] as a float array with zero mean and unit variance per column.
+
+    Polynomials of affine-transformed features span the same space, so least-squares fits are unchanged.
+    """
+    X = df[columns].to_numpy(dtype=np.float64)
+    std = X.std(axis=0)
+    return (X - X.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+# Run the full (feature set, degree, alpha) sweep with k-fold cross-validation
+def polynomial_sweep(df, feature_sets=None, degrees=DEGREES, alphas=ALPHAS, target=TARGET, n_splits=N_SPLITS,
+                     random_state=42, executor='process', max_workers=None):
+    """Return (ranked results, stage timings) for every feature set, degree and alpha.
+
+    One KFold split is shared by every combination. Each feature set task expands the terms once
+    up to the highest degree and accumulates co-moments once per fold; every fold, degree and
+    alpha is then a small solve on a leading block of those statistics.
+    """
+    feature_sets = FEATURE_SETS if feature_sets is None else feature_sets
+    wall_start = time.perf_counter()
+
+    start = time.perf_counter()
+    fold_ids = np.empty(len(df), dtype=np.int64)
+    for fold, (_, validation) in enumerate(KFold(n_splits, shuffle=True, random_state=random_state).split(df)):
+        fold_ids[validation] = fold
+    y = df[target].to_numpy(dtype=np.float64)
+    tasks = [{'name': name, 'X': standardized_features(df, columns), 'y': y, 'fold_ids': fold_ids,
+              'n_splits': n_splits, 'degrees': list(degrees), 'alphas': list(alphas)}
+             for name, columns in feature_sets.items()]
+    split_time = time.perf_counter() - start
+
+    outputs = map_tasks(evaluate_feature_set, tasks, executor, max_workers)
+
+    folds = pd.DataFrame([row for rows, _ in outputs for row in rows])
+    results = (folds.groupby(['Features', 'Degree', 'Alpha', 'Terms'], sort=False)
+               .agg(MSE=('MSE', 'mean'), MSE_std=('MSE', 'std'), R2=('R2', 'mean'))
+               .reset_index()
+               .sort_values(['MSE', 'Terms'], kind='stable', ignore_index=True))
+    results.insert(0, 'Rank', np.arange(1, len(results) + 1))
+
+    # Stage times are summed over tasks (CPU time across workers); 'total' is wall time
+    timings = {'split': split_time}
+    timings.update({stage: sum(task_timings[stage] for _, task_timings in outputs) for stage in STAGES})
+    timings['total'] = time.perf_counter() - wall_start
+    return results, pd.Series(timings, name='seconds')
@@ -0,0 +1,167 @@
+# Import necessary libraries
+import numpy as np
+import pandas as pd
+
+WINDOWS = (5, 10, 20)
+STATISTICS = ('mean', 'std', 'min', 'max', 'ewma', 'growth')
+
+# Sort rows into contiguous groups and describe each row's place in its group
+def group_layout(df, group='Country', order='Year'):
+    """Return (order, group ids, position within group) for rows sorted by group then order column."""
+    labels = df[group] if df[group].dtype == 'category' else df[group].astype('category')
+    codes = labels.cat.codes.to_numpy()
+    sort = np.lexsort((df[order].to_numpy(), codes))
+    codes = codes[sort]
+    starts = np.r_[0, np.flatnonzero(np.diff(codes)) + 1]
+    lengths = np.diff(np.r_[starts, len(codes)])
+    positions = np.arange(len(codes)) - np.repeat(starts, lengths)
+    group_ids = np.repeat(np.arange(len(starts)), lengths)
+    return sort, group_ids, positions
+
+# Values lagged by j rows within their group
+def lagged(values, positions, j):
+    """Return values shifted down by j rows, with NaN where the lag crosses a group start."""
+    shifted = np.full_like(values, np.nan)
+    if j < len(values):
+        shifted[j:] = values[:len(values) - j]
+    shifted[positions < j] = np.nan
+    return shifted
+
+# Prefix sums with a leading zero row, reused by every window
+def prefix_sums(values):
+    """Return cumulative sums along rows with a zero row prepended (column-major for fast axis-0 scans)."""
+    cumulative = np.zeros((len(values) + 1, values.shape[1]), order='F')
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    return cumulative
+
+# Windowed sums from prefix sums
+def window_sums(cumulative, positions, window):
+    """Return the sum of each row's trailing window (bounded by its group start)."""
+    sums = cumulative[1:].copy()
+    sums[window:] -= cumulative[1:len(cumulative) - window]
+    # Rows closer than a window to their group start sum back to the start instead
+    short = np.flatnonzero(positions < window - 1)
+    sums[short] = cumulative[short + 1] - cumulative[short - positions[short]]
+    return sums
+
+# Prefix sums of counts, centred values and squares
+def moment_sums(values, squares=True):
+    """Return (centre, prefix counts, prefix sums, prefix squares or None) of the non-NaN values per column."""
+    valid = ~np.isnan(values)
+    # Centre each column first so the sums of squares do not lose precision
+    centre = np.nanmean(values, axis=0) if valid.any() else np.zeros(values.shape[1])
+    centred = np.where(valid, values - np.nan_to_num(centre), 0.0)
+    return centre, prefix_sums(valid), prefix_sums(centred), prefix_sums(centred * centred) if squares else None
+
+# Rolling mean and sample standard deviation from prefix sums
+def rolling_moments(sums, positions, window, min_periods=1):
+    """Return (mean, std) over each row's trailing window, ignoring NaNs like pandas.rolling.
+
+    std is None when the prefix sums were built without squares.
+    """
+    centre, count, total = sums[0], window_sums(sums[1], positions, window), window_sums(sums[2], positions, window)
+    enough = count >= max(min_periods, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        std = None
+        if sums[3] is not None:
+            variance = np.maximum((window_sums(sums[3], positions, window) - total * mean) / (count - 1), 0.0)
+            std = np.where(enough & (count >= 2), np.sqrt(variance), np.nan)
+    return np.where(enough, mean + centre, np.nan), std
+
+# Trailing minima/maxima over power-of-two spans, built by doubling
+def doubling_extremes(values, positions, reduce, max_window):
+    """Return {span: array} of trailing reduce() over 1, 2, 4, ... rows up to max_window."""
+    extremes, span = {1: values}, 1
+    while span * 2 <= max_window:
+        extremes[span * 2] = reduce(extremes[span], lagged(extremes[span], positions, span))
+        span *= 2
+    return extremes
+
+# Rolling min or max from two overlapping power-of-two spans
+def rolling_extreme(extremes, counts, positions, window, reduce, min_periods=1):
+    """Return the trailing-window minimum (np.fmin) or maximum (np.fmax) of each row.
+
+    With span the largest power of two <= window, the window is the union of the span ending at
+    the row and the span ending window - span rows earlier. When that lag crosses the group start
+    the row is fewer than span rows in, so the first span already covers the whole prefix.
+    """
+    span = 1 << (window.bit_length() - 1)
+    result = extremes[span]
+    if window > span:
+        result = reduce(result, lagged(result, positions, window - span))
+    if min_periods > 1:
+        result = np.where(window_sums(counts, positions, window) >= min_periods, result, np.nan)
+    return result
+
+# Exponentially weighted mean, stepping through positions for all groups at once
+def grouped_ewma(values, group_ids, positions, span):
+    """Return pandas-compatible ewm(span=span, adjust=True).mean() within each group."""
+    decay = 1.0 - 2.0 / (span + 1.0)
+    n_groups = group_ids.max() + 1 if len(group_ids) else 0
+    numerator = np.zeros((n_groups, values.shape[1]))
+    denominator = np.zeros((n_groups, values.shape[1]))
+    result = np.full_like(values, np.nan)
+    rows_by_position = np.argsort(positions, kind='stable')
+    bounds = np.r_[0, np.cumsum(np.bincount(positions))]
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        rows = rows_by_position[start:stop]
+        groups = group_ids[rows]
+        x = values[rows]
+        valid = ~np.isnan(x)
+        numerator[groups] = numerator[groups] * decay + np.where(valid, x, 0.0)
+        denominator[groups] = denominator[groups] * decay + valid
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[rows] = numerator[groups] / denominator[groups]
+    return result
+
+# Compute many rolling statistics for many columns over all groups in one pass
+def grouped_rolling(df, columns, windows=WINDOWS, statistics=STATISTICS, group='Country', order='Year',
+                    min_periods=1):
+    """Return a frame (aligned to df's index) with '<column>_<stat>_<window>' and '<column>_growth' columns.
+
+    Rows are sorted once into contiguous groups; means and standard deviations come from prefix
+    sums, min/max from power-of-two spans built by doubling, and the EWMA (span = window) from a
+    recurrence vectorized across groups.
+    """
+    sort, group_ids, positions = group_layout(df, group, order)
+    values = np.asfortranarray(df[columns].to_numpy(dtype=np.float64)[sort])
+    sums = moment_sums(values, squares='std' in statistics)
+    extremes = {stat: doubling_extremes(values, positions, reduce, max(windows, default=1))
+                for stat, reduce in (('min', np.fmin), ('max', np.fmax)) if stat in statistics}
+
+    window_stats = [stat for stat in STATISTICS if stat in statistics and stat != 'growth']
+    n_blocks = len(windows) * len(window_stats) + ('growth' in statistics)
+    out = np.empty((len(df), n_blocks * len(columns)), order='F')
+    names = []
+
+    # Write each block straight to its unsorted rows so no large intermediate is concatenated
+    def add(stat, block, suffix):
+        start = len(names)
+        out[sort, start:start + len(columns)] = block
+        names.extend(f'{column}_{stat}{suffix}' for column in columns)
+
+    for window in windows:
+        if 'mean' in statistics or 'std' in statistics:
+            mean, std = rolling_moments(sums, positions, window, min_periods)
+        for stat in window_stats:
+            if stat == 'mean':
+                add(stat, mean, f'_{window}')
+            elif stat == 'std':
+                add(stat, std, f'_{window}')
+            elif stat == 'ewma':
+                add(stat, grouped_ewma(values, group_ids, positions, window), f'_{window}')
+            else:
+                reduce = np.fmin if stat == 'min' else np.fmax
+                add(stat, rolling_extreme(extremes[stat], sums[1], positions, window, reduce, min_periods),
+                    f'_{window}')
+    if 'growth' in statistics:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            add('growth', values / lagged(values, positions, 1) - 1.0, '')
+    return pd.DataFrame(out, index=df.index, columns=names)
+
+# Single rolling mean column, the common case used by time_series_analysis
+def rolling_mean(df, column, window, group='Country', order='Year', min_periods=1):
+    """Return the per-group trailing rolling mean of one column, aligned to df's index."""
+    return grouped_rolling(df, [column], windows=(window,), statistics=('mean',), group=group, order=order,
+                           min_periods=min_periods)[f'{column}_mean_{window}']
@@ -0,0 +1,224 @@
+# Import necessary libraries
+import glob
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+from pyspark.sql import SparkSession, Window
+from pyspark.sql import functions as F
+from pyspark.sql.types import DoubleType, LongType
+
+from country_summary import SUMMARY_PATH, batch_summary, combine_batch_summaries
+from data_preprocessing import (COUNTRIES_LIST, ENTRY_FIELDS, IMPUTATION_STRATEGIES, MIN_YEAR, TRANSFORM_PATH,
+                                build_projection, connect_to_mongodb, list_countries)
+from emissions_cube import CUBE_METRICS, CUBE_PATH, combine_cells
+from feature_transform import GROUP_STRATEGIES, FeatureTransform
+from owid_json_loader import RAW_PATTERN
+from processed_data import PROCESSED_CSV, PROCESSED_PARQUET, to_processed_dtypes, write_processed_batches
+
+# Scratch space for documents staged for Spark and for Spark's own part files
+SPARK_STAGING = "../data/interim/spark_staging"
+
+# Schema of one country-keyed document: {country: {iso_code, data: [{year, ...}]}}
+ENTRY_SCHEMA = ', '.join(f'{field}: {"bigint" if field == "year" else "double"}' for field in ENTRY_FIELDS)
+DOCUMENT_SCHEMA = f'map<string, struct<iso_code: string, data: array<struct<{ENTRY_SCHEMA}>>>>'
+
+# Local Spark session, no cluster needed
+def get_spark(master="local[*]", app_name="co2-emission-preprocessing"):
+    """Return (or create) a local SparkSession."""
+    return SparkSession.builder.master(master).appName(app_name).getOrCreate()
+
+# Explode a column of JSON documents into the extracted schema
+def explode_documents(documents):
+    """Turn a Spark frame with a JSON 'value' column per document into one row per country-year."""
+    countries = (documents
+                 .select(F.explode(F.from_json('value', DOCUMENT_SCHEMA)).alias('Country', 'document'))
+                 .where(F.col('Country') != '_id'))
+    entries = countries.select('Country', F.col('document.iso_code').alias('ISO_Code'),
+                               F.explode('document.data').alias('entry'))
+    return entries.select('Country', 'ISO_Code', *[
+        F.col(f'entry.{field}').cast(LongType() if field == 'year' else DoubleType()).alias(column)
+        for field, column in ENTRY_FIELDS.items()])
+
+# Stream the projected documents to JSON-lines files, so the driver holds one document at a time
+def stage_documents(collection, countries, staging_dir=SPARK_STAGING, batch_size=100, docs_per_file=1000):
+    """Write one JSON document per line into part files under staging_dir/documents; return their paths."""
+    documents_dir = os.path.join(staging_dir, 'documents')
+    shutil.rmtree(documents_dir, ignore_errors=True)
+    os.makedirs(documents_dir)
+    cursor = collection.find({}, build_projection(countries), batch_size=batch_size)
+    paths, f = [], None
+    try:
+        for i, doc in enumerate(cursor):
+            if i % docs_per_file == 0:
+                if f is not None:
+                    f.close()
+                paths.append(os.path.join(documents_dir, f'part-{len(paths):05d}.jsonl'))
+                f = open(paths[-1], 'w')
+            f.write(json.dumps(doc, default=str) + '\n')
+    finally:
+        if f is not None:
+            f.close()
+    return paths
+
+# Read nested documents from MongoDB with the same projection as the pandas extractor
+def spark_read_mongodb(spark, collection, countries=None, staging_dir=SPARK_STAGING):
+    """Return the extracted Spark frame for the collection's (optionally selected) countries.
+
+    The cursor is streamed to staged JSON-lines files that Spark reads itself, instead of
+    collecting the documents on the driver.
+    """
+    countries = list_countries(collection) if countries is None else countries
+    paths = stage_documents(collection, countries, staging_dir)
+    if not paths:
+        return explode_documents(spark.createDataFrame([], 'value string'))
+    return explode_documents(spark.read.text(paths))
+
+# Read raw OWID JSON shards without MongoDB
+def spark_read_json(spark, pattern):
+    """Return the extracted Spark frame for every OWID JSON shard matching pattern."""
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No OWID JSON shards match '{pattern}'.")
+    return explode_documents(spark.read.text(paths, wholetext=True))
+
+# Per-country forward fill or linear interpolation on Year
+def fill_within_country_expr(column, strategy):
+    """Return an expression filling column from the previous (and for 'interpolate', next) observation."""
+    before = Window.partitionBy('Country').orderBy('Year').rowsBetween(Window.unboundedPreceding, 0)
+    after = Window.partitionBy('Country').orderBy('Year').rowsBetween(0, Window.unboundedFollowing)
+    observed_year = F.when(F.col(column).isNotNull(), F.col('Year'))
+    prev_value = F.last(column, ignorenulls=True).over(before)
+    if strategy == 'ffill':
+        return F.coalesce(F.col(column), prev_value)
+
+    prev_year = F.last(observed_year, ignorenulls=True).over(before)
+    next_value = F.first(column, ignorenulls=True).over(after)
+    next_year = F.first(observed_year, ignorenulls=True).over(after)
+    span = next_year - prev_year
+    weight = F.when(span > 0, (F.col('Year') - prev_year) / span).otherwise(F.lit(0.0))
+    interpolated = F.when(next_value.isNotNull(), prev_value + (next_value - prev_value) * weight)
+    return F.coalesce(F.col(column), interpolated, prev_value)
+
+# Spark counterpart of data_preprocessing.preprocess_frame
+def spark_preprocess(sdf, strategies=None, countries=None, min_year=MIN_YEAR):
+    """Filter, de-duplicate, impute, derive per-capita values and min-max scale with DataFrame ops.
+
+    Returns (scaled Spark frame, FeatureTransform) so the fitted constants can be reused by pandas.
+    """
+    strategies = {**IMPUTATION_STRATEGIES, **(strategies or {})}
+    countries = COUNTRIES_LIST if countries is None else countries
+    columns = list(strategies)
+
+    kept = (sdf.where(F.col('Country').isin(list(countries)) & (F.col('Year') > min_year))
+            .select('Country', 'Year', *columns)
+            .dropDuplicates())
+    kept = kept.select('Country', 'Year', *[
+        fill_within_country_expr(column, strategies[column]).alias(column)
+        if strategies[column] in GROUP_STRATEGIES else F.col(column)
+        for column in columns])
+
+    # Means come from the kept rows, after the per-country fills
+    means = kept.agg(*[F.avg(column).alias(column) for column in columns]).first().asDict()
+    fill_values = {column: 0.0 if strategies[column] == 'zero' else means[column] for column in columns}
+    imputed = kept.fillna(fill_values).withColumn('CO2_per_capita', F.col('CO2') / F.col('Population'))
+
+    scaled_columns = columns + ['CO2_per_capita']
+    bounds = imputed.agg(*[F.min(column).alias(f'min_{column}') for column in scaled_columns],
+                         *[F.max(column).alias(f'max_{column}') for column in scaled_columns]).first()
+    transform = FeatureTransform(strategies, countries, min_year, fill_values=fill_values,
+                                 data_min={column: bounds[f'min_{column}'] for column in scaled_columns},
+                                 data_max={column: bounds[f'max_{column}'] for column in scaled_columns})
+
+    scaled = []
+    for column in scaled_columns:
+        scale, offset = transform.scale_params(column)
+        scaled.append((F.col(column) * scale + offset).alias(column))
+    return imputed.select('Country', 'Year', *scaled), transform
+
+# Spark counterpart of emissions_cube.finest_cells
+def spark_cube_cells(sdf, metrics=None):
+    """Return the finest cube cells of an extracted Spark frame, aggregated by Spark and collected as pandas.
+
+    The cells, and so their cube_key, are those finest_cells builds from the same rows in pandas.
+    """
+    sdf = sdf.where(F.col('Year').isNotNull())
+    if 'CO2_per_capita' not in sdf.columns and {'CO2', 'Population'} <= set(sdf.columns):
+        sdf = sdf.withColumn('CO2_per_capita', F.col('CO2') / F.col('Population'))
+    metrics = [metric for metric in CUBE_METRICS if metric in sdf.columns] if metrics is None else list(metrics)
+    aggregates = []
+    for metric in metrics:
+        # NaN counts as missing, like null, as it does in pandas
+        value = F.when(~F.isnan(metric), F.col(metric))
+        aggregates += [F.coalesce(F.sum(value), F.lit(0.0)).alias(f'{metric}_sum'),
+                       F.count(value).alias(f'{metric}_count')]
+    cells = sdf.groupBy('Country', 'Year').agg(*aggregates).toPandas()
+    return cells.astype({'Year': np.int64, **{f'{metric}_count': np.int64 for metric in metrics}})
+
+# Regroup frames sorted by Country so that every frame holds all rows of its countries
+def whole_country_batches(frames):
+    """Yield non-empty frames cut at country boundaries; only the last country of a frame is carried over."""
+    carry = None
+    for df in frames:
+        if carry is not None:
+            df = pd.concat([carry, df], ignore_index=True)
+        if df.empty:
+            continue
+        countries = df['Country'].to_numpy()
+        start = int(np.argmax(countries == countries[-1]))
+        carry = df.iloc[start:].reset_index(drop=True)
+        if start:
+            yield df.iloc[:start].reset_index(drop=True)
+    if carry is not None and len(carry):
+        yield carry
+
+# Write the Spark output in the processed Parquet/CSV format of the pandas pipeline
+def save_spark_output(sdf, parquet_path=PROCESSED_PARQUET, csv_path=PROCESSED_CSV, staging_dir=SPARK_STAGING,
+                      on_batch=None):
+    """Write the processed Spark frame to the files read by processed_data.load_processed.
+
+    Spark writes (Country, Year)-sorted part files to staging_dir; they are streamed back one
+    record batch at a time and appended with write_processed_batches, so the output has the
+    processed dtypes. on_batch, when given, is called with each whole-country batch.
+    """
+    parts_dir = os.path.join(staging_dir, 'processed')
+    sdf.orderBy('Country', 'Year').write.mode('overwrite').parquet(parts_dir)
+    paths = sorted(glob.glob(os.path.join(parts_dir, '*.parquet')))
+
+    def batches():
+        frames = (batch.to_pandas() for batch in ds.dataset(paths, format='parquet').to_batches())
+        for df in whole_country_batches(frames):
+            df = to_processed_dtypes(df)
+            if on_batch is not None:
+                on_batch(df)
+            yield df
+    write_processed_batches(batches(), parquet_path=parquet_path, csv_path=csv_path)
+
+# Run the Spark pipeline from MongoDB or the raw JSON shards
+def run_spark(source='mongodb', pattern=RAW_PATTERN, parquet_path=PROCESSED_PARQUET, csv_path=PROCESSED_CSV,
+              staging_dir=SPARK_STAGING):
+    """Extract, preprocess and save with the Spark backend, like data_preprocessing.main; return the transform."""
+    spark = get_spark()
+    if source == 'json':
+        sdf = spark_read_json(spark, pattern)
+    else:
+        sdf = spark_read_mongodb(spark, connect_to_mongodb(), staging_dir=staging_dir)
+    # Aggregation cube over every entity in original units, like data_preprocessing.main
+    combine_cells([spark_cube_cells(sdf)], file_path=CUBE_PATH)
+    processed, transform = spark_preprocess(sdf)
+    summaries = []
+    save_spark_output(processed, parquet_path, csv_path, staging_dir,
+                      on_batch=lambda df: summaries.append(batch_summary(df)))
+    transform.save(TRANSFORM_PATH)
+    combine_batch_summaries(summaries, file_path=SUMMARY_PATH)
+    return transform
+
+# Main function
+def main():
+    run_spark()
+
+# Run the main function
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
 # Import necessary libraries
+import os
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from functools import partial
+
+from country_summary import SUMMARY_PATH, cached_country_summary, top_bottom_countries
+from cross_validation import cross_validate_moving_average, summarize_folds
+from emissions_store import EmissionsStore
+from feature_transform import TRANSFORM_PATH, FeatureTransform
+from moving_average_state import MA_STATE_PATH, MovingAverageState
+from parallel import map_by_country
+from processed_data import PROCESSED_PARQUET, load_processed
+from rolling_engine import rolling_mean
 
 # Load the dataset
-def load_data(file_path):
-    """Load the dataset from the specified CSV file."""
-    return pd.read_csv(file_path)
+def load_data(file_path, columns=None, countries=None):
+    """Load the dataset from a processed Parquet file or a CSV file, optionally projected and filtered."""
+    if str(file_path).endswith('.parquet'):
+        return load_processed(file_path, columns=columns, countries=countries)
+    df = pd.read_csv(file_path) if columns is None else pd.read_csv(file_path, usecols=columns)
+    if countries is not None:
+        df = df[df['Country'].isin(countries)]
+    return df
 
 # Preprocess the data
 def preprocess_data(df):
@@ -15,38 +31,88 @@ def preprocess_data(df):
     return df.sort_values(by=['Country', 'Year'])
 
 # Calculate the average CO2 per capita for each country and identify top/bottom countries
-def get_top_bottom_countries(df, num_countries=10):
-    """Return the top and bottom countries based on average CO2 per capita."""
-    average_co2_per_capita = df.groupby('Country')['CO2_per_capita'].mean()
-    top_countries = average_co2_per_capita.nlargest(num_countries).index
-    bottom_countries = average_co2_per_capita.nsmallest(num_countries).index
-    return top_countries, bottom_countries
+def get_top_bottom_countries(df, num_countries=10, summary=None):
+    """Return the top and bottom countries based on average CO2 per capita.
+
+    Rankings come from the per-country summary table (built from df when not given) by partial sort.
+    """
+    summary = cached_country_summary(df, ['CO2_per_capita']) if summary is None else summary
+    return top_bottom_countries(summary, 'CO2_per_capita', num_countries)
+
+# Moving average of one country's rows, usable as a per-country stage function
+def country_moving_average(country_df, window_size=10):
+    """Return the rolling mean of CO2 per capita for a single country's rows, taken in Year order.
+
+    The result keeps country_df's index, so it aligns with the rows whatever order they came in.
+    """
+    if 'Year' in country_df.columns:
+        country_df = country_df.sort_values('Year', kind='stable')
+    return country_df['CO2_per_capita'].rolling(window=window_size, min_periods=1).mean()
 
 # Filter the dataset for selected countries and compute the moving average
-def filter_and_calculate_moving_average(df, countries, window_size=10):
-    """Filter the DataFrame for specified countries and calculate the moving average."""
+def filter_and_calculate_moving_average(df, countries, window_size=10, executor=None):
+    """Filter the DataFrame for specified countries and calculate the moving average.
+
+    By default all countries are computed in one pass by rolling_engine; with executor set to
+    'serial', 'thread' or 'process', countries are processed through parallel.map_by_country.
+    """
     filtered_df = df[df['Country'].isin(countries)].copy()
-    filtered_df['CO2_per_capita_MA'] = (
-        filtered_df.groupby('Country')['CO2_per_capita']
-        .transform(lambda x: x.rolling(window=window_size, min_periods=1).mean())
-    )
+    if executor is None:
+        filtered_df['CO2_per_capita_MA'] = rolling_mean(filtered_df, 'CO2_per_capita', window_size)
+    else:
+        moving_average = partial(country_moving_average, window_size=window_size)
+        filtered_df['CO2_per_capita_MA'] = map_by_country(
+            moving_average, filtered_df[['Country', 'Year', 'CO2_per_capita']], executor=executor)
     return filtered_df
 
+# Scaling of a column in the saved preprocessing transform
+def transform_scale_key(column='CO2_per_capita', transform_path=TRANSFORM_PATH):
+    """Return FeatureTransform.scale_key of column from the transform artifact, or None when there is none."""
+    if not os.path.exists(transform_path):
+        return None
+    return FeatureTransform.load(transform_path).scale_key(column)
+
+# Update moving averages incrementally from a persisted state
+def update_moving_average(df, state_path=MA_STATE_PATH, window_size=10, scale_key=None):
+    """Return only the rows whose CO2_per_capita_MA is new since the last run, and persist the state.
+
+    The first run, a run with a different window or a run whose scale_key differs from the
+    stored one (preprocessing refitted the scaler, so the buffered values are on another scale)
+    computes every row; other runs only push the years newer than each country's last stored year.
+    """
+    state = MovingAverageState.load(state_path) if os.path.exists(state_path) else None
+    if state is None or state.windows != (window_size,) or state.scale_key != scale_key:
+        state = MovingAverageState(windows=(window_size,), scale_key=scale_key)
+        changed = state.initialize(df)
+    else:
+        last_year = pd.Series(state.last_year, index=state.countries)
+        newer = df['Year'] > df['Country'].map(last_year).astype(float).fillna(float('-inf'))
+        changed = state.append(df[newer.to_numpy()])
+    state.save(state_path)
+    return changed
+
+# Rolling-origin evaluation of the moving average as a forecaster of each held-out block of years
+def evaluate_moving_average_cv(df, window_size=10, **kwargs):
+    """Print and return per-fold metrics of forecasting CO2 per capita with the trailing moving average."""
+    folds = cross_validate_moving_average(df, window_size=window_size, **kwargs)
+    print(f"\n{window_size}-Year Moving Average forecast, rolling-origin cross-validation:")
+    print(summarize_folds(folds))
+    return folds
+
 # Plotting functions
-def plot_raw_data(df, top_countries, bottom_countries, colors):
-    """Plot raw CO2 per capita data for the top 10 and bottom 10 countries."""
+def plot_raw_data(df, top_countries, bottom_countries, colors, show=True):
+    """Plot raw CO2 per capita data for the top 10 and bottom 10 countries; return the figure."""
     fig, ax = plt.subplots(figsize=(14, 6))
+    store = EmissionsStore(df, columns=['CO2_per_capita'])
     
     # Plot top countries
     for i, country in enumerate(top_countries):
-        country_df = df[df['Country'] == country]
-        ax.plot(country_df['Year'], country_df['CO2_per_capita'], 
+        ax.plot(store.column('Year', country), store.column('CO2_per_capita', country), 
                 label=country, color=colors[i], linestyle='-', alpha=0.7)
     
     # Plot bottom countries
     for i, country in enumerate(bottom_countries):
-        country_df = df[df['Country'] == country]
-        ax.plot(country_df['Year'], country_df['CO2_per_capita'], 
+        ax.plot(store.column('Year', country), store.column('CO2_per_capita', country), 
                 label=country, color=colors[len(top_countries) + i], linestyle='--', alpha=0.7)
     
     ax.set_title('Raw CO2 per Capita Data (Top 10 and Bottom 10 Countries)')
@@ -54,22 +120,23 @@ def plot_raw_data(df, top_countries, bottom_countries, colors):
     ax.legend(loc='upper left', bbox_to_anchor=(1, 1), ncol=1)
     ax.grid(True)
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
+    return fig
 
-def plot_moving_average(df, top_countries, bottom_countries, colors, window_size):
-    """Plot the moving average CO2 per capita for the top 10 and bottom 10 countries."""
+def plot_moving_average(df, top_countries, bottom_countries, colors, window_size, show=True):
+    """Plot the moving average CO2 per capita for the top 10 and bottom 10 countries; return the figure."""
     fig, ax = plt.subplots(figsize=(14, 6))
+    store = EmissionsStore(df, columns=['CO2_per_capita_MA'])
     
     # Plot top countries
     for i, country in enumerate(top_countries):
-        country_df = df[df['Country'] == country]
-        ax.plot(country_df['Year'], country_df['CO2_per_capita_MA'], 
+        ax.plot(store.column('Year', country), store.column('CO2_per_capita_MA', country), 
                 label=f'{country} MA', color=colors[i], linestyle='-', alpha=0.8)
     
     # Plot bottom countries
     for i, country in enumerate(bottom_countries):
-        country_df = df[df['Country'] == country]
-        ax.plot(country_df['Year'], country_df['CO2_per_capita_MA'], 
+        ax.plot(store.column('Year', country), store.column('CO2_per_capita_MA', country), 
                 label=f'{country} MA', color=colors[len(top_countries) + i], linestyle='--', alpha=0.8)
     
     ax.set_title(f'{window_size}-Year Moving Average of CO2 per Capita Data (Top 10 and Bottom 10 Countries)')
@@ -78,7 +145,9 @@ def plot_moving_average(df, top_countries, bottom_countries, colors, window_size
     ax.legend(loc='upper left', bbox_to_anchor=(1, 1), ncol=1)
     ax.grid(True)
     plt.tight_layout()
-    plt.show()
+    if show:
+        plt.show()
+    return fig
 
 # Main function
 def main(file_path):
@@ -86,12 +155,18 @@ def main(file_path):
     df = load_data(file_path)
     df = preprocess_data(df)
     
-    # Get top and bottom countries
-    top_countries, bottom_countries = get_top_bottom_countries(df)
+    # Get top and bottom countries from the precomputed summary when it matches the data
+    summary = cached_country_summary(df, file_path=SUMMARY_PATH)
+    top_countries, bottom_countries = get_top_bottom_countries(df, summary=summary)
     countries = top_countries.union(bottom_countries)
     
     # Filter and calculate moving average
     filtered_df = filter_and_calculate_moving_average(df, countries)
+    evaluate_moving_average_cv(df)
+
+    # Extend the persisted moving-average state with the years published since the last run
+    changed = update_moving_average(df, scale_key=transform_scale_key())
+    print(f"\nMoving averages updated for {len(changed)} country-years since the last run.")
     
     # Set up color palette with distinct colors
     colors = sns.color_palette("hsv", len(top_countries) + len(bottom_countries))
@@ -102,4 +177,4 @@ def main(file_path):
 
 # Run the main function
 if __name__ == "__main__":
-    main('co2_emission_preprocessed.csv')  # Replace with your file path
+    main(PROCESSED_PARQUET)
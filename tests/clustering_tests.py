@@ -0,0 +1,112 @@
+import unittest
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+import mongomock
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from clustering import (FEATURES, approximate_hierarchical, cluster_countries, main, predict_chunks, select_k,
+                        stream_kmeans, ward_linkage)
+from country_summary import build_country_summary
+from regression_engine import frame_chunks
+from scipy.cluster.hierarchy import linkage
+from sklearn.cluster import MiniBatchKMeans
+
+# Rows drawn around three well-separated centres
+def make_blobs(n_per_blob=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = np.array([[0.0] * 5, [10.0] * 5, [0.0, 10.0, 0.0, 10.0, 0.0]])
+    X = np.vstack([centre + rng.normal(0, 0.5, (n_per_blob, 5)) for centre in centres])
+    return pd.DataFrame(X, columns=FEATURES), np.repeat(np.arange(3), n_per_blob)
+
+# Same cluster assignment up to label names
+def same_partition(a, b):
+    return len(set(zip(a, b))) == len(set(a)) == len(set(b))
+
+class TestClustering(unittest.TestCase):
+
+    def setUp(self):
+        self.df, self.truth = make_blobs()
+        self.make_chunks = lambda: frame_chunks(self.df, 250)
+
+    def test_streamed_kmeans_recovers_blobs(self):
+        """Test mini-batch k-means over chunks finds the three blobs and skips incomplete rows."""
+        df = self.df.copy()
+        df.loc[5, 'Oil_CO2'] = np.nan
+        scaler, model = stream_kmeans(lambda: frame_chunks(df, 250), 3)
+        labels = predict_chunks(lambda: frame_chunks(df, 250), scaler, model)
+        self.assertEqual(labels[5], -1)
+        keep = labels >= 0
+        self.assertTrue(same_partition(labels[keep], self.truth[keep]))
+
+    def test_streamed_kmeans_batch_size(self):
+        """Test chunks are regrouped into mini-batches of batch_size rows."""
+        with patch.object(MiniBatchKMeans, 'partial_fit', autospec=True,
+                          side_effect=MiniBatchKMeans.partial_fit) as partial_fit:
+            stream_kmeans(self.make_chunks, 3, batch_size=400)
+        sizes = [len(call.args[1]) for call in partial_fit.call_args_list]
+        self.assertEqual(sum(sizes), len(self.df))
+        self.assertTrue(all(size == 400 for size in sizes[:-1]))
+        self.assertLessEqual(sizes[-1], 400)
+
+    def test_select_k(self):
+        """Test the parallel sweep picks k=3 and scores every k."""
+        scores, k = select_k(self.df.to_numpy(), range(2, 6), executor='serial')
+        self.assertEqual(k, 3)
+        self.assertListEqual(list(scores['k']), [2, 3, 4, 5])
+
+    def test_ward_linkage_matches_scipy(self):
+        """Test unit-weight Ward agglomeration reproduces scipy's merge heights."""
+        X = np.random.default_rng(1).random((60, 3))
+        np.testing.assert_allclose(ward_linkage(X, np.ones(60))[:, 2], linkage(X, 'ward')[:, 2], rtol=1e-10)
+
+    def test_approximate_hierarchical(self):
+        """Test the micro-cluster hierarchy separates the blobs."""
+        scaler, leaf_model, linkage_matrix, leaf_labels = approximate_hierarchical(self.make_chunks, 3,
+                                                                                   max_leaves=50)
+        self.assertEqual(linkage_matrix.shape, (len(leaf_labels[leaf_labels >= 0]) - 1, 4))
+        labels = leaf_labels[leaf_model.predict(scaler.transform(self.df.to_numpy()))]
+        self.assertTrue(same_partition(labels, self.truth))
+
+    def test_country_trajectories(self):
+        """Test countries cluster by trajectory, with batch summaries combined per country."""
+        rng = np.random.default_rng(2)
+        years = np.arange(1950, 2020)
+        frames = []
+        for i in range(12):
+            growth = 0.05 if i % 2 else -0.02
+            frame = pd.DataFrame({'Country': f'Country {i}', 'Year': years})
+            for feature in FEATURES:
+                frame[feature] = np.exp(growth * (years - 1950)) * (1 + rng.normal(0, 0.01, len(years)))
+            frames.append(frame)
+        df = pd.concat(frames, ignore_index=True)
+        summary = pd.concat([build_country_summary(chunk, FEATURES) for chunk in frame_chunks(df, 100)])
+        labels, scores = cluster_countries(summary, k_values=range(2, 5), executor='serial')
+        self.assertEqual(scores.loc[scores['Silhouette'].idxmax(), 'k'], 2)
+        growing = np.array([int(name.split()[1]) % 2 for name in labels.index])
+        self.assertTrue(same_partition(labels.to_numpy(), growing))
+
+    def test_main_clusters_every_entity(self):
+        """Test main streams the unscaled cache, aggregates and early years included, and reads it again offline."""
+        rng = np.random.default_rng(3)
+        collection = mongomock.MongoClient()['group_5_project']['co2_emission']
+        fields = ['population', 'coal_co2', 'oil_co2', 'gas_co2', 'cement_co2']
+        collection.insert_many([{name: {'iso_code': None, 'data': [
+            {'year': int(year), **{field: float(rng.random() * 1000) for field in fields}}
+            for year in range(1900, 2020)]}} for name in ['World', 'Asia'] + [f'Country {i}' for i in range(6)]])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with patch('clustering.connect_to_mongodb', return_value=collection), redirect_stdout(StringIO()) as out:
+                main(cache_dir=cache_dir)
+            self.assertIn('8 countries re-fetched', out.getvalue())
+            self.assertRegex(out.getvalue(), r'Cluster \d+: .*World')
+            with patch('clustering.connect_to_mongodb', side_effect=AssertionError), redirect_stdout(StringIO()) as out:
+                main(offline=True, cache_dir=cache_dir)
+            self.assertIn('Row clusters', out.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
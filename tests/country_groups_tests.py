@@ -0,0 +1,29 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from country_groups import (AGGREGATES, CONTINENT_MEMBERS, COUNTRY_CONTINENT, COUNTRY_INCOME, INCOME_MEMBERS,
+                            UNCLASSIFIED, entity_groups, is_country)
+from data_preprocessing import COUNTRIES_LIST
+from eda import NON_COUNTRIES
+
+class TestCountryGroups(unittest.TestCase):
+
+    def test_tables_are_partitions(self):
+        """Test every country belongs to one continent and at most one income group, and no aggregate is listed."""
+        for table in (CONTINENT_MEMBERS, INCOME_MEMBERS):
+            members = [country for countries in table.values() for country in countries]
+            self.assertEqual(len(members), len(set(members)))
+        self.assertLessEqual(set(COUNTRY_INCOME), set(COUNTRY_CONTINENT))
+        self.assertFalse(set(AGGREGATES) & set(COUNTRY_CONTINENT))
+
+    def test_known_entities_are_classified(self):
+        """Test the analysed countries are fully classified and the EDA's non-countries are aggregates."""
+        for country in COUNTRIES_LIST:
+            self.assertNotIn(UNCLASSIFIED, entity_groups(country), country)
+        self.assertFalse(any(is_country(name) for name in NON_COUNTRIES))
+        self.assertTrue(is_country('Micronesia (country)'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+import country_summary
+from country_summary import (batch_summary, build_country_summary, cached_country_summary, combine_batch_summaries,
+                             country_statistic, data_key, load_country_summary, top_bottom_countries)
+
+class TestCountrySummary(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'Country': np.repeat([f'Country {i}' for i in range(20)], 60),
+                                'Year': np.tile(np.arange(1950, 2010), 20),
+                                'CO2': rng.random(1200),
+                                'CO2_per_capita': rng.random(1200)})
+        self.df.loc[rng.random(1200) < 0.2, 'CO2'] = np.nan
+        country_summary.SUMMARY_MEMO.clear()
+
+    def test_statistics_match_groupby(self):
+        """Test every statistic over a decade range matches a direct group-by."""
+        summary = build_country_summary(self.df)
+        subset = self.df[(self.df['Year'] >= 1960) & (self.df['Year'] <= 1989)]
+        grouped = subset.groupby('Country')['CO2']
+        for stat in ['mean', 'sum', 'count', 'min', 'max', 'last']:
+            with self.subTest(stat=stat):
+                expected = grouped.last() if stat == 'last' else getattr(grouped, stat)()
+                result = country_statistic(summary, 'CO2', stat, years=(1960, 1989))
+                np.testing.assert_allclose(result.reindex(expected.index), expected)
+
+    def test_top_bottom_matches_nlargest(self):
+        """Test partial-sort rankings equal nlargest/nsmallest of the group means."""
+        means = self.df.groupby('Country')['CO2_per_capita'].mean()
+        top, bottom = top_bottom_countries(build_country_summary(self.df), 'CO2_per_capita', 5)
+        self.assertListEqual(list(top), list(means.nlargest(5).index))
+        self.assertListEqual(list(bottom), list(means.nsmallest(5).index))
+
+    def test_partial_decades_rejected(self):
+        """Test year ranges that split a decade raise a ValueError."""
+        with self.assertRaises(ValueError):
+            country_statistic(build_country_summary(self.df), 'CO2', years=(1955, 1989))
+
+    def test_cache_invalidation(self):
+        """Test the stored summary is reused for the same data and rebuilt when the data changes."""
+        self.assertEqual(data_key(self.df), data_key(self.df.sample(frac=1, random_state=0)))
+        changed = self.df.assign(CO2=self.df['CO2'] * 2)
+        self.assertNotEqual(data_key(self.df), data_key(changed))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'summary.parquet')
+            cached_country_summary(self.df, file_path=path)
+            self.assertIsNotNone(load_country_summary(path, data_key(self.df)))
+            self.assertIsNone(load_country_summary(path, data_key(changed)))
+            country_summary.SUMMARY_MEMO.clear()
+            cached_country_summary(changed, file_path=path)
+            self.assertIsNotNone(load_country_summary(path, data_key(changed)))
+
+    def test_batch_summaries_match_whole_frame(self):
+        """Test summaries of disjoint country batches combine into the whole frame's summary and key."""
+        countries = self.df['Country'].unique()
+        batches = [self.df[self.df['Country'].isin(countries[i:i + 7])] for i in range(0, len(countries), 7)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'summary.parquet')
+            combined = combine_batch_summaries([batch_summary(batch) for batch in batches[::-1]], file_path=path)
+            self.assertIsNotNone(load_country_summary(path, data_key(self.df)))
+        pd.testing.assert_frame_equal(combined.astype({'Country': object}),
+                                      build_country_summary(self.df).astype({'Country': object}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from cross_validation import (cache_fold_arrays, country_folds, cross_validate_moving_average,
+                              cross_validate_regression, rolling_origin_folds)
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import GroupKFold, cross_val_score
+
+class TestCrossValidation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        countries = [f'Country {i}' for i in range(12)]
+        self.df = pd.DataFrame({'Country': np.repeat(countries, 40),
+                                'Year': np.tile(np.arange(1980, 2020), 12),
+                                'Population': rng.random(480)})
+        self.df['CO2_per_capita'] = 0.5 * self.df['Population'] + 0.01 * (self.df['Year'] - 1980) + \
+            rng.normal(0, 0.05, 480)
+
+    def test_country_folds_do_not_share_countries(self):
+        """Test no country appears in both train and test of a grouped fold."""
+        for train, test in country_folds(self.df):
+            self.assertFalse(set(self.df['Country'].iloc[train]) & set(self.df['Country'].iloc[test]))
+
+    def test_rolling_folds_test_on_later_years(self):
+        """Test every rolling-origin fold trains strictly before it tests, with an expanding window."""
+        folds = rolling_origin_folds(self.df, n_splits=4)
+        sizes = [len(train) for train, _ in folds]
+        self.assertEqual(sizes, sorted(sizes))
+        for train, test in folds:
+            self.assertLess(self.df['Year'].iloc[train].max(), self.df['Year'].iloc[test].min())
+
+    def test_rolling_folds_need_enough_years(self):
+        """Test asking for more year blocks than distinct years raises a clear ValueError."""
+        short = self.df[self.df['Year'] < 1984]
+        self.assertEqual(len(rolling_origin_folds(short, n_splits=3)), 3)
+        with self.assertRaisesRegex(ValueError, 'distinct years'):
+            rolling_origin_folds(short, n_splits=4)
+
+    def test_regression_matches_sklearn(self):
+        """Test parallel grouped CV reproduces cross_val_score with GroupKFold."""
+        with tempfile.TemporaryDirectory() as tmp:
+            folds = cross_validate_regression(self.df, scheme='country', executor='process', max_workers=2,
+                                              cache_dir=tmp)
+            self.assertEqual(len(os.listdir(tmp)), 5)
+        expected = -cross_val_score(LinearRegression(), self.df[['Population', 'Year']], self.df['CO2_per_capita'],
+                                    groups=self.df['Country'], cv=GroupKFold(5), scoring='neg_mean_squared_error')
+        np.testing.assert_allclose(folds['MSE'], expected)
+
+    def test_fold_arrays_cached(self):
+        """Test fold files are reused for the same data and rebuilt when it changes."""
+        with tempfile.TemporaryDirectory() as tmp:
+            first = cache_fold_arrays(self.df, 'rolling', 3, ['Population'], tmp)
+            mtimes = [os.path.getmtime(path) for path in first]
+            self.assertEqual(cache_fold_arrays(self.df, 'rolling', 3, ['Population'], tmp), first)
+            self.assertEqual([os.path.getmtime(path) for path in first], mtimes)
+            changed = self.df.assign(Population=self.df['Population'] + 1)
+            self.assertNotEqual(cache_fold_arrays(changed, 'rolling', 3, ['Population'], tmp), first)
+
+    def test_moving_average_forecast(self):
+        """Test the moving-average forecast uses each country's last training years."""
+        df = pd.DataFrame({'Country': ['A'] * 6, 'Year': np.arange(2000, 2006),
+                           'CO2_per_capita': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]})
+        with tempfile.TemporaryDirectory() as tmp:
+            folds = cross_validate_moving_average(df, window_size=2, n_splits=2, executor='serial', cache_dir=tmp)
+        # Fold 0 trains on 2000-2001 (forecast 1.5) and tests on 2002-2003
+        self.assertAlmostEqual(folds['MSE'].iloc[0], ((3 - 1.5) ** 2 + (4 - 1.5) ** 2) / 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+import pandas as pd
+import mongomock
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from data_cache import (build_marker_pipeline, iter_cache, load_cached_co2_emission_data, load_extracted, read_cache,
+                        refresh_cache)
+from data_preprocessing import extract_co2_emission_data
+
+class TestDataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mongomock.MongoClient()['group_5_project']['co2_emission']
+        self.collection.insert_many([
+            {"Afghanistan": {"iso_code": "AFG", "data": [
+                {"year": 2000, "population": 1000, "cumulative_luc_co2": 2.5, "coal_co2": 0.5}]}},
+            {"Brazil": {"iso_code": "BRA", "data": [
+                {"year": 2000, "population": 5000, "cumulative_luc_co2": 4.0},
+                {"year": 2001, "population": 5100, "cumulative_luc_co2": 4.2}]}},
+        ])
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_round_trip(self):
+        """Test the cached frame matches a direct extraction."""
+        df = load_cached_co2_emission_data(self.collection, cache_dir=self.cache_dir)
+        expected = extract_co2_emission_data(self.collection)
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_server_flatten_refresh(self):
+        """Test the cache filled through server-side flattening matches the Python-side one."""
+        df = load_cached_co2_emission_data(self.collection, cache_dir=self.cache_dir, flatten='server')
+        pd.testing.assert_frame_equal(df, extract_co2_emission_data(self.collection))
+
+    def test_incremental_refresh(self):
+        """Test only changed countries are re-fetched."""
+        self.assertListEqual(refresh_cache(self.collection, self.cache_dir), ['Afghanistan', 'Brazil'])
+        self.assertListEqual(refresh_cache(self.collection, self.cache_dir), [])
+
+        self.collection.update_one({"Brazil": {"$exists": True}},
+                                   {"$push": {"Brazil.data": {"year": 2002, "population": 5200}}})
+        self.assertListEqual(refresh_cache(self.collection, self.cache_dir), ['Brazil'])
+        self.assertEqual(len(read_cache(self.cache_dir, countries=['Brazil'])), 3)
+
+    def test_batched_refresh(self):
+        """Test a cold cache filled one country at a time matches a direct extraction."""
+        with patch('data_cache.extract_co2_emission_data', wraps=extract_co2_emission_data) as extract:
+            refresh_cache(self.collection, self.cache_dir, chunk_size=1)
+        self.assertListEqual([call.kwargs['countries'] for call in extract.call_args_list],
+                             [['Afghanistan'], ['Brazil']])
+        pd.testing.assert_frame_equal(read_cache(self.cache_dir), extract_co2_emission_data(self.collection))
+
+    def test_refresh_detects_sum_preserving_edits(self):
+        """Test ISO code edits and value swaps that keep every field sum unchanged are still re-fetched."""
+        refresh_cache(self.collection, self.cache_dir)
+        self.collection.update_one({"Brazil": {"$exists": True}},
+                                   {"$set": {"Brazil.data.0.cumulative_luc_co2": 4.2,
+                                             "Brazil.data.1.cumulative_luc_co2": 4.0}})
+        self.assertListEqual(refresh_cache(self.collection, self.cache_dir), ['Brazil'])
+        self.assertListEqual(list(read_cache(self.cache_dir, countries=['Brazil'])['CO2']), [4.2, 4.0])
+
+        self.collection.update_one({"Afghanistan": {"$exists": True}}, {"$set": {"Afghanistan.iso_code": "AFX"}})
+        self.assertListEqual(refresh_cache(self.collection, self.cache_dir), ['Afghanistan'])
+        self.assertListEqual(list(read_cache(self.cache_dir, countries=['Afghanistan'])['ISO_Code']), ['AFX'])
+
+    def test_unchanged_refresh_reads_only_markers(self):
+        """Test a refresh with nothing changed reads only scalar markers, and an added entry is still detected."""
+        refresh_cache(self.collection, self.cache_dir)
+        markers = list(self.collection.aggregate(build_marker_pipeline()))
+        self.assertListEqual([doc['_id'] for doc in markers], ['Afghanistan', 'Brazil'])
+        self.assertFalse(any(isinstance(value, (dict, list)) for doc in markers for value in doc.values()))
+        with patch('data_cache.extract_co2_emission_data') as extract:
+            self.assertListEqual(refresh_cache(self.collection, self.cache_dir), [])
+        extract.assert_not_called()
+        self.collection.update_one({"Afghanistan": {"$exists": True}},
+                                   {"$push": {"Afghanistan.data": {"year": 2001, "population": 1010}}})
+        self.assertListEqual(refresh_cache(self.collection, self.cache_dir), ['Afghanistan'])
+        self.assertEqual(len(read_cache(self.cache_dir, countries=['Afghanistan'])), 2)
+
+    def test_streamed_and_offline_extraction(self):
+        """Test the cache streams whole countries and the offline load reads it without MongoDB."""
+        refresh_cache(self.collection, self.cache_dir)
+        batches = list(iter_cache(self.cache_dir, columns=['Country', 'Year', 'CO2'], batch_countries=1))
+        self.assertListEqual([list(batch['Country'].unique()) for batch in batches], [['Afghanistan'], ['Brazil']])
+        df = load_extracted(['Country', 'CO2'], offline=True, cache_dir=self.cache_dir)
+        pd.testing.assert_frame_equal(df, pd.concat(batches, ignore_index=True)[['Country', 'CO2']],
+                                      check_categorical=False, check_dtype=False)
+
+    def test_offline_read_without_cache(self):
+        """Test reading an empty cache fails clearly."""
+        with self.assertRaises(FileNotFoundError):
+            read_cache(self.cache_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
+import mongomock
 import sys
 import os
 
@@ -8,7 +9,33 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
-from data_preprocessing import connect_to_mongodb, get_co2_emission_data, preprocess_data, save_to_csv
+from data_preprocessing import (connect_to_mongodb, get_co2_emission_data, preprocess_data, save_to_csv,
+                                stream_co2_emission_data, build_projection, extract_co2_emission_data,
+                                preprocess_frame, preprocess_in_chunks, list_countries, main, run_chunked)
+import country_summary
+from country_summary import data_key, load_country_summary
+from emissions_cube import cube_key, finest_cells, load_cube
+from processed_data import save_processed, load_processed, to_processed_dtypes
+import numpy as np
+import tempfile
+import json
+
+# Fixture collection shared by the extraction tests
+def make_fixture_collection():
+    collection = mongomock.MongoClient()['group_5_project']['co2_emission']
+    collection.insert_many([
+        {"Afghanistan": {"iso_code": "AFG", "data": [
+            {"year": 1950, "population": 1000, "cumulative_luc_co2": 2.5, "coal_co2": 0.5, "unused": 9},
+            {"year": 1951, "population": 1100, "cumulative_luc_co2": 2.7, "oil_co2": 1.0},
+        ]}},
+        {"Brazil": {"iso_code": "BRA", "data": [
+            {"year": 1960, "population": 5000, "gas_co2": 0.4, "cement_co2": 0.1},
+        ]},
+         "World": {"data": [
+            {"year": 1960, "population": 9000, "flaring_co2": 0.3, "other_industry_co2": 0.2},
+        ]}},
+    ])
+    return collection
 
 class TestDataPreprocessing(unittest.TestCase):
 
@@ -48,6 +75,40 @@ class TestDataPreprocessing(unittest.TestCase):
         self.assertEqual(df.iloc[0]['Country'], "Afghanistan")
         print("Data retrieval test passed.")
 
+    def test_stream_co2_emission_data_matches_legacy(self):
+        """Test the streaming extractor returns the same rows as the list-of-dicts extractor."""
+        collection = make_fixture_collection()
+        expected = get_co2_emission_data(collection)
+        df = stream_co2_emission_data(collection, batch_size=1)
+
+        self.assertListEqual(list(df.columns), list(expected.columns))
+        self.assertEqual(df['Country'].dtype, 'category')
+        pd.testing.assert_frame_equal(df.astype({'Country': object, 'ISO_Code': object}), expected,
+                                      check_dtype=False)
+
+    def test_extract_flatten_modes_match(self):
+        """Test Python-side and server-side flattening return identical frames."""
+        collection = make_fixture_collection()
+        for kwargs in [{}, {'countries': ['Afghanistan', 'Brazil']}, {'min_year': 1950},
+                       {'countries': ['Brazil', 'World'], 'min_year': 1955}]:
+            with self.subTest(**kwargs):
+                python_df = extract_co2_emission_data(collection, flatten='python', **kwargs)
+                server_df = extract_co2_emission_data(collection, flatten='server', **kwargs)
+                self.assertGreater(len(server_df), 0)
+                pd.testing.assert_frame_equal(python_df, server_df)
+
+    def test_extract_unknown_flatten_mode(self):
+        """Test an unknown flatten mode is rejected."""
+        with self.assertRaises(ValueError):
+            extract_co2_emission_data(make_fixture_collection(), flatten='spark')
+
+    def test_build_projection(self):
+        """Test the projection only keeps the used fields."""
+        projection = build_projection(['Afghanistan'])
+        self.assertEqual(projection['_id'], 0)
+        self.assertIn('Afghanistan.data.cumulative_luc_co2', projection)
+        self.assertEqual(len(projection), 1 + 1 + 9)
+
     def test_preprocess_data(self):
         """Test data preprocessing."""
         data = {
@@ -71,6 +132,156 @@ class TestDataPreprocessing(unittest.TestCase):
         self.assertIn('CO2_per_capita', processed_df.columns)
         print("Data preprocessing test passed.")
 
+    def test_preprocess_frame_matches_preprocess_data(self):
+        """Test the vectorized engine matches preprocess_data when every row is kept."""
+        rng = np.random.default_rng(0)
+        n = 200
+        df = pd.DataFrame({'Country': rng.choice(['Brazil', 'China', 'India'], n), 'ISO_Code': 'XXX',
+                           'Year': rng.integers(1951, 2020, n)})
+        for column in ['Population', 'CO2', 'Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2',
+                       'Flaring_CO2', 'Other_Industry_CO2']:
+            df[column] = np.where(rng.random(n) < 0.2, np.nan, rng.random(n) + 0.1)
+
+        expected = preprocess_data(df.copy()).reset_index(drop=True)
+        processed_df = preprocess_frame(df)
+        self.assertEqual(processed_df['Country'].dtype, 'category')
+        pd.testing.assert_frame_equal(processed_df.astype({'Country': object}),
+                                      expected.astype({'Country': object}), check_dtype=False)
+
+    def test_preprocess_frame_strategies(self):
+        """Test filtering happens before imputation and per-country strategies."""
+        df = pd.DataFrame({
+            'Country': ['Brazil', 'Brazil', 'Brazil', 'Brazil', 'World'],
+            'ISO_Code': [None] * 5,
+            'Year': [1960, 1961, 1962, 1963, 1960],
+            'Population': [10.0, None, 30.0, 40.0, 1e9],
+            'CO2': [1.0, None, 3.0, None, 1e9],
+        })
+        for column in ['Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2', 'Flaring_CO2', 'Other_Industry_CO2']:
+            df[column] = 1.0
+
+        processed_df = preprocess_frame(df, strategies={'Population': 'interpolate', 'CO2': 'ffill'})
+        self.assertListEqual(list(processed_df['Country']), ['Brazil'] * 4)
+        # Population 10, 20, 30, 40 and CO2 1, 1, 3, 3 after scaling
+        np.testing.assert_allclose(processed_df['Population'], [0, 1 / 3, 2 / 3, 1])
+        np.testing.assert_allclose(processed_df['CO2'], [0, 0, 1, 1])
+
+        processed_df = preprocess_frame(df)
+        # The World row is dropped before the mean is taken, so the gap gets Brazil's mean
+        np.testing.assert_allclose(processed_df['Population'].iloc[1], (80 / 3 - 10) / 30)
+
+    def test_preprocess_in_chunks_matches_in_memory(self):
+        """Test the chunked two-pass pipeline writes the same bytes as the in-memory path."""
+        rng = np.random.default_rng(7)
+        collection = mongomock.MongoClient()['group_5_project']['co2_emission']
+        for country in ['Zimbabwe', 'Brazil', 'World', 'China', 'India', 'Canada']:
+            entries = []
+            for year in range(1940, 2000):
+                entry = {'year': year}
+                for field in ['population', 'cumulative_luc_co2', 'coal_co2', 'oil_co2', 'gas_co2',
+                              'cement_co2', 'flaring_co2', 'other_industry_co2']:
+                    if rng.random() > 0.3:
+                        entry[field] = float(rng.random() * 1e6)
+                entries.append(entry)
+            collection.insert_one({country: {'iso_code': country[:3].upper(), 'data': entries}})
+        fetch_batch = lambda batch: stream_co2_emission_data(collection, countries=batch)
+
+        for strategies in [None, {'CO2': 'interpolate', 'Population': 'ffill'}]:
+            with tempfile.TemporaryDirectory() as tmp:
+                processed_df = preprocess_frame(stream_co2_emission_data(collection), strategies=strategies)
+                processed_df.to_csv(os.path.join(tmp, 'memory.csv'), index=False)
+                save_processed(processed_df, os.path.join(tmp, 'memory.parquet'))
+
+                for chunk_size in [1, 4]:
+                    with self.subTest(strategies=strategies, chunk_size=chunk_size):
+                        csv_path = os.path.join(tmp, f'chunked_{chunk_size}.csv')
+                        parquet_path = os.path.join(tmp, f'chunked_{chunk_size}.parquet')
+                        preprocess_in_chunks(fetch_batch, list_countries(collection), chunk_size=chunk_size,
+                                             strategies=strategies, parquet_path=parquet_path, csv_path=csv_path)
+                        with open(csv_path, 'rb') as chunked, open(os.path.join(tmp, 'memory.csv'), 'rb') as memory:
+                            self.assertEqual(chunked.read(), memory.read())
+                        pd.testing.assert_frame_equal(
+                            load_processed(parquet_path).astype({'Country': object}),
+                            load_processed(os.path.join(tmp, 'memory.parquet')).astype({'Country': object}))
+
+    def test_main_pushes_filters_down(self):
+        """Test an uncached run pushes the country and year filters down and builds no cube from the kept rows."""
+        collection = make_fixture_collection()
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch('data_preprocessing.connect_to_mongodb', return_value=collection), \
+                patch('data_preprocessing.extract_co2_emission_data', wraps=extract_co2_emission_data) as extract, \
+                patch('data_preprocessing.save_processed') as save, patch('data_preprocessing.save_to_csv'), \
+                patch('data_preprocessing.cached_cube') as cube, patch('data_preprocessing.cached_country_summary'), \
+                patch('data_preprocessing.TRANSFORM_PATH', os.path.join(tmp, 'transform.json')):
+            main(flatten='server', use_cache=False)
+        # The filtered rows would make a cube of the kept countries only, so none is built from them
+        cube.assert_not_called()
+        self.assertEqual(extract.call_args.kwargs['flatten'], 'server')
+        self.assertEqual(extract.call_args.kwargs['min_year'], 1950)
+        self.assertIn('Afghanistan', extract.call_args.kwargs['countries'])
+        processed_df = save.call_args.args[0]
+        # World is filtered out and Afghanistan's 1950 row is not above MIN_YEAR
+        self.assertListEqual(list(processed_df['Country']), ['Afghanistan', 'Brazil'])
+        self.assertListEqual(list(processed_df['Year']), [1951, 1960])
+
+    def test_run_chunked_writes_summary_and_cube(self):
+        """Test the chunked run stores the same country summary and cube keys as the in-memory path."""
+        collection = make_fixture_collection()
+        written = []
+        write = lambda batches, **_: written.extend(batches)
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch('data_preprocessing.connect_to_mongodb', return_value=collection), \
+                patch('data_preprocessing.write_processed_batches', side_effect=write), \
+                patch('data_preprocessing.TRANSFORM_PATH', os.path.join(tmp, 'transform.json')), \
+                patch('data_preprocessing.SUMMARY_PATH', os.path.join(tmp, 'summary.parquet')), \
+                patch('data_preprocessing.CUBE_PATH', os.path.join(tmp, 'cube.parquet')):
+            run_chunked(1, use_cache=False)
+            extracted = stream_co2_emission_data(collection)
+            expected = to_processed_dtypes(preprocess_frame(extracted))
+            self.assertEqual(len(written), 2)
+            self.assertIsNotNone(load_country_summary(os.path.join(tmp, 'summary.parquet'), data_key(expected)))
+            # The cube covers every entity, World included, unfiltered
+            cube = load_cube(os.path.join(tmp, 'cube.parquet'), cube_key(finest_cells(extracted)))
+            self.assertIsNotNone(cube)
+            self.assertIn('World', set(cube.levels['country|all']['Country']))
+
+    def test_run_chunked_from_json_shards(self):
+        """Test a chunked run with source='json' reads the OWID shards, never MongoDB, and keeps only countries."""
+        from owid_json_loader import load_owid_json, shard_index
+        written = []
+        write = lambda batches, **_: written.extend(batches)
+        with tempfile.TemporaryDirectory() as tmp:
+            for part, doc in enumerate(make_fixture_collection().find({}, {'_id': 0})):
+                with open(os.path.join(tmp, f'owid-co2-data-part-{part}.json'), 'w') as f:
+                    json.dump(doc, f)
+            pattern = os.path.join(tmp, 'owid-co2-data-part-*.json')
+            with patch('data_preprocessing.connect_to_mongodb', side_effect=AssertionError("MongoDB used")), \
+                    patch('owid_json_loader.shard_index', side_effect=lambda: shard_index(pattern)), \
+                    patch('data_preprocessing.write_processed_batches', side_effect=write), \
+                    patch('data_preprocessing.TRANSFORM_PATH', os.path.join(tmp, 'transform.json')), \
+                    patch('data_preprocessing.SUMMARY_PATH', os.path.join(tmp, 'summary.parquet')), \
+                    patch('data_preprocessing.CUBE_PATH', os.path.join(tmp, 'cube.parquet')):
+                main(source='json', chunk_size=1)
+            expected = preprocess_frame(load_owid_json(pattern))
+        # The summary memo would otherwise spare a later run with the same rows from writing its file
+        country_summary.SUMMARY_MEMO.clear()
+        self.assertEqual(len(written), 2)
+        pd.testing.assert_frame_equal(pd.concat(written, ignore_index=True).astype({'Country': object}),
+                                      expected.astype({'Country': object}))
+
+    def test_chunked_country_selection(self):
+        """Test preprocess_in_chunks keeps the given countries, as preprocess_frame does."""
+        collection = make_fixture_collection()
+        fetch_batch = lambda batch: stream_co2_emission_data(collection, countries=batch)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'chunked.csv')
+            preprocess_in_chunks(fetch_batch, list_countries(collection), chunk_size=1, countries=['Brazil', 'World'],
+                                 min_year=1900, parquet_path=os.path.join(tmp, 'chunked.parquet'), csv_path=csv_path)
+            expected = preprocess_frame(stream_co2_emission_data(collection), countries=['Brazil', 'World'],
+                                        min_year=1900)
+            self.assertEqual(pd.read_csv(csv_path).to_csv(index=False), expected.to_csv(index=False))
+            self.assertListEqual(sorted(pd.read_csv(csv_path)['Country'].unique()), ['Brazil', 'World'])
+
     @patch('data_preprocessing.pd.DataFrame.to_csv')
     def test_save_to_csv(self, mock_to_csv):
         """Test saving to CSV."""
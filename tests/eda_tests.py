@@ -1,5 +1,6 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import subprocess
 import pandas as pd
 from pymongo import MongoClient
 import sys
@@ -7,11 +8,14 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
 
-from eda import data  # Assuming data is returned after preprocessing
+import matplotlib
+matplotlib.use("Agg")
+import eda
+from eda import FIGURES, load_eda_data, prepare_eda_frame
 
 class TestEda(unittest.TestCase):
 
-    @patch("eda.MongoClient")
+    @patch("data_preprocessing.MongoClient")
     def test_mongo_connection(self, MockMongoClient):
         # Mock MongoDB client
         mock_client = MockMongoClient.return_value
@@ -68,5 +72,50 @@ class TestEda(unittest.TestCase):
         self.assertAlmostEqual(df.iloc[0]['CO2_per_capita'], 0.0025)
         self.assertAlmostEqual(df.iloc[1]['CO2_per_capita'], 0.0025)
 
+    def test_import_is_lazy(self):
+        """Test importing eda pulls in no data, plotting or database libraries."""
+        heavy = ["pandas", "matplotlib", "seaborn", "pymongo", "pyspark"]
+        code = ("import sys; sys.path.insert(0, 'py_scripts'); import eda; "
+                f"print([name for name in {heavy!r} if name in sys.modules])")
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), "[]")
+
+    @patch("eda.extract_eda_data")
+    def test_load_is_memoized(self, mock_extract):
+        """Test the frame is extracted once and prepared like the original script."""
+        mock_extract.return_value = pd.DataFrame(
+            {"Country": ["Afghanistan", "Brazil"], "ISO_Code": ["AFG", "BRA"], "Year": [1850, 1850],
+             "Population": [1000.0, None], "CO2": [2.5, 5.0]})
+        eda.EDA_MEMO.clear()
+        df = load_eda_data(offline=True)
+        self.assertIs(load_eda_data(offline=True), df)
+        mock_extract.assert_called_once_with(use_cache=True, offline=True)
+        self.assertListEqual(list(df.columns), ["Country", "Year", "Population", "CO2", "CO2_per_capita"])
+        self.assertAlmostEqual(df.iloc[1]["CO2_per_capita"], 0.005)
+        eda.EDA_MEMO.clear()
+
+    def test_every_figure_renders(self):
+        """Test each EDA figure builds without showing anything."""
+        years = list(range(1990, 2000))
+        countries = eda.SELECTED_COUNTRIES + ["World"]
+        df = prepare_eda_frame(pd.DataFrame(
+            {"Country": [c for c in countries for _ in years], "ISO_Code": "XXX", "Year": years * len(countries),
+             "Population": [1000.0 + i for i in range(len(years) * len(countries))],
+             "CO2": [float(i % 7) for i in range(len(years) * len(countries))]}))
+        plt, _ = eda.plotting()
+        for name, plot in FIGURES.items():
+            self.assertIsInstance(plot(df), matplotlib.figure.Figure, name)
+            plt.close("all")
+
+        # Cached extractions carry Country as a categorical; legends list only the countries drawn
+        categorical = df.assign(Country=df["Country"].astype("category"))
+        for name, plot in FIGURES.items():
+            self.assertIsInstance(plot(categorical), matplotlib.figure.Figure, name)
+            plt.close("all")
+        legend = eda.plot_top_emitters_per_capita(categorical, n=3).axes[0].get_legend()
+        self.assertEqual(len(legend.get_texts()), 3)
+        plt.close("all")
+
 if __name__ == '__main__':
     unittest.main()
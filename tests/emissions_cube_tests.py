@@ -0,0 +1,135 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from country_groups import AGGREGATE, entity_groups
+from emissions_cube import (ALL, EmissionsCube, build_cube, cached_cube, combine_cells, cube_key, finest_cells,
+                            level_name, load_cube)
+
+SOURCES = ['Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2']
+
+class TestEmissionsCube(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        years = np.arange(1985, 2021)
+        countries = ['China', 'Brazil', 'India', 'Japan', 'Micronesia (country)', 'World', 'Asia',
+                     'High-income countries', 'Europe (excl. EU-27)']
+        df = pd.DataFrame({'Country': np.repeat(countries, len(years)), 'Year': np.tile(years, len(countries))})
+        for column in ['Population', 'CO2'] + SOURCES:
+            df[column] = rng.random(len(df)) * 100
+        # Missing values must be left out of sums, counts and means
+        df.loc[rng.random(len(df)) < 0.1, 'Coal_CO2'] = np.nan
+        self.df = df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+        self.df['CO2_per_capita'] = self.df['CO2'] / self.df['Population']
+        groups = self.df['Country'].map(entity_groups)
+        self.df['Continent'], self.df['Income'] = groups.str[0], groups.str[1]
+        self.df['Decade'] = self.df['Year'] // 10 * 10
+        self.countries = self.df[self.df['Continent'] != AGGREGATE]
+        self.raw = self.df.drop(columns=['Continent', 'Income', 'Decade'])
+        self.cube = EmissionsCube(build_cube(self.raw))
+
+    def assert_matches(self, result, expected):
+        self.assertListEqual(list(result.index), list(expected.index))
+        np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-9)
+
+    def test_country_groups(self):
+        """Test countries map to one continent and income group, and aggregates come from the explicit list."""
+        self.assertEqual(entity_groups('India'), ('Asia', 'Lower-middle income'))
+        self.assertEqual(entity_groups('Micronesia (country)'), ('Oceania', 'Lower-middle income'))
+        self.assertEqual(entity_groups('Sint Maarten (Dutch part)'), ('North America', 'High income'))
+        self.assertEqual(entity_groups('North America (excl. USA)'), (AGGREGATE, AGGREGATE))
+        self.assertEqual(level_name(['Continent', 'Decade']), 'continent|decade')
+        self.assertEqual(level_name(['Continent', 'Income']), 'country|all')
+        with self.assertRaises(ValueError):
+            level_name(['Group'])
+
+    def test_roll_ups_match_groupby(self):
+        """Test sum, mean and count at several levels against pandas groupby over the rows."""
+        countries = self.countries
+        self.assert_matches(self.cube.source_breakdown('Year'), countries.groupby('Year')[SOURCES].sum())
+        self.assert_matches(self.cube.query(['Continent', 'Decade'], 'CO2_per_capita', stat='mean'),
+                            countries.groupby(['Continent', 'Decade'])[['CO2_per_capita']].mean())
+        self.assert_matches(self.cube.query('Income', SOURCES),
+                            countries.groupby('Income')[SOURCES].sum())
+        self.assert_matches(self.cube.query('Country', SOURCES, stat='count'),
+                            self.df.groupby('Country')[SOURCES].count())
+        total = self.cube.query(metrics='Coal_CO2', stat='mean')
+        self.assertAlmostEqual(total['Coal_CO2'].iloc[0], countries['Coal_CO2'].mean())
+
+    def test_totals_exclude_aggregates(self):
+        """Test continent, income and grand totals sum each country once, while aggregates keep their own cells."""
+        continents = self.cube.query('Continent', 'CO2')
+        self.assertNotIn(AGGREGATE, continents.index)
+        self.assertAlmostEqual(continents['CO2'].sum(), self.cube.query(metrics='CO2')['CO2'].iloc[0])
+        self.assertAlmostEqual(self.cube.query(metrics='CO2')['CO2'].iloc[0], self.countries['CO2'].sum())
+        world = self.df[self.df['Country'] == 'World']
+        self.assert_matches(self.cube.query('Year', 'CO2', filters={'Country': 'World'}),
+                            world.groupby('Year')[['CO2']].sum())
+
+    def test_batches_match_whole_frame(self):
+        """Test cells of whole-country batches combine into the cube and key of the whole frame."""
+        df = self.raw
+        names = sorted(df['Country'].unique())
+        parts = [finest_cells(df[df['Country'].isin(names[i:i + 3])]) for i in range(0, len(names), 3)]
+        with tempfile.TemporaryDirectory() as tmp:
+            whole_path, batched_path = os.path.join(tmp, 'whole.parquet'), os.path.join(tmp, 'batched.parquet')
+            whole = cached_cube(df, file_path=whole_path)
+            batched = combine_cells(parts, file_path=batched_path)
+            self.assertEqual(pq.read_schema(whole_path).metadata[b'data_key'],
+                             pq.read_schema(batched_path).metadata[b'data_key'])
+        for level, cells in whole.levels.items():
+            pd.testing.assert_frame_equal(batched.levels[level], cells)
+
+    def test_filters_and_drill_down(self):
+        """Test filtered queries and drill-downs, including year ranges that cut a decade."""
+        asia = self.countries[self.countries['Continent'] == 'Asia']
+        self.assert_matches(self.cube.source_breakdown('Decade', filters={'Continent': 'Asia'}),
+                            asia.groupby('Decade')[SOURCES].sum())
+        self.assert_matches(self.cube.drill_down({'Continent': 'Asia'}, 'Country', 'CO2').droplevel('Continent'),
+                            asia.groupby('Country')[['CO2']].sum())
+        self.assert_matches(self.cube.query('Income', 'CO2', filters={'Continent': 'Asia'}),
+                            asia.groupby('Income')[['CO2']].sum())
+
+        rows = self.df[(self.df['Year'] >= 1993) & (self.df['Year'] <= 2012)
+                       & self.df['Country'].isin(['India', 'World'])]
+        self.assert_matches(self.cube.query('Decade', 'CO2', stat='mean', years=(1993, 2012),
+                                            filters={'Country': ['India', 'World']}),
+                            rows.groupby('Decade')[['CO2']].mean())
+        rows = self.countries[(self.countries['Year'] >= 1990) & (self.countries['Year'] <= 2009)]
+        self.assert_matches(self.cube.query('Income', 'CO2', years=(1990, 2009)),
+                            rows.groupby('Income')[['CO2']].sum())
+        with self.assertRaises(ValueError):
+            self.cube.query('Year', stat='median')
+
+    def test_cached_round_trip(self):
+        """Test the cube is written once, read back while the data is unchanged and rebuilt after a change."""
+        df = self.raw.drop(columns='CO2_per_capita')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cube.parquet')
+            cube = cached_cube(df, file_path=path)
+            self.assertIn('CO2_per_capita', cube.metrics)
+            mtime = os.stat(path).st_mtime_ns
+            loaded = cached_cube(df, file_path=path)
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+            pd.testing.assert_frame_equal(loaded.source_breakdown('Year'), cube.source_breakdown('Year'))
+            self.assertEqual(loaded.levels['all|all']['Country'].iloc[0], ALL)
+
+            changed = df.copy()
+            changed.loc[0, 'CO2'] += 1.0
+            cached_cube(changed, file_path=path)
+            self.assertIsNone(load_cube(path, key='stale'))
+            self.assertIsNotNone(load_cube(path))
+
+            # Editing the membership tables regroups the countries, so the stored cube is stale
+            with patch('emissions_cube.MEMBERSHIP_KEY', 'edited'):
+                self.assertIsNone(load_cube(path, key=cube_key(finest_cells(changed))))
+
+if __name__ == "__main__":
+    unittest.main()
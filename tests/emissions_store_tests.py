@@ -0,0 +1,72 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from emissions_store import EmissionsStore
+from processed_data import save_processed
+
+class TestEmissionsStore(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        years = np.arange(1950, 2021)
+        countries = ['China', 'Brazil', 'India']
+        df = pd.DataFrame({'Country': np.repeat(countries, len(years)), 'Year': np.tile(years, len(countries))})
+        df['CO2'] = rng.random(len(df))
+        df['CO2_per_capita'] = rng.random(len(df))
+        # Shuffled rows, as the store must not rely on input order
+        self.df = df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+        self.store = EmissionsStore(self.df)
+
+    def expected(self, country, start=None, end=None):
+        rows = self.df[self.df['Country'] == country].sort_values('Year')
+        if start is not None:
+            rows = rows[(rows['Year'] >= start) & (rows['Year'] <= end)]
+        return rows
+
+    def test_country_views(self):
+        """Test country slices match boolean masks and are read-only views of the stored columns."""
+        for country in ['Brazil', 'China', 'India']:
+            np.testing.assert_array_equal(self.store.column('CO2', country), self.expected(country)['CO2'])
+        view = self.store.column('CO2', 'India')
+        self.assertTrue(np.shares_memory(view, self.store.column('CO2')))
+        self.assertFalse(view.flags.writeable)
+        with self.assertRaises(KeyError):
+            self.store.country_slice('Atlantis')
+
+    def test_year_ranges(self):
+        """Test binary-searched year ranges are inclusive and clipped to the available years."""
+        np.testing.assert_array_equal(self.store.column('Year', 'China', years=(2000, 2009)), np.arange(2000, 2010))
+        np.testing.assert_array_equal(self.store.column('CO2_per_capita', 'Brazil', years=(1900, 1955)),
+                                      self.expected('Brazil', 1900, 1955)['CO2_per_capita'])
+        self.assertEqual(len(self.store.column('Year', 'India', years=(2030, 2040))), 0)
+
+    def test_frames(self):
+        """Test frames of one, several or all countries, with Country categories limited to the frame."""
+        frame = self.store.frame(['India', 'Brazil', 'Atlantis'], years=(2010, 2020), columns=['CO2'])
+        self.assertListEqual(list(frame.columns), ['Country', 'Year', 'CO2'])
+        self.assertListEqual(list(frame['Country'].cat.categories), ['Brazil', 'India'])
+        expected = pd.concat([self.expected('Brazil', 2010, 2020), self.expected('India', 2010, 2020)])
+        np.testing.assert_array_equal(frame['CO2'], expected['CO2'])
+        self.assertListEqual(list(frame['Country']), list(expected['Country']))
+
+        single = self.store.frame('China')
+        self.assertTrue(np.shares_memory(single['CO2'].to_numpy(), self.store.column('CO2')))
+        self.assertEqual(len(self.store.frame()), len(self.df))
+
+    def test_from_parquet(self):
+        """Test building from the processed Parquet file with a projection."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'processed.parquet')
+            save_processed(self.df, path)
+            store = EmissionsStore.from_parquet(path, columns=['CO2'], countries=['India'])
+        self.assertListEqual(store.columns, ['Year', 'CO2'])
+        self.assertListEqual(store.countries, ['India'])
+        np.testing.assert_allclose(store.column('CO2', 'India'), self.expected('India')['CO2'], rtol=1e-6)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from feature_importance import FEATURES, feature_importance, fit_model, permutation_importance
+
+class TestFeatureImportance(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 4000
+        self.df = pd.DataFrame({feature: rng.random(n) for feature in FEATURES})
+        self.df['CO2'] = 5 * self.df['Coal_CO2'] + 2 * self.df['Oil_CO2'] + rng.normal(0, 0.05, n)
+
+    def test_ranking_and_intervals(self):
+        """Test informative features rank first and every interval brackets its mean."""
+        importances, _, r2 = feature_importance(self.df, executor='serial')
+        self.assertGreater(r2, 0.95)
+        self.assertEqual(list(importances['Feature'][:2]), ['Coal_CO2', 'Oil_CO2'])
+        self.assertTrue((importances['CI_Low'] <= importances['Importance']).all())
+        self.assertTrue((importances['Importance'] <= importances['CI_High']).all())
+        self.assertGreater(importances['CI_Low'].iloc[1], importances['CI_High'].iloc[2:].max())
+
+    def test_early_stopping(self):
+        """Test repeats stop early under a loose tolerance and run to the cap under a strict one."""
+        X = self.df[FEATURES].to_numpy()
+        y = self.df['CO2'].to_numpy()
+        model = fit_model(X, y)
+        loose = permutation_importance(model, X, y, FEATURES, tolerance=1.0, executor='serial')
+        strict = permutation_importance(model, X, y, FEATURES, max_repeats=20, tolerance=0.0, executor='serial')
+        self.assertTrue((loose['Repeats'] == 10).all())
+        self.assertTrue((strict['Repeats'] == 20).all())
+
+    def test_executors_agree(self):
+        """Test thread workers reproduce the serial importances."""
+        X = self.df[FEATURES].to_numpy()
+        y = self.df['CO2'].to_numpy()
+        model = fit_model(X, y)
+        serial = permutation_importance(model, X, y, FEATURES, max_repeats=10, executor='serial')
+        threaded = permutation_importance(model, X, y, FEATURES, max_repeats=10, executor='thread')
+        pd.testing.assert_frame_equal(serial, threaded)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from feature_transform import FeatureTransform
+from data_preprocessing import preprocess_frame
+
+# Small extracted frame with gaps in every imputed column
+def make_frame():
+    rng = np.random.default_rng(1)
+    n = 60
+    df = pd.DataFrame({'Country': np.repeat(['Brazil', 'China', 'World'], n // 3), 'ISO_Code': None,
+                       'Year': np.tile(np.arange(1990, 1990 + n // 3), 3)})
+    for column in ['Population', 'CO2', 'Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2',
+                   'Flaring_CO2', 'Other_Industry_CO2']:
+        df[column] = np.where(rng.random(n) < 0.2, np.nan, rng.random(n) + 0.5)
+    return df
+
+class TestFeatureTransform(unittest.TestCase):
+
+    def test_save_load_transform(self):
+        """Test a reloaded artifact reproduces the preprocessed frame."""
+        df = make_frame()
+        processed_df, transform = preprocess_frame(df, return_transform=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "transform.json")
+            transform.save(path)
+            loaded = FeatureTransform.load(path)
+        pd.testing.assert_frame_equal(loaded.transform(df), processed_df)
+
+    def test_transform_chunks(self):
+        """Test streaming chunks with the stored constants matches a single transform."""
+        df = make_frame()
+        _, transform = preprocess_frame(df, return_transform=True)
+        chunks = [df.iloc[:25], df.iloc[25:]]
+        streamed = pd.concat(transform.transform_chunks(chunks), ignore_index=True)
+        expected = transform.transform(df)
+        pd.testing.assert_frame_equal(streamed.astype({'Country': object}),
+                                      expected.astype({'Country': object}))
+
+    def test_inverse_transform(self):
+        """Test inverse_transform recovers the original units of observed values."""
+        df = make_frame()
+        processed_df, transform = preprocess_frame(df, return_transform=True)
+        restored = transform.inverse_transform(processed_df)
+        kept = df[df['Country'] != 'World'].reset_index(drop=True)
+        observed = kept['CO2'].notna()
+        np.testing.assert_allclose(restored.loc[observed, 'CO2'], kept.loc[observed, 'CO2'])
+        np.testing.assert_allclose(restored['CO2_per_capita'], restored['CO2'] / restored['Population'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from figure_report import (INDEX_FILE, eda_figure_specs, figure_key, figure_spec, load_index, render_report,
+                           time_series_figure_specs)
+from eda import FIGURES, SELECTED_COUNTRIES, plot_co2_over_time, prepare_eda_frame
+
+# Plotting function that fails partway through a report
+def failing_plot(df):
+    raise RuntimeError("bad figure")
+
+# Raw EDA-schema rows for the selected countries plus a few others
+def make_eda_frame(seed=0):
+    rng = np.random.default_rng(seed)
+    countries = SELECTED_COUNTRIES + ["Chile", "Kenya", "Peru", "Oman", "World"]
+    years = np.arange(1990, 2010)
+    n = len(countries) * len(years)
+    return pd.DataFrame({'Country': np.repeat(countries, len(years)), 'ISO_Code': 'XXX',
+                         'Year': np.tile(years, len(countries)), 'Population': rng.random(n) + 1,
+                         'CO2': rng.random(n) * np.repeat(np.arange(len(countries), 0, -1), len(years))})
+
+class TestFigureReport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = prepare_eda_frame(make_eda_frame())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_render_and_skip_unchanged(self):
+        """Test every figure is written once and only figures whose inputs changed are redrawn."""
+        first = render_report(eda_figure_specs(self.df), self.tmp.name, executor='process', max_workers=2)
+        self.assertListEqual(list(first['Figure']), list(FIGURES))
+        self.assertFalse(first['Skipped'].any())
+        self.assertTrue(all(os.path.getsize(path) > 0 for path in first['Path']))
+
+        second = render_report(eda_figure_specs(self.df), self.tmp.name, executor='serial')
+        self.assertTrue(second['Skipped'].all())
+
+        # Changing one non-selected country only touches the all-country figures
+        changed = self.df.copy()
+        changed.loc[changed['Country'] == 'Kenya', 'CO2'] *= 0.5
+        third = render_report(eda_figure_specs(changed), self.tmp.name, executor='serial')
+        self.assertSetEqual(set(third.loc[~third['Skipped'], 'Figure']),
+                            {'population_vs_co2', 'correlation_heatmap', 'co2_by_country'})
+
+    def test_time_series_figures(self):
+        """Test the time-series charts render headless from a processed frame."""
+        df = self.df.rename(columns={'CO2': 'CO2_total'}).assign(CO2_per_capita=lambda d: d['CO2_total'])
+        timings = render_report(time_series_figure_specs(df, window_size=3), self.tmp.name, executor='serial')
+        self.assertListEqual(list(timings['Figure']), ['raw_co2_per_capita', 'moving_average'])
+        self.assertTrue(all(os.path.exists(path) for path in timings['Path']))
+
+    def test_key_tracks_function_body(self):
+        """Test an edited plotting function under the same name invalidates the figure."""
+        data = self.df[['Country', 'Year', 'CO2']]
+        edited = lambda df: None
+        edited.__module__, edited.__qualname__ = plot_co2_over_time.__module__, plot_co2_over_time.__qualname__
+        self.assertNotEqual(figure_key('co2', figure_spec(plot_co2_over_time, data)),
+                            figure_key('co2', figure_spec(edited, data)))
+
+    def test_index_kept_when_a_figure_fails(self):
+        """Test figures finished before a failing one stay recorded and are skipped on the next run."""
+        data = self.df[['Country', 'Year', 'CO2']]
+        specs = {'co2_over_time': figure_spec(plot_co2_over_time, data), 'broken': figure_spec(failing_plot, data)}
+        with self.assertRaises(RuntimeError):
+            render_report(specs, self.tmp.name, executor='serial')
+        self.assertListEqual(list(load_index(self.tmp.name)), ['co2_over_time'])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, INDEX_FILE + '.tmp')))
+        timings = render_report({'co2_over_time': specs['co2_over_time']}, self.tmp.name, executor='serial')
+        self.assertTrue(timings['Skipped'].all())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+import forecasting
+from forecasting import forecast_all, load_index
+
+class TestForecasting(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        years = np.arange(1980, 2020)
+        self.df = pd.DataFrame({'Country': np.repeat(['China', 'Brazil', 'India'], len(years)),
+                                'Year': np.tile(years, 3),
+                                'CO2': np.cumsum(rng.random(120)) / 60,
+                                'Population': np.cumsum(rng.random(120)) / 60})
+        self.metrics = ['CO2', 'Population']
+
+    def test_forecasts_every_series(self):
+        """Test every country x metric series gets a forecast for each horizon year."""
+        with tempfile.TemporaryDirectory() as tmp:
+            forecasts, refitted = forecast_all(self.df, self.metrics, horizon=3, cache_dir=tmp, executor='serial')
+        self.assertEqual(len(refitted), 6)
+        self.assertEqual(len(forecasts), 18)
+        self.assertListEqual(sorted(forecasts['Year'].unique()), [2020, 2021, 2022])
+
+    def test_only_changed_series_refit(self):
+        """Test cached fits are reused and a changed series is refit from warm-start parameters."""
+        with tempfile.TemporaryDirectory() as tmp:
+            first, _ = forecast_all(self.df, self.metrics, model='ets', cache_dir=tmp, executor='serial')
+            second, refitted = forecast_all(self.df, self.metrics, model='ets', cache_dir=tmp, executor='serial')
+            self.assertListEqual(refitted, [])
+            pd.testing.assert_frame_equal(first, second)
+
+            previous_params = load_index(tmp)['ets|India|CO2']['params']
+            changed = self.df.copy()
+            changed.loc[changed['Country'] == 'India', 'CO2'] += 0.01
+            calls = []
+            original = forecasting.fit_series
+            forecasting.fit_series = lambda task: calls.append(task) or original(task)
+            try:
+                _, refitted = forecast_all(changed, self.metrics, model='ets', cache_dir=tmp, executor='serial')
+            finally:
+                forecasting.fit_series = original
+            self.assertListEqual(refitted, [('India', 'CO2')])
+            self.assertListEqual(calls[0]['start_params'], previous_params)
+
+    def test_failed_series_are_recorded(self):
+        """Test a series whose model raises is recorded as failed without stopping the other fits."""
+        original = forecasting.ETSModel
+
+        def failing_model(values, **kwargs):
+            if np.allclose(values, self.df.loc[self.df['Country'] == 'Brazil', 'CO2']):
+                raise np.linalg.LinAlgError("Singular matrix")
+            return original(values, **kwargs)
+
+        with tempfile.TemporaryDirectory() as tmp, patch('forecasting.ETSModel', side_effect=failing_model):
+            forecasts, refitted = forecast_all(self.df, self.metrics, model='ets', horizon=2, cache_dir=tmp,
+                                               executor='serial')
+            index = load_index(tmp)
+        self.assertEqual(len(refitted), 6)
+        self.assertEqual(len(forecasts), 10)
+        self.assertIn('LinAlgError', index['ets|Brazil|CO2']['error'])
+        self.assertIsNone(index['ets|India|CO2']['error'])
+
+    def test_index_saved_when_run_aborts(self):
+        """Test fits completed before an abort are cached and reused by the next run."""
+        original = forecasting.fit_series
+        calls = []
+
+        def abort_after_two(task):
+            calls.append(task)
+            if len(calls) > 2:
+                raise KeyboardInterrupt
+            return original(task)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch('forecasting.fit_series', side_effect=abort_after_two), self.assertRaises(KeyboardInterrupt):
+                forecast_all(self.df, self.metrics, horizon=2, cache_dir=tmp, executor='serial')
+            self.assertEqual(len(load_index(tmp)), 2)
+            _, refitted = forecast_all(self.df, self.metrics, horizon=2, cache_dir=tmp, executor='serial')
+        self.assertEqual(len(refitted), 4)
+
+    def test_process_executor_matches_serial(self):
+        """Test fitting in worker processes gives the same forecasts as fitting serially."""
+        with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as process_dir:
+            serial, _ = forecast_all(self.df, self.metrics, cache_dir=serial_dir, executor='serial')
+            process, _ = forecast_all(self.df, self.metrics, cache_dir=process_dir, executor='process',
+                                      max_workers=2)
+        pd.testing.assert_frame_equal(serial, process)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import tempfile
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from mlflow_sweep import MODEL_CONFIGS, expand_trials, local_tracking_uri, run_sweep
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+
+class TestMlflowSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        X = rng.random((200, 2))
+        y = X @ np.array([1.0, 2.0]) + rng.normal(0, 0.1, 200)
+        self.split = (X[:160], X[160:], y[:160], y[160:])
+        self.configs = {
+            "LinearRegression": {"model": LinearRegression, "param_name": "fit_intercept",
+                                 "param_values": [True, False], "additional_params": {}},
+            "KNeighborsRegressor": {"model": KNeighborsRegressor, "param_name": "n_neighbors",
+                                    "param_values": [3, 5], "additional_params": {}},
+        }
+
+    def test_expand_trials(self):
+        """Test the notebook configs expand to one trial per parameter value."""
+        trials = expand_trials(MODEL_CONFIGS)
+        self.assertEqual(len(trials), 9)
+        self.assertEqual(trials[3]["params"], {"n_estimators": 50, "random_state": 42})
+        self.assertEqual(trials[2]["params"], {})
+
+    def test_rerun_skips_logged_trials(self):
+        """Test a second run logs nothing new and returns the stored metrics."""
+        with tempfile.TemporaryDirectory() as tmp:
+            uri = local_tracking_uri(tmp)
+            first = run_sweep(*self.split, model_configs=self.configs, tracking_uri=uri, executor='process',
+                              max_workers=2)
+            second = run_sweep(*self.split, model_configs=self.configs, tracking_uri=uri, executor='serial')
+            changed = run_sweep(self.split[0] * 2, *self.split[1:], model_configs=self.configs, tracking_uri=uri,
+                                executor='serial')
+        self.assertFalse(first["skipped"].any())
+        self.assertTrue(second["skipped"].all())
+        np.testing.assert_allclose(second["mse"], first["mse"])
+        self.assertFalse(changed["skipped"].any())
+        self.assertTrue((first["fit_seconds"] > 0).all())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from moving_average_state import MovingAverageState
+from rolling_engine import grouped_rolling
+from time_series_analysis import update_moving_average
+
+class TestMovingAverageState(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'Country': np.repeat(['China', 'Brazil', 'India'], 30),
+                                'Year': np.tile(np.arange(1990, 2020), 3),
+                                'CO2_per_capita': rng.random(90)})
+        self.df.loc[[3, 40, 41], 'CO2_per_capita'] = np.nan
+        self.expected = grouped_rolling(self.df, ['CO2_per_capita'], windows=(3, 10), statistics=('mean',))
+
+    def test_append_matches_full_recompute(self):
+        """Test appending one year at a time gives the same averages as recomputing everything."""
+        state = MovingAverageState(windows=(3, 10))
+        state.initialize(self.df[self.df['Year'] < 2000])
+        for year in range(2000, 2020):
+            changed = state.append(self.df[self.df['Year'] == year])
+            self.assertEqual(len(changed), 3)
+            for window in (3, 10):
+                np.testing.assert_allclose(changed[f'CO2_per_capita_MA_{window}'],
+                                           self.expected.loc[changed.index, f'CO2_per_capita_mean_{window}'])
+
+    def test_rejects_old_years(self):
+        """Test rows that would rewrite history raise a ValueError."""
+        state = MovingAverageState()
+        state.initialize(self.df)
+        with self.assertRaises(ValueError):
+            state.append(self.df[self.df['Year'] == 2019])
+
+    def test_save_and_load(self):
+        """Test the persisted state continues exactly where it left off."""
+        state = MovingAverageState(windows=(3, 10))
+        state.initialize(self.df[self.df['Year'] < 2019])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state.json')
+            state.save(path)
+            changed = MovingAverageState.load(path).append(self.df[self.df['Year'] == 2019])
+        np.testing.assert_allclose(changed['CO2_per_capita_MA_10'],
+                                   self.expected.loc[changed.index, 'CO2_per_capita_mean_10'])
+
+    def test_update_moving_average(self):
+        """Test only rows newer than the stored state are emitted on later runs."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state.json')
+            first = update_moving_average(self.df[self.df['Year'] < 2018], path)
+            second = update_moving_average(self.df, path)
+            third = update_moving_average(self.df, path)
+        self.assertEqual(len(first), 84)
+        self.assertListEqual(sorted(second['Year'].unique()), [2018, 2019])
+        self.assertEqual(len(third), 0)
+
+    def test_rescaled_data_rebuilds_state(self):
+        """Test a state stored under another scaling is rebuilt instead of mixing scales."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state.json')
+            update_moving_average(self.df[self.df['Year'] < 2018], path, scale_key='[1.0, 0.0]')
+            # A refit scaler halves every value, including the years already buffered
+            rescaled = self.df.assign(CO2_per_capita=self.df['CO2_per_capita'] / 2)
+            changed = update_moving_average(rescaled, path, scale_key='[0.5, 0.0]')
+            self.assertEqual(len(changed), len(self.df))
+            self.assertEqual(MovingAverageState.load(path).scale_key, '[0.5, 0.0]')
+        np.testing.assert_allclose(changed['CO2_per_capita_MA'],
+                                   grouped_rolling(rescaled, ['CO2_per_capita'], windows=(10,),
+                                                   statistics=('mean',))['CO2_per_capita_mean_10'])
+
+if __name__ == "__main__":
+    unittest.main()
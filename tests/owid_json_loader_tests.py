@@ -0,0 +1,69 @@
+import unittest
+import tempfile
+import json
+import pandas as pd
+import mongomock
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from owid_json_loader import iter_countries, load_owid_countries, load_owid_json, shard_index, shard_paths
+from data_preprocessing import extract_co2_emission_data
+
+RAW_SHARD = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/raw/owid-co2-data-part-10.json"))
+
+class TestOwidJsonLoader(unittest.TestCase):
+
+    def test_iter_countries_small_reads(self):
+        """Test incremental parsing matches json.load even with tiny read sizes."""
+        with open(RAW_SHARD) as f:
+            expected = json.load(f)
+        self.assertDictEqual(dict(iter_countries(RAW_SHARD, read_size=13)), expected)
+
+    def test_schema_matches_mongo_extraction(self):
+        """Test the file loader returns the same frame as extracting the shard from MongoDB."""
+        with open(RAW_SHARD) as f:
+            document = json.load(f)
+        collection = mongomock.MongoClient()['group_5_project']['co2_emission']
+        collection.insert_one(document)
+
+        df = load_owid_json(RAW_SHARD)
+        pd.testing.assert_frame_equal(df, extract_co2_emission_data(collection))
+
+    def test_parallel_shards(self):
+        """Test several shards are loaded in part order by worker processes."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for part, country in [(2, "Brazil"), (10, "Canada"), (1, "Angola")]:
+                with open(os.path.join(tmp, f"owid-co2-data-part-{part}.json"), "w") as f:
+                    json.dump({country: {"iso_code": country[:3].upper(),
+                                         "data": [{"year": 2000, "population": part}]}}, f)
+            pattern = os.path.join(tmp, "owid-co2-data-part-*.json")
+
+            self.assertEqual(os.path.basename(shard_paths(pattern)[-1]), "owid-co2-data-part-10.json")
+            df = load_owid_json(pattern, max_workers=2)
+            self.assertListEqual(list(df['Country']), ["Angola", "Brazil", "Canada"])
+            self.assertListEqual(list(df['Population']), [1.0, 2.0, 10.0])
+
+    def test_load_selected_countries(self):
+        """Test a batch of countries is read from its own shards and matches the full load filtered."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for part, countries in [(1, ["Angola", "Brazil"]), (2, ["Canada"]), (3, ["Denmark"])]:
+                with open(os.path.join(tmp, f"owid-co2-data-part-{part}.json"), "w") as f:
+                    json.dump({country: {"iso_code": country[:3].upper(),
+                                         "data": [{"year": 2000, "population": part}]} for country in countries}, f)
+            pattern = os.path.join(tmp, "owid-co2-data-part-*.json")
+
+            index = shard_index(pattern)
+            self.assertListEqual(list(index), ["Angola", "Brazil", "Canada", "Denmark"])
+            self.assertEqual(os.path.basename(index["Canada"]), "owid-co2-data-part-2.json")
+            df = load_owid_countries(["Canada", "Angola"], index)
+            full = load_owid_json(pattern)
+            expected = full[full['Country'].isin(["Angola", "Canada"])].reset_index(drop=True)
+            for column in ['Country', 'ISO_Code']:
+                expected[column] = expected[column].cat.remove_unused_categories()
+            pd.testing.assert_frame_equal(df, expected)
+            with self.assertRaises(FileNotFoundError):
+                shard_index(os.path.join(tmp, "missing-*.json"))
+
+if __name__ == '__main__':
+    unittest.main()
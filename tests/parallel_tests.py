@@ -0,0 +1,53 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from parallel import country_offsets, map_by_country
+from time_series_analysis import filter_and_calculate_moving_average
+
+# Per-country stage used by the tests; top-level so process workers can unpickle it
+def country_summary(country_df):
+    return pd.DataFrame({'Country': [country_df['Country'].iloc[0]],
+                         'Total': [country_df['CO2_per_capita'].sum()],
+                         'Last_Year': [country_df['Year'].max()]})
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'Country': np.repeat(['China', 'Brazil', 'India'], 30),
+                                'Year': np.tile(np.arange(1990, 2020), 3),
+                                'CO2_per_capita': rng.random(90)}).sample(frac=1, random_state=1)
+
+    def test_country_offsets(self):
+        """Test rows are grouped into contiguous country slices."""
+        sorted_df, countries, offsets = country_offsets(self.df)
+        self.assertListEqual(countries, ['Brazil', 'China', 'India'])
+        self.assertListEqual(list(offsets), [0, 30, 60, 90])
+        self.assertTrue((sorted_df['Country'].iloc[30:60] == 'China').all())
+
+    def test_executors_agree(self):
+        """Test serial, thread and process executors return the same results."""
+        expected = map_by_country(country_summary, self.df, executor='serial')
+        for executor in ['thread', 'process']:
+            with self.subTest(executor=executor):
+                result = map_by_country(country_summary, self.df, executor=executor, max_workers=2)
+                pd.testing.assert_frame_equal(result, expected)
+
+    def test_moving_average_executor(self):
+        """Test the per-country moving average matches the grouped transform."""
+        df = self.df.sort_values(['Country', 'Year'])
+        expected = filter_and_calculate_moving_average(df, ['Brazil', 'India'], window_size=5)
+        result = filter_and_calculate_moving_average(df, ['Brazil', 'India'], window_size=5, executor='process')
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_unknown_executor(self):
+        """Test an unknown executor name is rejected."""
+        with self.assertRaises(ValueError):
+            map_by_country(country_summary, self.df, executor='cluster')
+
+if __name__ == '__main__':
+    unittest.main()
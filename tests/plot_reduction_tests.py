@@ -0,0 +1,84 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.image import AxesImage
+from eda import plot_co2_by_country, plot_population_vs_co2
+from plot_reduction import line_layout, lttb_indices, use_density
+
+# Textbook single-line LTTB used as the reference
+def reference_lttb(x, y, n_out):
+    every = (len(x) - 2) / (n_out - 2)
+    kept, a = [0], 0
+    for b in range(n_out - 2):
+        lo, hi = int(np.floor(b * every)) + 1, int(np.floor((b + 1) * every)) + 1
+        next_lo, next_hi = hi, min(int(np.floor((b + 2) * every)) + 1, len(x) - 1)
+        if b == n_out - 3:
+            mean_x, mean_y = x[-1], y[-1]
+        else:
+            mean_x, mean_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - mean_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y - y[a]))
+        a = lo + int(np.argmax(area))
+        kept.append(a)
+    return np.array(kept + [len(x) - 1])
+
+class TestPlotReduction(unittest.TestCase):
+
+    def test_lttb_matches_reference(self):
+        """Test the batched LTTB keeps the same points as a per-line reference, and short lines whole."""
+        rng = np.random.default_rng(0)
+        lengths = [1000, 37, 503, 20]
+        x = np.concatenate([np.arange(n, dtype=float) for n in lengths])
+        y = rng.normal(size=len(x)).cumsum()
+        offsets = np.r_[0, np.cumsum(lengths)]
+        kept = lttb_indices(x, y, offsets, n_out=50)
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            line = kept[(kept >= start) & (kept < stop)] - start
+            if stop - start <= 50:
+                np.testing.assert_array_equal(line, np.arange(stop - start))
+            else:
+                np.testing.assert_array_equal(line, reference_lttb(x[start:stop], y[start:stop], 50))
+
+    def test_line_layout(self):
+        """Test rows are grouped by label and ordered by x within each line."""
+        order, offsets, labels = line_layout(np.array(['b', 'a', 'b', 'a']), np.array([2.0, 5.0, 1.0, 3.0]))
+        self.assertListEqual(list(labels), ['a', 'b'])
+        np.testing.assert_array_equal(order, [3, 1, 2, 0])
+        np.testing.assert_array_equal(offsets, [0, 2, 4])
+
+    def test_mode_switch(self):
+        """Test the automatic switch and the explicit modes."""
+        self.assertFalse(use_density(100, 'auto', threshold=100))
+        self.assertTrue(use_density(101, 'auto', threshold=100))
+        self.assertTrue(use_density(1, 'density'))
+        self.assertFalse(use_density(10 ** 9, 'full'))
+        with self.assertRaises(ValueError):
+            use_density(1, 'fast')
+
+    def test_density_figures_stay_bounded(self):
+        """Test large inputs draw a single image or line collection with a capped number of vertices."""
+        rng = np.random.default_rng(1)
+        countries, years = 60, 2000
+        df = pd.DataFrame({'Country': pd.Categorical(np.repeat([f'C{i}' for i in range(countries)], years)),
+                           'Year': np.tile(np.arange(years), countries), 'Population': rng.random(countries * years),
+                           'CO2': rng.random(countries * years)})
+        ax = plot_population_vs_co2(df, threshold=1000).axes[0]
+        self.assertEqual(len(ax.collections), 0)
+        self.assertIsInstance(ax.get_images()[0], AxesImage)
+
+        ax = plot_co2_by_country(df, threshold=1000).axes[0]
+        self.assertEqual(len(ax.lines), 0)
+        collection, = [c for c in ax.collections if isinstance(c, LineCollection)]
+        self.assertEqual(sum(len(path.vertices) for path in collection.get_paths()), countries * 200)
+        self.assertIsNone(ax.get_legend())
+        plt.close('all')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from processed_data import save_processed, load_processed, iter_processed
+
+# Processed-schema frame for three countries
+def make_processed_frame():
+    years = np.arange(1951, 2021)
+    df = pd.DataFrame({'Country': np.repeat(['Brazil', 'China', 'India'], len(years)),
+                       'Year': np.tile(years, 3)})
+    for i, column in enumerate(['Population', 'CO2', 'Coal_CO2', 'Oil_CO2', 'Gas_CO2', 'Cement_CO2',
+                                'Flaring_CO2', 'Other_Industry_CO2', 'CO2_per_capita']):
+        df[column] = np.linspace(0, 1, len(df)) ** (i + 1)
+    return df
+
+class TestProcessedData(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "processed.parquet")
+        self.df = make_processed_frame()
+        save_processed(self.df, self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_dtypes(self):
+        """Test the Parquet file keeps explicit compact dtypes."""
+        df = load_processed(self.path)
+        self.assertEqual(df['Country'].dtype, 'category')
+        self.assertEqual(df['Year'].dtype, np.int16)
+        self.assertEqual(df['CO2_per_capita'].dtype, np.float32)
+        np.testing.assert_allclose(df['CO2'], self.df['CO2'], rtol=1e-6)
+
+    def test_projected_filtered_load(self):
+        """Test loading only some columns, countries and years."""
+        df = load_processed(self.path, columns=['Country', 'Year', 'CO2_per_capita'],
+                            countries=['China'], years=(2000, 2009))
+        self.assertListEqual(list(df.columns), ['Country', 'Year', 'CO2_per_capita'])
+        self.assertListEqual(list(df['Country'].cat.categories), ['China'])
+        self.assertListEqual(list(df['Year']), list(range(2000, 2010)))
+
+    def test_batched_read(self):
+        """Test streamed batches are bounded in size and concatenate to the full column."""
+        batches = list(iter_processed(self.path, columns=['Year', 'CO2'], batch_size=50))
+        self.assertTrue(all(len(batch) <= 50 for batch in batches))
+        df = pd.concat(batches, ignore_index=True)
+        self.assertListEqual(list(df.columns), ['Year', 'CO2'])
+        np.testing.assert_allclose(df['CO2'], self.df['CO2'], rtol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
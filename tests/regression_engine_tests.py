@@ -0,0 +1,59 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from regression_analysis import multivariate_regression, polynomial_regression
+from regression_engine import SufficientStatsRegression, frame_chunks, polynomial_terms
+from sklearn.preprocessing import PolynomialFeatures
+
+class TestRegressionEngine(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 5000
+        self.df = pd.DataFrame({'Population': rng.random(n), 'Year': rng.integers(1951, 2023, n)})
+        self.df['CO2_per_capita'] = (0.3 * self.df['Population'] + 0.002 * (self.df['Year'] - 1950)
+                                     + rng.normal(0, 0.05, n))
+
+    def test_polynomial_terms_order(self):
+        """Test per-chunk terms match PolynomialFeatures column for column."""
+        X = self.df[['Population', 'Year']].to_numpy(dtype=np.float64)[:10]
+        np.testing.assert_allclose(polynomial_terms(X, 3, include_bias=True), PolynomialFeatures(3).fit_transform(X))
+
+    def test_multivariate_parity(self):
+        """Test the streamed fit reproduces the sklearn coefficients, MSE and R-squared."""
+        expected_model, expected_mse, expected_r2 = multivariate_regression(self.df)
+        model, mse, r2 = multivariate_regression(self.df, engine='stats')
+        np.testing.assert_allclose(model.coef_, expected_model.coef_, rtol=1e-9)
+        self.assertAlmostEqual(model.intercept_, expected_model.intercept_, places=9)
+        self.assertAlmostEqual(mse, expected_mse, places=12)
+        self.assertAlmostEqual(r2, expected_r2, places=10)
+
+    def test_polynomial_parity(self):
+        """Test polynomial fits match sklearn on well-conditioned features and agree on metrics with raw Year."""
+        scaled = self.df.assign(Year=(self.df['Year'] - 1950) / 100)
+        expected_model, expected_mse, expected_r2 = polynomial_regression(scaled, degree=2)
+        model, mse, r2 = polynomial_regression(scaled, degree=2, engine='stats')
+        np.testing.assert_allclose(model.coef_[1:], expected_model.coef_[1:], rtol=1e-7)
+        self.assertAlmostEqual(mse, expected_mse, places=10)
+        self.assertAlmostEqual(r2, expected_r2, places=8)
+
+        _, expected_mse, expected_r2 = polynomial_regression(self.df, degree=2)
+        _, mse, r2 = polynomial_regression(self.df, degree=2, engine='stats')
+        self.assertAlmostEqual(mse / expected_mse, 1.0, places=3)
+        self.assertAlmostEqual(r2, expected_r2, places=3)
+
+    def test_incremental_update(self):
+        """Test adding rows with partial_fit equals fitting all rows at once."""
+        full = SufficientStatsRegression().partial_fit(self.df)
+        incremental = SufficientStatsRegression()
+        for chunk in frame_chunks(self.df, 700):
+            incremental.partial_fit(chunk)
+        np.testing.assert_allclose(incremental.coef_, full.coef_, rtol=1e-10)
+        self.assertAlmostEqual(incremental.intercept_, full.intercept_, places=10)
+
+if __name__ == "__main__":
+    unittest.main()
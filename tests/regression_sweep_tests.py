@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from regression_sweep import degree_blocks, polynomial_sweep, standardized_features
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.model_selection import KFold, cross_val_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import PolynomialFeatures, StandardScaler
+
+class TestRegressionSweep(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 600
+        self.df = pd.DataFrame({'Population': rng.random(n), 'Year': rng.integers(1951, 2023, n),
+                                'Coal_CO2': rng.random(n)})
+        self.df['CO2_per_capita'] = (0.3 * self.df['Population'] + 0.002 * (self.df['Year'] - 1950)
+                                     + 0.2 * self.df['Coal_CO2'] ** 2 + rng.normal(0, 0.05, n))
+        self.feature_sets = {'population_year': ['Population', 'Year'],
+                             'with_coal': ['Population', 'Year', 'Coal_CO2']}
+
+    def test_degree_blocks_order(self):
+        """Test incrementally built terms match PolynomialFeatures without the bias column."""
+        X = self.df[['Population', 'Year', 'Coal_CO2']].to_numpy(dtype=np.float64)[:20]
+        np.testing.assert_allclose(np.hstack(degree_blocks(X, 4)),
+                                   PolynomialFeatures(4, include_bias=False).fit_transform(X))
+
+    def test_matches_sklearn_cross_validation(self):
+        """Test every swept combination equals the cross-validated sklearn pipeline MSE."""
+        results, _ = polynomial_sweep(self.df, self.feature_sets, degrees=[1, 2, 3], alphas=[0.0, 1.0],
+                                      executor='serial')
+        cv = KFold(5, shuffle=True, random_state=42)
+        for row in results.itertuples():
+            with self.subTest(features=row.Features, degree=row.Degree, alpha=row.Alpha):
+                X = standardized_features(self.df, self.feature_sets[row.Features])
+                model = make_pipeline(PolynomialFeatures(row.Degree, include_bias=False), StandardScaler(),
+                                      Ridge(alpha=row.Alpha) if row.Alpha else LinearRegression())
+                expected = -cross_val_score(model, X, self.df['CO2_per_capita'], cv=cv,
+                                            scoring='neg_mean_squared_error').mean()
+                self.assertAlmostEqual(row.MSE, expected, places=10)
+
+    def test_ranking_and_timings(self):
+        """Test results are ranked by MSE and every stage is timed, in parallel workers too."""
+        results, timings = polynomial_sweep(self.df, self.feature_sets, degrees=[1, 2], alphas=[0.0, 0.1],
+                                            executor='process', max_workers=2)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(results['MSE'].is_monotonic_increasing)
+        self.assertListEqual(list(results['Rank']), list(range(1, 9)))
+        self.assertListEqual(list(timings.index), ['split', 'expand', 'accumulate', 'solve', 'total'])
+
+    def test_expands_once_per_feature_set(self):
+        """Test the terms are expanded once per feature set and shared by its folds."""
+        with patch('regression_sweep.degree_blocks', side_effect=degree_blocks) as expand:
+            results, _ = polynomial_sweep(self.df, self.feature_sets, degrees=[1, 3], alphas=[0.0],
+                                          n_splits=4, executor='thread')
+        self.assertEqual(expand.call_count, len(self.feature_sets))
+        self.assertEqual(len(results), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from rolling_engine import grouped_rolling, rolling_mean
+
+class TestRollingEngine(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        lengths = {'Brazil': 3, 'China': 40, 'India': 25}
+        self.df = pd.DataFrame({
+            'Country': np.repeat(list(lengths), list(lengths.values())),
+            'Year': np.concatenate([np.arange(1990, 1990 + n) for n in lengths.values()]),
+            'CO2': rng.random(68),
+            'Population': rng.random(68) + 1,
+        }).sample(frac=1, random_state=1)
+        self.df.loc[self.df.sample(frac=0.2, random_state=2).index, 'CO2'] = np.nan
+        self.grouped = self.df.sort_values(['Country', 'Year']).groupby('Country')
+
+    def test_matches_pandas(self):
+        """Test every window statistic matches the per-group pandas equivalent."""
+        result = grouped_rolling(self.df, ['CO2', 'Population'], windows=(3, 5, 10, 20))
+        for column in ['CO2', 'Population']:
+            for window in (3, 5, 10, 20):
+                rolling = self.grouped[column].rolling(window, min_periods=1)
+                for stat in ['mean', 'std', 'min', 'max']:
+                    with self.subTest(column=column, stat=stat, window=window):
+                        expected = getattr(rolling, stat)().reset_index(level=0, drop=True)
+                        np.testing.assert_allclose(result[f'{column}_{stat}_{window}'],
+                                                   expected.reindex(self.df.index), rtol=1e-9, atol=1e-10)
+                with self.subTest(column=column, stat='ewma', window=window):
+                    expected = self.grouped[column].transform(lambda x: x.ewm(span=window).mean())
+                    np.testing.assert_allclose(result[f'{column}_ewma_{window}'],
+                                               expected.reindex(self.df.index), rtol=1e-9)
+            with self.subTest(column=column, stat='growth'):
+                expected = self.grouped[column].transform(lambda x: x / x.shift() - 1)
+                np.testing.assert_allclose(result[f'{column}_growth'], expected.reindex(self.df.index), rtol=1e-9)
+
+    def test_min_periods(self):
+        """Test windows with too few observations are NaN."""
+        result = grouped_rolling(self.df, ['CO2'], windows=(5,), statistics=('mean', 'max'), min_periods=4)
+        expected = self.grouped['CO2'].rolling(5, min_periods=4).max().reset_index(level=0, drop=True)
+        np.testing.assert_allclose(result['CO2_max_5'], expected.reindex(self.df.index))
+        self.assertTrue(result.loc[self.df['Country'] == 'Brazil', 'CO2_mean_5'].isna().all())
+
+    def test_rolling_mean(self):
+        """Test the single-column helper keeps the input index and name."""
+        result = rolling_mean(self.df, 'Population', 10)
+        self.assertTrue(result.index.equals(self.df.index))
+        self.assertEqual(result.name, 'Population_mean_10')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import tempfile
+import pandas as pd
+import numpy as np
+import mongomock
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../py_scripts")))
+from spark_backend import (get_spark, save_spark_output, spark_cube_cells, spark_read_mongodb, spark_read_json,
+                           spark_preprocess, stage_documents, whole_country_batches)
+from data_preprocessing import extract_co2_emission_data, list_countries, preprocess_frame
+from emissions_cube import cube_key, finest_cells
+from processed_data import load_processed, save_processed
+from owid_json_loader import load_owid_json
+
+RAW_SHARD = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data/raw/owid-co2-data-part-10.json"))
+
+# Sort both backends' outputs the same way before comparing
+def normalize(df):
+    df = df.astype({'Country': object})
+    return df.sort_values(['Country', 'Year']).reset_index(drop=True)
+
+class TestSparkBackend(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.spark = get_spark(master="local[2]")
+        except Exception as error:
+            # Spark needs a JVM; without one the gateway exits before a session exists
+            raise unittest.SkipTest(f"Spark is unavailable: {error}")
+        cls.staging = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(3)
+        cls.collection = mongomock.MongoClient()['group_5_project']['co2_emission']
+        for country in ['Brazil', 'World', 'China', 'India']:
+            entries = []
+            for year in range(1940, 1990):
+                entry = {'year': year}
+                for field in ['population', 'cumulative_luc_co2', 'coal_co2', 'oil_co2', 'gas_co2',
+                              'cement_co2', 'flaring_co2', 'other_industry_co2']:
+                    if rng.random() > 0.3:
+                        entry[field] = float(rng.random() * 1e6)
+                entries.append(entry)
+            cls.collection.insert_one({country: {'iso_code': country[:3].upper(), 'data': entries}})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.staging.cleanup()
+
+    def test_staged_documents(self):
+        """Test the cursor is staged as JSON-lines part files holding one document per line."""
+        paths = stage_documents(self.collection, list_countries(self.collection), self.staging.name,
+                                docs_per_file=3)
+        self.assertEqual(len(paths), 2)
+        with open(paths[0]) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_whole_country_batches(self):
+        """Test batches are recut at country boundaries without losing or reordering rows."""
+        df = pd.DataFrame({'Country': list('aaabbbbc'), 'Year': range(8)})
+        frames = [df.iloc[0:2], df.iloc[2:5], df.iloc[5:5], df.iloc[5:8]]
+        batches = list(whole_country_batches(frames))
+        self.assertListEqual([''.join(batch['Country']) for batch in batches], ['aaa', 'bbbb', 'c'])
+
+    def test_output_matches_processed_file(self):
+        """Test the Spark output is written in the pandas pipeline's processed Parquet schema."""
+        sdf = spark_read_mongodb(self.spark, self.collection, staging_dir=self.staging.name)
+        processed, _ = spark_preprocess(sdf)
+        with tempfile.TemporaryDirectory() as tmp:
+            save_spark_output(processed, os.path.join(tmp, 'spark.parquet'), os.path.join(tmp, 'spark.csv'),
+                              staging_dir=self.staging.name)
+            save_processed(preprocess_frame(extract_co2_emission_data(self.collection)),
+                           os.path.join(tmp, 'pandas.parquet'))
+            spark_df = load_processed(os.path.join(tmp, 'spark.parquet'))
+            pandas_df = load_processed(os.path.join(tmp, 'pandas.parquet'))
+        self.assertEqual(spark_df['Country'].dtype, 'category')
+        pd.testing.assert_series_equal(spark_df.dtypes, pandas_df.dtypes)
+        pd.testing.assert_frame_equal(normalize(spark_df), normalize(pandas_df), rtol=1e-6)
+
+    def test_cube_cells_parity(self):
+        """Test Spark's cube cells, World included, match the pandas cells and key."""
+        sdf = spark_read_mongodb(self.spark, self.collection, staging_dir=self.staging.name)
+        cells = spark_cube_cells(sdf)
+        expected = finest_cells(extract_co2_emission_data(self.collection))
+        self.assertIn('World', set(cells['Country']))
+        pd.testing.assert_frame_equal(normalize(cells), normalize(expected))
+        self.assertEqual(cube_key(cells), cube_key(expected))
+
+    def test_extraction_parity(self):
+        """Test Spark extraction of the JSON shard matches the pandas loader."""
+        sdf = spark_read_json(self.spark, RAW_SHARD)
+        expected = load_owid_json(RAW_SHARD).astype({'ISO_Code': object})
+        pd.testing.assert_frame_equal(normalize(sdf.toPandas()), normalize(expected), check_dtype=False)
+
+    def test_preprocess_parity(self):
+        """Test the Spark and pandas backends produce the same preprocessed frame and constants."""
+        for strategies in [None, {'CO2': 'interpolate', 'Population': 'ffill'}]:
+            with self.subTest(strategies=strategies):
+                sdf = spark_read_mongodb(self.spark, self.collection, staging_dir=self.staging.name)
+                processed, transform = spark_preprocess(sdf, strategies=strategies)
+                expected, expected_transform = preprocess_frame(
+                    extract_co2_emission_data(self.collection), strategies=strategies, return_transform=True)
+
+                pd.testing.assert_frame_equal(normalize(processed.toPandas()), normalize(expected),
+                                              check_dtype=False, rtol=1e-9)
+                for column, value in expected_transform.fill_values.items():
+                    self.assertAlmostEqual(transform.fill_values[column], value, places=6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -62,6 +62,22 @@ class TestTimeSeriesAnalysis(unittest.TestCase):
         self.assertIn('CO2_per_capita_MA', filtered_df.columns)
         self.assertAlmostEqual(filtered_df[filtered_df['Country'] == 'Afghanistan']['CO2_per_capita_MA'].iloc[1], 1.25)
 
+    def test_moving_average_paths_match_on_shuffled_rows(self):
+        """Test the rolling engine and every executor path give the same moving average on shuffled rows."""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'Country': np.repeat(['Afghanistan', 'Brazil', 'China'], 40),
+                           'Year': np.tile(np.arange(1980, 2020), 3),
+                           'CO2_per_capita': rng.random(120)})
+        df = df.sample(frac=1.0, random_state=2).reset_index(drop=True)
+        expected = filter_and_calculate_moving_average(df, ['Afghanistan', 'China'], window_size=5)
+        rows = expected[expected['Country'] == 'China'].sort_values('Year')
+        np.testing.assert_allclose(rows['CO2_per_capita_MA'].iloc[4], rows['CO2_per_capita'].iloc[:5].mean())
+        for executor in ['serial', 'thread', 'process']:
+            with self.subTest(executor=executor):
+                result = filter_and_calculate_moving_average(df, ['Afghanistan', 'China'], window_size=5,
+                                                             executor=executor)
+                pd.testing.assert_series_equal(result['CO2_per_capita_MA'], expected['CO2_per_capita_MA'])
+
     @patch("matplotlib.pyplot.show")
     def test_plot_raw_data(self, mock_show):
         """Test plotting raw data (mock plt.show)."""